@@ -1,9 +1,12 @@
 import json
 import sys
 
-from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLineEdit, QListWidget,
+from PyQt6.QtCore import QTimer
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLineEdit, QListView,
                              QPushButton, QLabel, QFormLayout, QSpinBox, QTextEdit, QApplication, QMessageBox)
+from component.cardListModel import CardListModel
 from manager.cardDataManager import CardDataManager
+from manager.saveEditOps import default_card_tag, new_card_template
 
 
 class AddCardDialog(QDialog):
@@ -14,20 +17,7 @@ class AddCardDialog(QDialog):
         self.selected_card = None
         self.base_uid = base_uid
         self.base_sudan_pool_cards_length = base_sudan_pool_cards_length
-        self.new_card_data = {
-            'uid': self.base_uid,
-            'id': -1,  # 默认未知卡牌
-            'count': 1,
-            'life': 0,
-            'rareup': 0,
-            'tag': {},
-            'equip_slots': [],
-            'equips': [],
-            'bag': 0,
-            'bagpos': 2,
-            'custom_name': "",
-            'custom_text': ""
-        }
+        self.new_card_data = new_card_template(self.base_uid)  # 默认未知卡牌
         self.init_ui()
 
     def init_ui(self):
@@ -42,16 +32,24 @@ class AddCardDialog(QDialog):
         # 搜索区域
         search_layout = QHBoxLayout()
         self.search_input = QLineEdit()
-        self.search_input.setPlaceholderText("输入卡牌名称搜索...")
-        self.search_input.textChanged.connect(self.update_card_list)
+        self.search_input.setPlaceholderText("输入卡牌名称、拼音、拼音首字母或id搜索...")
+        # 输入停顿后再搜索，避免每次按键都刷新列表
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(150)
+        self.search_timer.timeout.connect(self.update_card_list)
+        self.search_input.textChanged.connect(self.search_timer.start)
         search_btn = QPushButton("搜索")
         search_btn.clicked.connect(self.update_card_list)
         search_layout.addWidget(self.search_input)
         search_layout.addWidget(search_btn)
 
         # 卡牌列表
-        self.card_list = QListWidget()
-        self.card_list.itemClicked.connect(self.show_card_details)
+        self.card_model = CardListModel(self.card_mgr.get_search_index(), self)
+        self.card_list = QListView()
+        self.card_list.setUniformItemSizes(True)
+        self.card_list.setModel(self.card_model)
+        self.card_list.clicked.connect(self.show_card_details)
 
         left_panel.addLayout(search_layout)
         left_panel.addWidget(self.card_list)
@@ -157,36 +155,21 @@ class AddCardDialog(QDialog):
 
     # 更新卡牌列表
     def update_card_list(self):
-        search_text = self.search_input.text().lower()
-        self.card_list.clear()
-
-        # 获取所有卡牌数据并按ID排序
-        cards = sorted(self.card_mgr.card_data_mapping.values(),
-                       key=lambda x: x['id'],
-                       reverse=False)
-
-        for card in cards:
-            if search_text in card['name'].lower():
-                item_text = f"{card['id']} - {card['name']}"
-                self.card_list.addItem(item_text)
+        self.search_timer.stop()
+        self.card_model.set_query(self.search_input.text())
 
     # 展示卡牌详细信息
-    def show_card_details(self, item):
+    def show_card_details(self, index):
         try:
-            # 解析选择的卡牌ID
-            card_id = int(item.text().split(' - ')[0])
+            # 获取选择的卡牌ID
+            card_id = index.data(CardListModel.CardIdRole)
             card_data = self.card_mgr.get_card_data(card_id)
 
             # 将选择的卡牌id赋值给新卡牌
             self.id_spin.setValue(card_id)  # 更新显示
             self.new_card_data['id'] = card_id
             # 判断新增卡牌类型，如果是苏丹卡则标签中增加苏丹卡池索引，如果是人物卡标签中增加追随者标签，如果是物品卡用户需自己添加拥有标签
-            if card_data.get('type', '') == "sudan":
-                self.new_card_data['tag'] = f"{{'sudan_pool_index': {self.base_sudan_pool_cards_length+1}}}"
-            elif card_data.get('type', '') == "char":
-                self.new_card_data['tag'] = "{'adherent': 1}"
-            else:
-                self.new_card_data['tag'] = "{}"
+            self.new_card_data['tag'] = str(default_card_tag(card_data.get('type', ''), self.base_sudan_pool_cards_length))
             self.tag_edit.setText(self.new_card_data['tag'])  # 更新显示
             # 显示卡牌信息
             info = (
@@ -0,0 +1,57 @@
+from PyQt6.QtCore import QEvent, QModelIndex, QPersistentModelIndex, QSize, Qt, pyqtSignal
+from PyQt6.QtWidgets import QApplication, QStyle, QStyledItemDelegate, QStyleOptionButton
+
+
+# 在单元格中绘制按钮的委托，按钮文字取自单元格的显示文本
+# 只绘制不创建控件，表格行数再多也不会产生大量按钮控件；点击后发出clicked信号
+class ButtonDelegate(QStyledItemDelegate):
+    clicked = pyqtSignal(QModelIndex)
+
+    # 按钮与单元格边缘的间距
+    MARGIN = 2
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._pressed = QPersistentModelIndex()
+
+    def _button_option(self, option, index) -> QStyleOptionButton:
+        button = QStyleOptionButton()
+        button.rect = option.rect.adjusted(self.MARGIN, self.MARGIN, -self.MARGIN, -self.MARGIN)
+        button.text = str(index.data() or "")
+        button.state = QStyle.StateFlag.State_Enabled
+        if self._pressed.isValid() and QModelIndex(self._pressed) == index:
+            button.state |= QStyle.StateFlag.State_Sunken
+        else:
+            button.state |= QStyle.StateFlag.State_Raised
+        if option.state & QStyle.StateFlag.State_MouseOver:
+            button.state |= QStyle.StateFlag.State_MouseOver
+        return button
+
+    def paint(self, painter, option, index):
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawControl(QStyle.ControlElement.CE_PushButton, self._button_option(option, index), painter, option.widget)
+
+    def sizeHint(self, option, index):
+        text_width = option.fontMetrics.horizontalAdvance(str(index.data() or ""))
+        return QSize(text_width + 24 + self.MARGIN * 2, option.fontMetrics.height() + 10 + self.MARGIN * 2)
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() not in (QEvent.Type.MouseButtonPress, QEvent.Type.MouseButtonRelease,
+                                QEvent.Type.MouseButtonDblClick):
+            return False
+        if event.button() != Qt.MouseButton.LeftButton:
+            return False
+        inside = option.rect.contains(event.position().toPoint())
+        if event.type() == QEvent.Type.MouseButtonRelease:
+            clicked = self._pressed.isValid() and QModelIndex(self._pressed) == index and inside
+            self._pressed = QPersistentModelIndex()
+            if option.widget is not None:
+                option.widget.viewport().update()
+            if clicked:
+                self.clicked.emit(index)
+            return True
+        if inside:
+            self._pressed = QPersistentModelIndex(index)
+            if option.widget is not None:
+                option.widget.viewport().update(option.rect)
+        return True
@@ -69,7 +69,7 @@ class CardDetailWindow(QWidget):
                 formatted.append(f"   无")
             # 详细配置
             formatted.append("\n详细配置：")
-            formatted.append(json.dumps(self.card_data, indent=2, ensure_ascii=False))
+            formatted.append(json.dumps(dict(self.card_data), indent=2, ensure_ascii=False))
 
             return "\n".join(formatted)
         except Exception as e:
@@ -0,0 +1,32 @@
+from PyQt6.QtCore import QAbstractListModel, QModelIndex, Qt
+
+from manager.cardSearchIndex import CardSearchIndex
+
+
+# 新增卡牌对话框中的卡牌列表模型，只保存搜索结果的位置，不为每张卡牌创建列表项
+class CardListModel(QAbstractListModel):
+    CardIdRole = Qt.ItemDataRole.UserRole
+
+    def __init__(self, search_index: CardSearchIndex, parent=None):
+        super().__init__(parent)
+        self.search_index = search_index
+        self._rows = search_index.search('')
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        card_id, name = self.search_index.entries[self._rows[index.row()]]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return f"{card_id} - {name}"
+        if role == self.CardIdRole:
+            return card_id
+        return None
+
+    # 按搜索内容更新列表
+    def set_query(self, text: str):
+        self.beginResetModel()
+        self._rows = self.search_index.search(text)
+        self.endResetModel()
@@ -0,0 +1,284 @@
+from functools import cmp_to_key
+from typing import Callable, Dict, List, Optional
+
+from PyQt6.QtCore import QAbstractTableModel, QCollator, QModelIndex, QSortFilterProxyModel, Qt, pyqtSignal
+
+# 卡牌表格的列：(表头, 卡牌字段)，字段为None的列不对应存档字段
+CARD_COLUMNS = (
+    ("查看", None), ("删除", None), ("UID", 'uid'), ("ID", 'id'), ("名称", None), ("数量", 'count'),
+    ("存在回合", 'life'), ("强化次数", 'rareup'), ("标签", 'tag'), ("装备槽", 'equip_slots'), ("装备", 'equips'),
+    ("背包", 'bag'), ("背包位置", 'bagpos'), ("自定义名称", 'custom_name'), ("描述", 'custom_text'), ("查看", None),
+)
+COLUMN_DETAIL, COLUMN_DELETE, COLUMN_UID, COLUMN_ID, COLUMN_NAME = 0, 1, 2, 3, 4
+COLUMN_TAG, COLUMN_BAG, COLUMN_BAGPOS, COLUMN_DETAIL_END = 8, 11, 12, 15
+# 按钮列及按钮文字
+BUTTON_COLUMNS = {COLUMN_DETAIL: "查看详情", COLUMN_DELETE: "删除", COLUMN_DETAIL_END: "查看详情"}
+# 可编辑的列：数量 ~ 描述
+EDITABLE_COLUMNS = frozenset(range(5, 15))
+# 按数值排序的列
+NUMERIC_COLUMNS = frozenset((2, 3, 5, 6, 7))
+# 按字符串显示而不是str()的列
+TEXT_COLUMNS = frozenset((13, 14))
+
+
+# 卡牌表格模型，直接读取存档的cards列表，不为每张卡牌创建表格项和按钮，视图只请求可见行的数据
+# 编辑后发出edited信号，由页面校验并写回卡牌，单元格显示的始终是卡牌中的值
+class CardTableModel(QAbstractTableModel):
+    edited = pyqtSignal(int, int, str)  # 卡牌在cards中的序号, 列, 输入的文本
+
+    def __init__(self, main_window, parent=None):
+        super().__init__(parent)
+        self.main_window = main_window
+        self.cards: List[dict] = []
+        self._row_count = 0
+        # 数据版本，行数变化、重置或某列排序键重建时递增，排序代理据此重新获取排序键
+        self.revision = 0
+        # 已生成的排序键：列 -> 排序键列表；文本列另外记录按文本排好的行和各行文本，用于单行更新
+        self._sort_keys: Dict[int, list] = {}
+        self._text_orders: Dict[int, tuple] = {}
+        self._collator = QCollator()
+        self._collator.setNumericMode(True)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._row_count
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(CARD_COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return CARD_COLUMNS[section][0]
+        return super().headerData(section, orientation, role)
+
+    def flags(self, index):
+        flags = Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+        if index.column() in EDITABLE_COLUMNS:
+            flags |= Qt.ItemFlag.ItemIsEditable
+        return flags
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        # 行数尚未同步时不读取已不存在的卡牌
+        if not index.isValid() or index.row() >= len(self.cards):
+            return None
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            return self.cell_text(index.row(), index.column())
+        if role == Qt.ItemDataRole.ToolTipRole and index.column() == COLUMN_TAG:
+            return self.describe_tags(self.cards[index.row()].get('tag')) or None
+        return None
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if role != Qt.ItemDataRole.EditRole or not index.isValid() or index.column() not in EDITABLE_COLUMNS:
+            return False
+        self.edited.emit(index.row(), index.column(), str(value))
+        self.refresh_rows(index.row(), index.row())
+        return True
+
+    # 单元格显示的文本
+    def cell_text(self, row: int, column: int) -> str:
+        if column in BUTTON_COLUMNS:
+            return BUTTON_COLUMNS[column]
+        card = self._card(row)
+        if column == COLUMN_NAME:
+            return self.card_name(card)
+        value = card.get(CARD_COLUMNS[column][1])
+        if column in TEXT_COLUMNS:
+            return value if isinstance(value, str) else ""
+        return str(value)
+
+    # 卡牌名称，游戏数据尚未加载完成时显示占位文本
+    def card_name(self, card: dict) -> str:
+        card_mgr = self.main_window.card_mgr
+        return card_mgr.get_card_data(card.get('id')).get('name') if card_mgr else "加载中..."
+
+    # 标签列的提示信息，列出每个标签的元数据
+    def describe_tags(self, tags) -> str:
+        tag_mgr = self.main_window.tag_mgr
+        if tag_mgr is None or not isinstance(tags, dict) or not tags:
+            return ""
+        return "\n".join(tag_mgr.describe_tag(key, value) for key, value in tags.items())
+
+    # 显示新的卡牌列表；仍是同一个列表且行数不变时只通知数据变化，保留选中行和滚动位置
+    def set_cards(self, cards: List[dict]):
+        if cards is self.cards and len(cards) == self._row_count:
+            self.refresh_rows(0, self._row_count - 1)
+            return
+        self.beginResetModel()
+        self.cards = cards
+        self._row_count = len(cards)
+        self._clear_sort_keys()
+        self.endResetModel()
+
+    # 存档分块读取时cards列表已追加了新元素，通知视图插入新增的行
+    def append_rows(self):
+        if len(self.cards) <= self._row_count:
+            return
+        self.beginInsertRows(QModelIndex(), self._row_count, len(self.cards) - 1)
+        self._row_count = len(self.cards)
+        self._clear_sort_keys()
+        self.endInsertRows()
+
+    # 通知视图重新读取first~last行
+    def refresh_rows(self, first: int, last: int):
+        if last < first:
+            return
+        self._update_sort_keys(range(first, last + 1))
+        self.dataChanged.emit(self.index(first, 0), self.index(last, len(CARD_COLUMNS) - 1))
+
+    # 通知视图重新读取uids中卡牌所在的行
+    def refresh_uids(self, uids):
+        rows = [row for row in self._synced_rows() if self.cards[row].get('uid') in uids]
+        if not rows:
+            return
+        self._update_sort_keys(rows)
+        last_column = len(CARD_COLUMNS) - 1
+        for row in rows:
+            self.dataChanged.emit(self.index(row, 0), self.index(row, last_column))
+
+    # 视图已知且仍在cards中的行；页面隐藏时cards可能已经变短而行数尚未同步
+    def _synced_rows(self) -> range:
+        return range(min(self._row_count, len(self.cards)))
+
+    # 某一行的卡牌，行数尚未同步、卡牌已不存在时返回空字典
+    def _card(self, row: int) -> dict:
+        return self.cards[row] if row < len(self.cards) else {}
+
+    # 查找uid对应的行，不存在时返回-1
+    def row_of_uid(self, uid) -> int:
+        for row in self._synced_rows():
+            if self.cards[row].get('uid') == uid:
+                return row
+        return -1
+
+    # 某一列的排序键，与原表格项的比较方式一致：
+    # 数值列按整数比较（无法转换时按文本），背包列按(背包, 背包位置)比较，其余列按自然顺序（数字按数值）比较
+    # 每列第一次排序时生成并缓存，单元格变化时只更新变化的行
+    def sort_keys(self, column: int) -> list:
+        keys = self._sort_keys.get(column)
+        if keys is None:
+            keys = self._build_sort_keys(column)
+            self._sort_keys[column] = keys
+        return keys
+
+    def _build_sort_keys(self, column: int) -> list:
+        rows = range(self._row_count)
+        if column in BUTTON_COLUMNS:
+            return list(rows)
+        if column not in NUMERIC_COLUMNS and column not in (COLUMN_BAG, COLUMN_BAGPOS):
+            return self._build_text_keys(column)
+        return [self._row_sort_key(row, column) for row in rows]
+
+    # 数值列和背包列单行的排序键
+    def _row_sort_key(self, row: int, column: int):
+        if column in (COLUMN_BAG, COLUMN_BAGPOS):
+            card = self._card(row)
+            return _to_number(card.get('bag')), _to_number(card.get('bagpos'))
+        return _to_number(self.cell_text(row, column))
+
+    # 文本列先用QCollator排一次序，再以名次作为排序键，比较时无需再调用QCollator
+    def _build_text_keys(self, column: int) -> list:
+        compare = self._collator.compare
+        texts = [self.cell_text(row, column) for row in range(self._row_count)]
+        order = sorted(range(self._row_count), key=cmp_to_key(lambda a, b: compare(texts[a], texts[b])))
+        keys = [0] * len(texts)
+        rank = 0
+        for position, row in enumerate(order):
+            if position and compare(texts[order[position - 1]], texts[row]) != 0:
+                rank = position
+            keys[row] = rank
+        self._text_orders[column] = (order, texts)
+        return keys
+
+    # 行数变化或整体重置后丢弃所有排序键
+    def _clear_sort_keys(self):
+        self._sort_keys.clear()
+        self._text_orders.clear()
+        self.revision += 1
+
+    # 单元格内容变化后更新已生成的排序键中这些行的键，排序代理持有的键列表随之更新
+    def _update_sort_keys(self, rows):
+        for column, keys in list(self._sort_keys.items()):
+            if column in BUTTON_COLUMNS:
+                continue
+            if column in self._text_orders:
+                for row in rows:
+                    if not self._update_text_key(column, keys, row):
+                        # 名次之间已无法再插入，重新生成该列
+                        del self._sort_keys[column]
+                        del self._text_orders[column]
+                        self.revision += 1
+                        break
+            else:
+                for row in rows:
+                    keys[row] = self._row_sort_key(row, column)
+
+    # 把一行按新的文本插入有序行列表，名次取相邻行之间的值，与相邻行文本相同时取相同名次；无法插入时返回False
+    def _update_text_key(self, column: int, keys: list, row: int) -> bool:
+        order, texts = self._text_orders[column]
+        text = self.cell_text(row, column)
+        if text == texts[row]:
+            return True
+        compare = self._collator.compare
+        order.remove(row)
+        texts[row] = text
+        position, end = 0, len(order)
+        while position < end:
+            middle = (position + end) // 2
+            if compare(text, texts[order[middle]]) < 0:
+                end = middle
+            else:
+                position = middle + 1
+        previous = order[position - 1] if position else None
+        following = order[position] if position < len(order) else None
+        order.insert(position, row)
+        if previous is not None and compare(texts[previous], text) == 0:
+            keys[row] = keys[previous]
+        elif following is not None and compare(texts[following], text) == 0:
+            keys[row] = keys[following]
+        elif previous is None:
+            keys[row] = keys[following] - 1 if following is not None else 0
+        elif following is None:
+            keys[row] = keys[previous] + 1
+        else:
+            middle = (keys[previous] + keys[following]) / 2
+            if not keys[previous] < middle < keys[following]:
+                return False
+            keys[row] = middle
+        return True
+
+
+# 数值排序键，无法转换为数字的值排在数字之后并按文本比较
+def _to_number(value):
+    try:
+        return 0, float(value), ""
+    except (TypeError, ValueError):
+        return 1, 0.0, str(value)
+
+
+# 卡牌表格的排序和筛选代理
+# 排序键由模型按列生成并维护，模型数据版本变化时重新获取；筛选条件为作用于卡牌字典的函数
+class CardSortFilterProxyModel(QSortFilterProxyModel):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._row_filter: Optional[Callable[[dict], bool]] = None
+        self._sort_keys = None
+        self._sort_keys_for = None  # (列, 模型数据版本)
+
+    # 设置筛选条件，为None时显示全部卡牌
+    def set_row_filter(self, row_filter: Optional[Callable[[dict], bool]]):
+        self._row_filter = row_filter
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if self._row_filter is None:
+            return True
+        cards = self.sourceModel().cards
+        # 行数尚未同步时已不存在的卡牌不显示
+        return source_row < len(cards) and self._row_filter(cards[source_row])
+
+    def lessThan(self, left, right):
+        model = self.sourceModel()
+        column = left.column()
+        if self._sort_keys_for != (column, model.revision):
+            self._sort_keys = model.sort_keys(column)
+            self._sort_keys_for = (column, model.revision)
+        return self._sort_keys[left.row()] < self._sort_keys[right.row()]
@@ -1,4 +1,3 @@
-import ast
 import os
 
 import json5
@@ -7,17 +6,19 @@ from typing import Dict
 import sys
 from functools import partial
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-                             QTableWidget, QTableWidgetItem, QLineEdit, QPushButton,
-                             QLabel, QMessageBox, QTextEdit, QFileDialog, QDialog, QProgressDialog, QInputDialog)
-from PyQt6.QtCore import Qt, QFileSystemWatcher
+                             QTableView, QHeaderView, QAbstractItemView, QLineEdit, QPushButton,
+                             QLabel, QMessageBox, QTextEdit, QFileDialog, QDialog, QProgressDialog, QInputDialog,
+                             QComboBox)
+from PyQt6.QtCore import Qt
 from component.startupDialog import StartupDialog
 from component.cardDetailWindow import CardDetailWindow
 from component.addCardDialog import AddCardDialog
-from component.smartTableItem import SmartTableItem
-from component.compoundSortItem import CompoundSortItem
+from component.buttonDelegate import ButtonDelegate
+from component.cardTableModel import CardTableModel, CardSortFilterProxyModel, BUTTON_COLUMNS, COLUMN_DELETE, COLUMN_UID
 
 from manager.cardDataManager import CardDataManager
 from manager.tagDataManager import TagDataManager
+from manager.saveEditOps import add_card, remove_card, item_edit_op
 
 
 # 软件主界面
@@ -27,18 +28,6 @@ class CardTablePage(QWidget):
         self.main_window = main_window
         self.config = self.main_window.config
         self.initUI()
-        self._connect_signals()  # 初始化时连接信号
-
-    # 连接表格数据变更信号
-    def _connect_signals(self):
-        self.table.itemChanged.connect(self.update_card_data)
-
-    # 断开表格数据变更信号
-    def _disconnect_signals(self):
-        try:
-            self.table.itemChanged.disconnect(self.update_card_data)
-        except TypeError:
-            pass  # 忽略未连接时的错误
 
     # 界面初始化
     def initUI(self):
@@ -56,6 +45,21 @@ class CardTablePage(QWidget):
         search_layout.addWidget(self.search_input)
         search_layout.addWidget(search_button)
 
+        # 标签筛选区域，标签可输入code或中文名
+        tag_filter_layout = QHBoxLayout()
+        self.tag_filter_input = QLineEdit()
+        self.tag_filter_input.setPlaceholderText("输入标签code或中文名进行筛选...")
+        self.tag_filter_input.returnPressed.connect(self.filter_by_tag)
+        self.tag_type_combo = QComboBox()
+        self.tag_type_combo.addItem("全部标签类型", "")
+        self.tag_type_combo.currentIndexChanged.connect(self.filter_by_tag)
+        tag_filter_button = QPushButton("筛选")
+        tag_filter_button.clicked.connect(self.filter_by_tag)
+        tag_filter_layout.addWidget(QLabel("标签筛选："))
+        tag_filter_layout.addWidget(self.tag_filter_input)
+        tag_filter_layout.addWidget(self.tag_type_combo)
+        tag_filter_layout.addWidget(tag_filter_button)
+
         # 添加过滤按钮
         filter_btn_layout = QHBoxLayout()
         self.btn_show_all = QPushButton("查看全部")
@@ -80,18 +84,31 @@ class CardTablePage(QWidget):
         filter_btn_layout.addWidget(self.btn_show_hidden)
         filter_btn_layout.addWidget(self.add_new_card_btn)
 
-        # 卡片表格
-        self.table = QTableWidget()
-        self.table.setColumnCount(16)  # TODO:记得要修改卡片表格的列数
-        self.table.setHorizontalHeaderLabels([
-            "查看", "删除", "UID", "ID", "名称", "数量", "存在回合", "强化次数", "标签",
-            "装备槽", "装备", "背包", "背包位置", "自定义名称", "描述", "查看"
-        ])
+        # 卡片表格：模型直接读取存档的cards列表，只绘制可见行，按钮由委托绘制
+        self.model = CardTableModel(self.main_window, self)
+        self.model.edited.connect(self.update_card_data)
+        self.proxy = CardSortFilterProxyModel(self)
+        self.proxy.setSourceModel(self.model)
+        self.table = QTableView()
+        self.table.setModel(self.proxy)
+        self.button_delegate = ButtonDelegate(self.table)
+        self.button_delegate.clicked.connect(self.on_button_clicked)
+        for column in BUTTON_COLUMNS:
+            self.table.setItemDelegateForColumn(column, self.button_delegate)
+        self.table.setMouseTracking(True)
+        self.table.setAlternatingRowColors(True)  # 设置隔行颜色区分
+        # 行高固定，不需要逐行计算；列宽只按前若干行内容计算
+        vertical_header = self.table.verticalHeader()
+        vertical_header.setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        vertical_header.setDefaultSectionSize(self.fontMetrics().height() + 14)
+        self.table.horizontalHeader().setResizeContentsPrecision(200)
+        self.table.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
         self.table.setSortingEnabled(True)  # 启用表头点击排序
         self.table.horizontalHeader().setSortIndicatorShown(True)  # 显示排序指示器
 
         # 将控件加入主布局
         main_layout.addLayout(search_layout)
+        main_layout.addLayout(tag_filter_layout)
         main_layout.addLayout(filter_btn_layout)
         main_layout.addWidget(self.table)
         self.setLayout(main_layout)
@@ -103,110 +120,110 @@ class CardTablePage(QWidget):
 
     # 加载卡片数据到表格
     def load_data(self):
-        # 加载数据的时候断开信号连接
-        self._disconnect_signals()
-
-        self.table.setRowCount(len(self.config.get('cards', {})))
-
-        for row, card in enumerate(self.config.get('cards', {})):
-            # 添加查看卡片初始信息按钮
-            front_btn = QPushButton("查看详情")
-            front_btn.clicked.connect(partial(self.show_detail, row))
-            self.table.setCellWidget(row, 0, front_btn)
-
-            # 添加删除按钮到列1
-            delete_btn = QPushButton("删除")
-            delete_btn.clicked.connect(partial(self.delete_card, row))
-            self.table.setCellWidget(row, 1, delete_btn)
-
-            # 创建不可编辑的UID项和id项
-            uid_item = SmartTableItem(str(card.get('uid')))
-            uid_item.setFlags(uid_item.flags() ^ Qt.ItemFlag.ItemIsEditable)
-            id_item = QTableWidgetItem(str(card.get('id')))
-            id_item.setFlags(id_item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-
-            # 获取卡牌id对应的名称
-            card_name = QTableWidgetItem(self.main_window.card_mgr.get_card_data(card.get('id')).get('name'))
-            card_name.setFlags(card_name.flags() & ~Qt.ItemFlag.ItemIsEditable)
-
-            self.table.setItem(row, 2, uid_item)
-            self.table.setItem(row, 3, id_item)
-            self.table.setItem(row, 4, card_name)
-            self.table.setItem(row, 5, SmartTableItem(str(card.get('count'))))
-            self.table.setItem(row, 6, SmartTableItem(str(card.get('life'))))
-            self.table.setItem(row, 7, SmartTableItem(str(card.get('rareup'))))
-            self.table.setItem(row, 8, QTableWidgetItem(str(card.get('tag'))))
-            self.table.setItem(row, 9, QTableWidgetItem(str(card.get('equip_slots'))))
-            self.table.setItem(row, 10, QTableWidgetItem(str(card.get('equips'))))
-            self.table.setItem(row, 11, CompoundSortItem(str(card.get('bag'))))
-            self.table.setItem(row, 12, CompoundSortItem(str(card.get('bagpos'))))
-            self.table.setItem(row, 13, QTableWidgetItem(card.get('custom_name')))
-            self.table.setItem(row, 14, QTableWidgetItem(card.get('custom_text')))
-
-            # 添加末端操作按钮
-            end_btn = QPushButton("查看详情")
-            end_btn.clicked.connect(partial(self.show_detail, row))
-            self.table.setCellWidget(row, 15, end_btn)
-
-        # 重新连接信号
-        self._connect_signals()
-
+        self.model.set_cards(self.config.get('cards', []))
+        self.resize_to_contents()
+
+    # 按存档修改更新表格：增删卡牌时重新加载，修改卡牌时只刷新对应的行
+    def apply_changes(self, changes):
+        uids = set()
+        for change in changes:
+            if change.section != 'cards':
+                continue
+            if change.uid is None:
+                self.load_data()
+                return
+            uids.add(change.uid)
+        if uids:
+            self.model.refresh_uids(uids)
+
+    # 存档分块读取时cards列表已追加新元素，只通知表格插入新增的行
+    def append_rows(self, start: int):
+        if self.model.cards is not self.config.get('cards'):
+            self.model.set_cards(self.config.get('cards', []))
+        else:
+            self.model.append_rows()
+
+    # 按内容调整列宽
+    def resize_to_contents(self):
         self.table.resizeColumnsToContents()  # 自动调整列宽
         # 标签、装备栏和装备太长了，设置一个列宽最大值
         self.table.setColumnWidth(8, min(self.table.columnWidth(8), 200))
         self.table.setColumnWidth(9, min(self.table.columnWidth(9), 200))
         self.table.setColumnWidth(10, min(self.table.columnWidth(10), 200))
-        self.table.resizeRowsToContents()  # 自动调整行高
-        self.table.setAlternatingRowColors(True)  # 设置隔行颜色区分
 
     # 根据名字搜索卡片
     def filter_cards(self):
-        search_id = self.search_input.text().strip()
-        for row in range(self.table.rowCount()):
-            item = self.table.item(row, 4)  # 名字列
-            match = search_id.lower() in item.text().lower()
-            self.table.setRowHidden(row, not match)
+        search_id = self.search_input.text().strip().lower()
+        if not search_id:
+            self.proxy.set_row_filter(None)
+            return
+        self.proxy.set_row_filter(lambda card: search_id in self.model.card_name(card).lower())
+
+    # 标签管理器就绪后更新标签类型下拉框
+    def update_tag_types(self):
+        tag_mgr = self.main_window.tag_mgr
+        if tag_mgr is None:
+            return
+        self.tag_type_combo.blockSignals(True)
+        self.tag_type_combo.clear()
+        self.tag_type_combo.addItem("全部标签类型", "")
+        for tag_type in tag_mgr.get_tag_types():
+            self.tag_type_combo.addItem(tag_type, tag_type)
+        self.tag_type_combo.blockSignals(False)
+        # 标签列的提示在显示时才生成，不需要逐行刷新
+
+    # 根据标签code/中文名和标签类型筛选卡牌，存档中的标签可能是code也可能是中文名，统一转换为标签数据后比较
+    def filter_by_tag(self):
+        tag_mgr = self.main_window.tag_mgr
+        tag_text = self.tag_filter_input.text().strip()
+        tag_type = self.tag_type_combo.currentData() or ""
+        target = tag_mgr.find_tag(tag_text) if tag_mgr and tag_text else None
+        if not tag_text and not tag_type:
+            self.proxy.set_row_filter(None)
+            return
+
+        def match(card) -> bool:
+            tags = card.get('tag')
+            if not isinstance(tags, dict):
+                return False
+            if tag_text:
+                if target is not None:
+                    if not any(tag_mgr.find_tag(key) is target for key in tags):
+                        return False
+                elif tag_text not in tags:
+                    return False
+            if tag_type:
+                return any((tag_mgr.find_tag(key) or {}).get('type') == tag_type for key in tags)
+            return True
+
+        self.proxy.set_row_filter(match)
 
     # 根据卡牌在背包中的未知过滤卡牌
     # TODO 这里如果位置为(0,0)或者(0,1)则不显示在手牌中，除了背包中真正在(0,1)位置的那一张牌
     # TODO tag中如果存在“own:-1”说明此卡牌在手牌中存在过但已经被使用，此处未加筛选
     def filter_by_pos_mode(self, mode):
-        for row in range(self.table.rowCount()):
-            bag = int(self.table.item(row, 11).text())
-            bagpos = int(self.table.item(row, 12).text())
-
-            # 判断是否为(0,0)或者(0,1)
-            invisible = (bag == 0 and bagpos == 0) or (bag == 0 and bagpos == 1)
-
-            if invisible:
-                pass
-            else:
-                # 解析第8列字段
-                item_text = self.table.item(row, 8).text().strip()
-                try:
-                    data_dict = ast.literal_eval(item_text)
-
-                    if not isinstance(data_dict, dict):
-                        raise Exception
-
-                    if data_dict.get('own', None) == -1:
-                        invisible = True
-                except Exception as e:
-                    self.show_message("错误", f"解析错误：{str(e)}")
-
-            # 根据模式设置行可见性
-            if mode == 'all':
-                self.table.setRowHidden(row, False)
-            elif mode == 'hand':
-                self.table.setRowHidden(row, invisible)
-            elif mode == 'hidden':
-                self.table.setRowHidden(row, not invisible)
+        # 判断是否为(0,0)或者(0,1)，或者已被使用（own为-1）
+        def invisible(card) -> bool:
+            if card.get('bag') == 0 and card.get('bagpos') in (0, 1):
+                return True
+            tags = card.get('tag')
+            return isinstance(tags, dict) and tags.get('own', None) == -1
+
+        # 根据模式设置行可见性
+        if mode == 'hand':
+            self.proxy.set_row_filter(lambda card: not invisible(card))
+        elif mode == 'hidden':
+            self.proxy.set_row_filter(invisible)
+        else:
+            self.proxy.set_row_filter(None)
 
         # 清除搜索框内容
         self.search_input.clear()
 
     # 新增一张卡牌
     def add_new_card(self):
+        if not self._check_card_mgr():
+            return
         # 获取当前uid指针
         current_uid = self.config.get('card_uid_index', 0)
         # 获取当前苏丹卡池的总卡数量
@@ -216,134 +233,113 @@ class CardTablePage(QWidget):
         if dialog.exec() == QDialog.DialogCode.Accepted:
             new_card = dialog.get_new_card_data()
             if new_card:
-                # 添加新卡牌到数据列表
-                self.config['cards'].append(new_card)
-                # 获取新卡牌的type
-                new_card_id = new_card.get('id', -1)
-                new_card_data = self.main_window.card_mgr.get_card_data(new_card_id)
-                new_card_type = new_card_data.get('type', "")
-                # 如果新增卡牌为苏丹卡,在苏丹卡池中添加新苏丹卡的id
-                if new_card_type == "sudan":
-                    self.config['sudan_pool_cards'].append(new_card_id)
-
-                # 刷新表格
-                self.load_data()
-                # uid索引加1
-                self.config['card_uid_index'] += 1
-
-                # 调用主界面更新方法
-                self.main_window.update_config(self.config)
-
-                # 滚动到新增行
-                new_row = self.table.rowCount() - 1
-                if new_row >= 0:
-                    # 使用第2列（ID列）的项进行定位
-                    item = self.table.item(new_row, 3)
-                    if item:
-                        self.table.scrollToItem(item, QTableWidget.ScrollHint.PositionAtTop)
-                        self.table.setCurrentCell(new_row, 0)  # 同时高亮选中该行
-
-    # 更新卡片数据到配置对象
-    # TODO 只更新了卡片数据到子界面的config中，未同步到主界面的config
-    def update_card_data(self, item):
-        row = item.row()
-        column = item.column()
+                # 添加新卡牌到数据列表，如果新增卡牌为苏丹卡,在苏丹卡池中添加新苏丹卡的id，uid索引加1
+                is_sudan = self.main_window.card_mgr.is_sudan_card(new_card.get('id', -1))
+                op = add_card(self.config, new_card, is_sudan)
+
+                for section in ('cards', 'sudan_pool_cards', 'card_uid_index'):
+                    self.main_window.mark_config_dirty(section)
+                # 新增卡牌的修改通知立即发出，新增的行随即出现在表格中
+                self.main_window.record_edit(op)
+
+                # 滚动到新增行，同时高亮选中该行
+                self.select_uid(new_card.get('uid'), QAbstractItemView.ScrollHint.PositionAtTop)
+
+    # 更新卡片数据到配置对象，row为卡牌在cards中的序号，text为输入的文本
+    # 校验失败时不修改卡牌，表格显示的仍是原值
+    def update_card_data(self, row: int, column: int, text: str):
         card = self.config.get('cards')[row]
+        # 修改前的字段浅拷贝，用于记录撤销操作
+        before = dict(card)
 
         print("更新前数据为")
         print(self.config.get('cards')[row])
 
         try:
-            # 保存旧值用于错误恢复
-            old_value = None
-            if column in (5, 6, 7, 11, 12):  # 数值型字段
-                old_value = str(card.get(self._get_field_name(column), ''))
-            elif column == 8:  # 标签
-                old_value = str(card.get('tag', {}))
-            elif column == 9:  # 装备槽位
-                old_value = str(card.get('equip_slots', []))
-            elif column == 10:  # 装备列表
-                old_value = str(card.get('equips', []))
-            elif column in (13, 14):  # 字符串字段
-                old_value = card.get(self._get_field_name(column), '')
-
             # 处理字段更新
             if column == 5:  # 数量
+                if self.main_window.card_mgr is None:
+                    raise ValueError("游戏数据正在加载，请稍后再修改数量")
                 card_id = int(card.get('id'))  # 获取ID列的文本
                 card_data = self.main_window.card_mgr.get_card_data(card_id)
                 tags = card_data.get('tag', {})
                 stackable = '可堆叠' in tags
-                new_count = int(item.text())
+                new_count = int(text)
                 if not stackable and new_count != 1:
                     raise ValueError("不可堆叠卡牌数量必须保持为1")
                 card['count'] = new_count  # 只有验证通过才更新
 
             elif column == 6:  # 存在回合
-                card['life'] = int(item.text())
+                card['life'] = int(text)
             elif column == 7:  # 强化等级
-                card['rareup'] = int(item.text())
+                card['rareup'] = int(text)
             elif column == 8:  # 标签
-                new_value = json.loads(json.dumps(eval(item.text())))
+                new_value = json.loads(json.dumps(eval(text)))
                 if not isinstance(new_value, dict):
                     raise ValueError("检查标签格式，必须为字典格式")
                 else:
                     card['tag'] = new_value
             elif column == 9:  # 装备槽
-                new_value = json.loads(json.dumps(eval(item.text())))
+                new_value = json.loads(json.dumps(eval(text)))
                 if not isinstance(new_value, list):
                     raise ValueError("检查装备槽格式，必须为列表格式")
                 card['equip_slots'] = new_value
             elif column == 10:  # 装备
-                new_value = json.loads(json.dumps(eval(item.text())))
+                new_value = json.loads(json.dumps(eval(text)))
                 if not isinstance(new_value, list):
                     raise ValueError("检查装备格式，必须为列表格式")
                 card['equips'] = new_value
             elif column == 11:  # 背包
-                if item.text() not in ('0', '1', '2', '3'):
+                if text not in ('0', '1', '2', '3'):
                     card['bag'] = int("bag的值必须为0/1/2/3")
                 else:
-                    card['bag'] = int(item.text())
+                    card['bag'] = int(text)
             elif column == 12:  # 背包位置
-                card['bagpos'] = int(item.text())
+                card['bagpos'] = int(text)
             elif column == 13:  # 自定义名称
-                card['custom_name'] = item.text()
+                card['custom_name'] = text
             elif column == 14:  # 描述
-                card['custom_text'] = item.text()
+                card['custom_text'] = text
+
+            self.main_window.record_edit(item_edit_op('cards', card.get('uid'), before, card))
 
         except Exception as e:
-            # 恢复旧值并提示错误
-            self.table.blockSignals(True)
-            item.setText(old_value)
-            self.table.blockSignals(False)
+            # 提示错误，表格重新读取卡牌中的原值
             self.show_message("输入错误", f"无效输入：{str(e)}，已恢复原值")
 
         finally:
             print("更新后数据为")
             print(self.config.get('cards')[row])
             print('-----------------------')
-            # 调用主界面更新方法
-            self.main_window.update_config(self.config)
-
-    # 根据列索引获取字段名称
-    def _get_field_name(self, column: int) -> str:
-        mapping = {
-            5: 'count',
-            6: 'life',
-            7: 'rareup',
-            8: 'tag',
-            9: 'equip_slots',
-            10: 'equips',
-            11: 'bag',
-            12: 'bagpos',
-            13: 'custom_name',
-            14: 'custom_text'
-        }
-        return mapping.get(column, '')
+            self.main_window.mark_config_dirty('cards', card.get('uid'))
+
+    # 选中并滚动到指定uid的行，该行被筛选隐藏时清除筛选
+    def select_uid(self, uid, hint=QAbstractItemView.ScrollHint.PositionAtCenter) -> bool:
+        row = self.model.row_of_uid(uid)
+        if row < 0:
+            return False
+        index = self.proxy.mapFromSource(self.model.index(row, COLUMN_UID))
+        if not index.isValid():
+            self.proxy.set_row_filter(None)
+            index = self.proxy.mapFromSource(self.model.index(row, COLUMN_UID))
+        self.table.scrollTo(index, hint)
+        self.table.setCurrentIndex(index)
+        return True
+
+    # 表格中的按钮被点击，index为排序筛选后的位置
+    def on_button_clicked(self, index):
+        row = self.proxy.mapToSource(index).row()
+        if index.column() == COLUMN_DELETE:
+            self.delete_card(row)
+        else:
+            self.show_detail(row)
 
     # 显示卡牌详细信息
     def show_detail(self, row):
+        if not self._check_card_mgr():
+            return
         try:
-            card_id = int(self.table.item(row, 3).text())  # 获取ID列的文本
+            card_id = int(self.config['cards'][row].get('id'))  # 获取卡牌ID
             card_data = self.main_window.card_mgr.get_card_data(card_id)
             detail_window = CardDetailWindow(card_data, self)
             detail_window.show()
@@ -352,28 +348,32 @@ class CardTablePage(QWidget):
 
     # 新增delete_card方法处理删除操作
     def delete_card(self, row):
+        if not self._check_card_mgr():
+            return
         # 确认对话框
         reply = QMessageBox.question(
             self,
             '确认删除',
-            '确定要删除该卡片吗？此操作不可恢复！',
+            '确定要删除该卡片吗？删除后可通过撤销（Ctrl+Z）恢复',
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
         )
         if reply == QMessageBox.StandardButton.Yes:
             if 0 <= row < len(self.config['cards']):
                 # 判断要删除的卡牌是否是苏丹卡
                 card_id = self.config['cards'][row].get('id', 0)
-                card_data = self.main_window.card_mgr.get_card_data(card_id)
-                card_type = card_data.get('type', "")
-                # 如果新增卡牌为苏丹卡,在苏丹卡池中添加新苏丹卡的id
-                if card_type == "sudan":
-                    self.config['sudan_pool_cards'].pop(self.config['cards'][row].get('tag').get('sudan_pool_index')-1)
-                # 删除数据
-                del self.config['cards'][row]
-                # 调用主界面更新方法
-                self.main_window.update_config(self.config)
-                # 重新加载表格
-                self.load_data()
+                # 删除数据，如果删除的卡牌为苏丹卡,从苏丹卡池中移除对应的卡
+                op = remove_card(self.config, row, self.main_window.card_mgr.is_sudan_card(card_id))
+                self.main_window.mark_config_dirty('cards')
+                self.main_window.mark_config_dirty('sudan_pool_cards')
+                # 删除卡牌的修改通知立即发出，表格随即移除该行
+                self.main_window.record_edit(op)
+
+    # 检查卡牌数据是否已加载完成
+    def _check_card_mgr(self) -> bool:
+        if self.main_window.card_mgr is None:
+            self.show_message("提示", "游戏数据正在加载，请稍候")
+            return False
+        return True
 
     # 显示消息弹窗
     def show_message(self, title, content):
@@ -0,0 +1,44 @@
+from typing import Dict, Iterable
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+from manager.saveEditOps import ConfigChange
+
+
+# 存档修改通知，页面据此只更新受影响的行或控件，而不是整体刷新
+# 同一轮事件循环中的多次修改合并为一次changed信号，重复的修改位置只保留一个
+class ConfigChangeBus(QObject):
+    changed = pyqtSignal(list)  # 合并后的ConfigChange列表，按首次修改的顺序排列
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._pending: Dict[ConfigChange, None] = {}  # 有序去重
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(0)
+        self._timer.timeout.connect(self.flush)
+
+    # 记录一处修改，返回事件循环后统一通知
+    def notify(self, section: str, uid=None, field=None):
+        self._pending[ConfigChange(section, uid, field)] = None
+        if not self._timer.isActive():
+            self._timer.start()
+
+    # 记录一次编辑操作涉及的所有修改
+    def notify_changes(self, changes: Iterable[ConfigChange]):
+        for change in changes:
+            self.notify(*change)
+
+    # 丢弃尚未通知的修改，重新加载整个存档时使用
+    def discard(self):
+        self._pending.clear()
+        self._timer.stop()
+
+    # 立即发出尚未通知的修改
+    def flush(self):
+        self._timer.stop()
+        if not self._pending:
+            return
+        changes = list(self._pending)
+        self._pending = {}
+        self.changed.emit(changes)
@@ -0,0 +1,121 @@
+import os
+from typing import Iterable
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from manager.cardDataManager import CardDataManager
+from manager.riteDataManager import RiteDataManager
+from manager.tagDataManager import TagDataManager
+from manager.saveScanner import scan_savedata_cached
+from manager.saveFileManager import SAVE_HEADER_FIELDS, read_save_bytes, stream_save_file, ensure_counter_fields
+from manager.saveSectionWriter import SaveSectionWriter
+
+
+# 用户取消加载
+class LoadCancelled(Exception):
+    pass
+
+
+# 后台加载游戏数据（标签、卡牌、仪式），每加载完一部分就发出对应信号
+class GameDataLoader(QThread):
+    progress = pyqtSignal(int, str)  # 进度百分比（-1表示无法估计进度）, 提示信息
+    tag_mgr_loaded = pyqtSignal(object)
+    card_mgr_loaded = pyqtSignal(object)
+    rite_mgr_loaded = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, data_dir: str, parent=None):
+        super().__init__(parent)
+        self.data_dir = data_dir
+
+    def run(self):
+        try:
+            cards_path = os.path.join(self.data_dir, "cards.json")
+            tags_path = os.path.join(self.data_dir, "tag.json")
+            rites_path = os.path.join(self.data_dir, "rite")
+
+            # 在后台解析tag.json并建立索引，交给界面的管理器查询时不再读取文件
+            tag_mgr = TagDataManager(tags_path).load()
+            self._check_cancelled()
+            self.tag_mgr_loaded.emit(tag_mgr)
+
+            # cards.json一次解析完成，无法报告中间进度
+            self.progress.emit(-1, "正在加载卡牌数据...")
+            card_mgr = CardDataManager(cards_path)
+            self._check_cancelled()
+            self.card_mgr_loaded.emit(card_mgr)
+
+            self.progress.emit(-1, "正在加载仪式数据...")
+            rite_mgr = RiteDataManager(rites_path, on_progress=self._on_rite_progress)
+            self._check_cancelled()
+            self.rite_mgr_loaded.emit(rite_mgr)
+            self.progress.emit(100, "游戏数据加载完成")
+        except LoadCancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            self.failed.emit(str(e))
+
+    # 仪式名索引的解析进度，按已解析的文件数计算
+    def _on_rite_progress(self, done: int, total: int):
+        self._check_cancelled()
+        self.progress.emit(100 * done // max(total, 1), f"正在解析仪式文件 {done}/{total}...")
+
+    def _check_cancelled(self):
+        if self.isInterruptionRequested():
+            raise LoadCancelled()
+
+
+# 后台流式读取存档文件：先发出基本信息字段，再分块发出卡牌和仪式，最后发出其余字段和增量写入器
+class SaveFileLoader(QThread):
+    header_loaded = pyqtSignal(str, object)  # 存档路径, 基本信息字段
+    chunk_loaded = pyqtSignal(str, str, object)  # 存档路径, 字段名(cards/rites), 一块列表元素
+    loaded = pyqtSignal(str, object)  # 存档路径, (其余字段, 原始字段顺序, SaveSectionWriter)
+    failed = pyqtSignal(str, str)  # 存档路径, 错误信息
+
+    def __init__(self, path: str, counter_field_ids: Iterable[int], header_fields=SAVE_HEADER_FIELDS, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.counter_field_ids = list(counter_field_ids)
+        self.header_fields = tuple(header_fields)
+
+    def run(self):
+        try:
+            raw, file_state = read_save_bytes(self.path)
+            counter_added = None
+            for event, payload in stream_save_file(self.path, self.header_fields, raw=raw):
+                if self.isInterruptionRequested():
+                    return
+                if event == 'header':
+                    # counter位于cards之后时随其余字段返回，到时再校验
+                    if 'counter' in payload:
+                        counter_added = ensure_counter_fields(payload, self.counter_field_ids)
+                    self.header_loaded.emit(self.path, payload)
+                elif event == 'rest':
+                    if counter_added is None:
+                        counter_added = ensure_counter_fields(payload[0], self.counter_field_ids)
+                    # 在后台扫描各字段的位置，保存时只需重新序列化修改过的部分
+                    writer = SaveSectionWriter(self.path, raw, file_state)
+                    if counter_added:
+                        writer.mark_dirty('counter')
+                    self.loaded.emit(self.path, payload + (writer,))
+                else:
+                    self.chunk_loaded.emit(self.path, event, payload)
+        except Exception as e:
+            self.failed.emit(self.path, str(e))
+
+
+# 后台扫描SAVEDATA目录下所有账号的存档，读取摘要（有缓存时只重新读取变化的存档）
+class SaveScanLoader(QThread):
+    scanned = pyqtSignal(str, object)  # SAVEDATA目录, 存档条目列表
+    failed = pyqtSignal(str, str)  # SAVEDATA目录, 错误信息
+
+    def __init__(self, root: str, parent=None):
+        super().__init__(parent)
+        self.root = root
+
+    def run(self):
+        try:
+            self.scanned.emit(self.root, scan_savedata_cached(self.root))
+        except Exception as e:
+            self.failed.emit(self.root, str(e))
@@ -0,0 +1,151 @@
+import os
+from typing import Dict, Optional, Tuple
+
+from PyQt6.QtCore import QObject, QFileSystemWatcher, QTimer, pyqtSignal
+
+from manager.dataCache import hash_file
+
+# 文件最后一次变化后需要保持不变的时间，游戏保存时会在短时间内连续写入多次
+FILE_SETTLE_MS = 500
+# 文件被删除（先删后建式保存）后等待重新出现的最长时间
+FILE_MISSING_TIMEOUT_MS = 5000
+
+
+# 文件状态：(大小, 修改时间)，文件不存在时返回None
+def _stat_state(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+# 各页面共用的文件监视服务
+# 同一文件的一串变化事件合并为一次：文件在FILE_SETTLE_MS内没有新的变化后，才与记录的指纹比较，
+# 大小和修改时间一致、或者内容哈希一致（内容未变的重写）时忽略，否则发出一次changed信号；
+# 编辑器自己写入文件后调用mark_written更新指纹，随后的变化事件会被忽略
+class FileWatchService(QObject):
+    changed = pyqtSignal(str)  # 文件路径（与watch时传入的路径一致）
+
+    def __init__(self, parent=None, settle_ms: int = FILE_SETTLE_MS):
+        super().__init__(parent)
+        self.settle_ms = settle_ms
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.fileChanged.connect(self._on_file_changed)
+        self._paths: Dict[str, str] = {}  # 规范化路径 -> watch时传入的路径
+        self._ref_counts: Dict[str, int] = {}
+        self._fingerprints: Dict[str, Optional[tuple]] = {}  # 规范化路径 -> 上次确认的文件指纹
+        self._pending: Dict[str, Optional[Tuple[int, int]]] = {}  # 等待稳定的路径 -> 最近一次事件时的文件状态
+        self._missing_ms: Dict[str, int] = {}  # 等待文件重新出现已用的时间
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._check_pending)
+
+    @staticmethod
+    def _key(path: str) -> str:
+        return os.path.normcase(os.path.abspath(path))
+
+    # 两个路径是否指向同一文件，页面用来判断changed信号是否与自己有关
+    @classmethod
+    def same_path(cls, path: Optional[str], other: Optional[str]) -> bool:
+        return bool(path) and bool(other) and cls._key(path) == cls._key(other)
+
+    # 开始监视文件并记录当前指纹，同一文件可被多个页面监视
+    def watch(self, path: str):
+        key = self._key(path)
+        self._ref_counts[key] = self._ref_counts.get(key, 0) + 1
+        if self._ref_counts[key] > 1:
+            return
+        self._paths[key] = path
+        self._fingerprints[key] = self._fingerprint(path)
+        if os.path.exists(path):
+            self._watcher.addPath(path)
+
+    # 停止监视文件，所有监视者都取消后才真正移除
+    def unwatch(self, path: Optional[str]):
+        if not path:
+            return
+        key = self._key(path)
+        count = self._ref_counts.get(key, 0) - 1
+        if count > 0:
+            self._ref_counts[key] = count
+            return
+        for table in (self._ref_counts, self._paths, self._fingerprints, self._pending, self._missing_ms):
+            table.pop(key, None)
+        if path in self._watcher.files():
+            self._watcher.removePath(path)
+
+    # 把监视的文件从old_path换成new_path
+    def rewatch(self, old_path: Optional[str], new_path: str):
+        if self.same_path(old_path, new_path):
+            self.mark_written(new_path)
+            return
+        self.unwatch(old_path)
+        self.watch(new_path)
+
+    # 编辑器自己写入文件后更新指纹，之后由本次写入触发的变化事件会被忽略
+    def mark_written(self, path: str):
+        key = self._key(path)
+        if key not in self._paths:
+            return
+        self._fingerprints[key] = self._fingerprint(path)
+        self._pending.pop(key, None)
+        self._missing_ms.pop(key, None)
+        # 原子写入会替换文件，监视可能已被移除
+        if os.path.exists(path) and path not in self._watcher.files():
+            self._watcher.addPath(path)
+
+    # 文件指纹：(大小, 修改时间, 内容哈希)，文件不存在时返回None
+    @staticmethod
+    def _fingerprint(path: str) -> Optional[tuple]:
+        state = _stat_state(path)
+        if state is None:
+            return None
+        try:
+            return state + (hash_file(path),)
+        except OSError:
+            return None
+
+    # 记录变化并重新计时，一串连续的变化只在最后一次之后检查一次
+    def _on_file_changed(self, path: str):
+        key = self._key(path)
+        if key not in self._paths:
+            return
+        self._pending[key] = _stat_state(path)
+        self._timer.start(self.settle_ms)
+
+    # 检查已经稳定的文件，仍在变化的文件继续等待
+    def _check_pending(self):
+        waiting = False
+        for key, event_state in list(self._pending.items()):
+            path = self._paths[key]
+            state = _stat_state(path)
+            if state is None:
+                # 先删后建的保存方式，等待文件重新出现
+                self._missing_ms[key] = self._missing_ms.get(key, 0) + self.settle_ms
+                if self._missing_ms[key] < FILE_MISSING_TIMEOUT_MS:
+                    waiting = True
+                    continue
+                print(f"监视的文件 {path} 已被删除")
+                del self._pending[key]
+                continue
+            self._missing_ms.pop(key, None)
+            if path not in self._watcher.files():
+                self._watcher.addPath(path)
+            if state != event_state:
+                # 上次事件之后文件又发生了变化，等待下一轮
+                self._pending[key] = state
+                waiting = True
+                continue
+            del self._pending[key]
+            old = self._fingerprints.get(key)
+            if old is not None and old[:2] == state:
+                continue
+            fingerprint = self._fingerprint(path)
+            self._fingerprints[key] = fingerprint
+            if old is not None and fingerprint is not None and old[2] == fingerprint[2]:
+                print(f"文件 {os.path.basename(path)} 被重写但内容未变化，已忽略")
+                continue
+            self.changed.emit(path)
+        if waiting:
+            self._timer.start(self.settle_ms)
@@ -3,11 +3,21 @@ import os
 import sys
 from typing import cast
 
-from PyQt6.QtCore import QFileSystemWatcher, Qt
+from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QIntValidator
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QTextEdit, QApplication, QHBoxLayout, QLineEdit, QPushButton, \
     QFileDialog, QMessageBox, QGridLayout, QScrollArea, QMainWindow, QCheckBox
 
+from component.dataLoadWorker import SaveFileLoader
+from component.fileWatchService import FileWatchService
+from functools import partial
+
+from component.saveDiffDialog import SaveDiffDialog
+from component.saveValidationDialog import SaveValidationDialog
+from manager.saveEditOps import ABSENT, SetField, set_field
+from manager.saveFileManager import SAVE_HEADER_FIELDS, ensure_counter_fields, format_write_result, load_save_file, \
+    merge_streamed_config, write_save_file
+
 
 class InfoPage(QWidget):
     # 定义可编辑字段及验证规则
@@ -68,23 +78,28 @@ class InfoPage(QWidget):
         }
         self.main_window = main_window
         self.config = self.main_window.config
-        self.is_progressing = False  # 状态锁
+        self.is_progressing = False  # 正在询问是否重新加载
+        self.watched_path = None  # 正在监视的存档文件
+        self.save_loader = None  # 后台读取存档的线程
+        self.validation_dialog = None  # 存档检查窗口
+        self.field_widgets = {}  # 基本信息字段 -> 显示该字段的控件
         self.initUI()
-        self.file_watcher = QFileSystemWatcher()  # 增加文件监视器
-        self.file_watcher.fileChanged.connect(self.on_archive_changed)
-        self.is_self_saving = False
+        self.main_window.file_watch.changed.connect(self.on_archive_changed)
 
 
 
+    # 在后台线程中加载默认存档，加载完成后再刷新页面
     def _init_save_file(self):
         default_auto_save_file = self.main_window.save_dir
-        # 尝试加载默认存档路径
-        try:
-            self.load_archive(default_auto_save_file)
-            # 更新存档文件展示框
-            self.archive_path_edit.setText(default_auto_save_file)
-        except Exception as e:
-            QMessageBox.warning(self, "初始化错误", f"默认文件路径加载失败: {str(e)}")
+        # 更新存档文件展示框
+        self.archive_path_edit.setText(default_auto_save_file)
+        self.load_archive(default_auto_save_file)
+
+    # 取消后台加载存档
+    def cancel_loading(self):
+        if self.save_loader and self.save_loader.isRunning():
+            self.save_loader.requestInterruption()
+            self.save_loader.wait()
 
     def initUI(self):
         layout = QVBoxLayout()
@@ -195,35 +210,67 @@ class InfoPage(QWidget):
         save_btn = QPushButton("保存配置", self)
         save_btn.clicked.connect(self.save_config)
         button_layout.addWidget(save_btn)
+        # 紧凑格式不含缩进和换行，写入更快、文件更小，存档位保存也使用此设置
+        self.compact_save_check = QCheckBox("紧凑格式保存", self)
+        self.compact_save_check.setToolTip("不缩进不换行，保存更快、文件更小，但不便于用文本编辑器查看")
+        button_layout.addWidget(self.compact_save_check)
+        diff_btn = QPushButton("查看未保存的修改", self)
+        diff_btn.setToolTip("对比存档文件与当前编辑中的数据")
+        diff_btn.clicked.connect(self.show_unsaved_changes)
+        button_layout.addWidget(diff_btn)
+        check_btn = QPushButton("检查存档", self)
+        check_btn.setToolTip("检查重复uid、无效引用、苏丹卡池等问题，点击问题跳转到对应行")
+        check_btn.clicked.connect(self.show_validation)
+        button_layout.addWidget(check_btn)
         layout.addLayout(button_layout)
 
         self.setLayout(layout)
 
-    # 加载存档文件
+    # 流式加载存档文件：基本信息先显示，卡牌和仪式分块填入表格
     def load_archive(self, path: str):
-        try:
-            # 先移除旧监视（如果有）
-            if self.file_watcher.files():
-                self.file_watcher.removePaths(self.file_watcher.files())
+        self.cancel_loading()
+        # 基本信息页显示的字段都随第一批数据读取
+        header_fields = SAVE_HEADER_FIELDS + tuple(self.field_map)
+        self.save_loader = SaveFileLoader(path, self.counter_fields, header_fields, self)
+        # 绑定发出信号的线程，忽略已被取代的读取线程排队中的信号
+        self.save_loader.header_loaded.connect(partial(self._on_save_header, self.save_loader))
+        self.save_loader.chunk_loaded.connect(partial(self._on_save_chunk, self.save_loader))
+        self.save_loader.loaded.connect(partial(self._on_save_loaded, self.save_loader))
+        self.save_loader.failed.connect(partial(self._on_save_failed, self.save_loader))
+        self.save_loader.start()
+
+    # 基本信息已读取，开始接收分块数据
+    def _on_save_header(self, loader, path: str, header: dict):
+        if loader is not self.save_loader:
+            return
+        new_config = dict(header)
+        new_config['cards'] = []
+        new_config['rites'] = []
+        self.main_window.begin_config_stream(new_config)
+
+    def _on_save_chunk(self, loader, path: str, field: str, items: list):
+        if loader is self.save_loader:
+            self.main_window.append_config_chunk(field, items)
+
+    # 存档读取完成，合并其余字段并监视文件
+    def _on_save_loaded(self, loader, path: str, payload):
+        if loader is not self.save_loader:
+            return
+        rest, key_order, save_writer = payload
+        self.main_window.end_config_stream(rest, key_order, save_writer)
+        self.apply_archive(path)
 
-            with open(path, 'r', encoding='utf-8') as f:
-                new_config = json.load(f)
+    def _on_save_failed(self, loader, path: str, message: str):
+        if loader is not self.save_loader:
+            return
+        self.main_window.abort_config_stream()
+        QMessageBox.warning(self, "加载错误", f"无法加载存档文件: {message}")
 
-            # 确保counter字段存在
-            if 'counter' not in new_config:
-                raise Exception
-            else:
-                # 初始化缺失的计数器字段
-                for field_id in self.counter_fields:
-                    if str(field_id) not in new_config['counter']:
-                        new_config['counter'][str(field_id)] = 0
-
-            # 调用主界面的更新方法
-            self.main_window.update_config(new_config)
-            # 添加新监视
-            self.file_watcher.addPath(path)
-        except Exception as e:
-            QMessageBox.warning(self, "加载错误", f"无法加载存档文件: {str(e)}")
+    # 监视已加载的存档文件
+    def apply_archive(self, path: str):
+        # 更换监视的文件，并以刚读取的内容为准记录文件指纹
+        self.main_window.file_watch.rewatch(self.watched_path, path)
+        self.watched_path = path
 
     # 选择存档文件
     def _select_auto_save_file(self):
@@ -249,6 +296,7 @@ class InfoPage(QWidget):
             item = self.info_layout.takeAt(0)
             if item.widget():
                 item.widget().deleteLater()
+        self.field_widgets = {}
 
         self.config = self.main_window.config
         if not self.config:
@@ -258,7 +306,10 @@ class InfoPage(QWidget):
         if 'counter' in self.config:
             for field_id, edit in self.counter_edits.items():
                 value = self.config['counter'].get(str(field_id), 0)
+                # 回填显示不是用户编辑，不触发修改记录
+                edit.blockSignals(True)
                 edit.setText(str(value))
+                edit.blockSignals(False)
 
         row = 0
         for field, display_name in self.field_map.items():
@@ -277,6 +328,7 @@ class InfoPage(QWidget):
                     btn.setChecked(bool(value))
                     btn.setObjectName(field)
                     btn.clicked.connect(self.on_toggle_button_clicked)
+                    self.field_widgets[field] = btn
                     # 设置初始样式
                     self.update_button_style(btn, bool(value))
                     # 创建布局容器
@@ -298,6 +350,7 @@ class InfoPage(QWidget):
                     edit = QLineEdit(str(value))
                     edit.setObjectName(field)  # 设置对象名称用于识别
                     edit.textChanged.connect(self.on_field_edited)
+                    self.field_widgets[field] = edit
                     # 设置验证器
                     validator = self.EDITABLE_FIELDS[field].get('validator')
                     if validator:
@@ -308,12 +361,49 @@ class InfoPage(QWidget):
                 # 不可编辑字段
                 value_label = QLabel(str(value))
                 value_label.setStyleSheet("border: 1px solid #ddd; padding: 2px;")
+                self.field_widgets[field] = value_label
                 self.info_layout.addWidget(label, row, 0)
                 self.info_layout.addWidget(value_label, row, 1)
             row += 1
         # 添加弹性空间
         self.info_layout.setRowStretch(row, 1)
 
+    # 按存档修改只更新对应的输入框和标签，不重建页面
+    def apply_changes(self, changes):
+        if not self.config:
+            return
+        for change in changes:
+            if change.section == 'counter':
+                for field_id, edit in self.counter_edits.items():
+                    if change.field is None or change.field == str(field_id):
+                        self._set_edit_text(edit, str(self.config.get('counter', {}).get(str(field_id), 0)))
+            elif change.section in self.field_widgets:
+                self._show_field_value(change.section)
+
+    # 刷新一个基本信息字段的控件
+    def _show_field_value(self, field: str):
+        widget = self.field_widgets[field]
+        value = self.config.get(field, None)
+        if isinstance(widget, QPushButton):
+            widget.setChecked(bool(value))
+            self.update_button_style(widget, bool(value))
+            bool_label = widget.parent().findChild(QLabel, f"{field}_label")
+            if bool_label:
+                bool_label.setText(str(bool(value)))
+        elif isinstance(widget, QLineEdit):
+            self._set_edit_text(widget, str(value))
+        else:
+            widget.setText(str(value))
+
+    # 回填输入框，不触发修改记录；正在输入的输入框就是修改的来源，保持用户输入的内容
+    @staticmethod
+    def _set_edit_text(edit: QLineEdit, text: str):
+        if edit.hasFocus() or edit.text() == text:
+            return
+        edit.blockSignals(True)
+        edit.setText(text)
+        edit.blockSignals(False)
+
     def on_counter_edited(self, text):
         # 获取被编辑的输入框
         edit = cast(QLineEdit, self.sender())
@@ -321,8 +411,11 @@ class InfoPage(QWidget):
 
         try:
             new_value = int(text) if text else 0
-            # 更新配置数据
-            self.config['counter'][str(field_id)] = new_value
+            # 更新配置数据，刷新页面时回填的相同数值不算修改
+            op = set_field(self.config, 'counter', str(field_id), new_value)
+            if op is not None:
+                self.main_window.mark_config_dirty('counter')
+                self.main_window.record_edit(op)
             print(f"计数器更新: {self.counter_fields[field_id]} = {new_value}")
         except ValueError:
             QMessageBox.warning(self, "输入错误", "请输入有效整数")
@@ -336,7 +429,10 @@ class InfoPage(QWidget):
         field_name = btn.objectName()
         current_state = btn.isChecked()
         # 更新配置
+        old_state = self.config.get(field_name, ABSENT)
         self.config[field_name] = current_state
+        self.main_window.mark_config_dirty(field_name)
+        self.main_window.record_edit(SetField(None, field_name, old_state, current_state))
         # 更新按钮样式和标签
         self.update_button_style(btn, current_state)
         bool_label = cast(QLabel, btn.parent().findChild(QLabel, f"{field_name}_label"))
@@ -390,7 +486,11 @@ class InfoPage(QWidget):
                 new_value = text
 
             # 更新配置
+            old_value = self.config.get(field_name, ABSENT)
             self.config[field_name] = new_value
+            if old_value != new_value:
+                self.main_window.mark_config_dirty(field_name)
+                self.main_window.record_edit(SetField(None, field_name, old_value, new_value))
             print(f"字段已更新: {field_name} = {new_value}")
 
             # 实时更新显示（可选）
@@ -399,43 +499,34 @@ class InfoPage(QWidget):
             QMessageBox.warning(self, "输入错误", f"无效的数值: {field_def['display_name']}")
             sender.setStyleSheet("background-color: #ffebee;")
 
-    # 当检测到文件变化时的处理
+    # 当检测到文件变化时的处理，文件监视服务只在文件稳定且内容确实变化后通知一次
     def on_archive_changed(self, path):
-        if self.is_self_saving:
+        if not FileWatchService.same_path(path, self.watched_path):
             return
-
-        # 检查状态锁
+        # 询问框打开期间文件再次变化时不重复询问，重新加载会读取最新内容
         if self.is_progressing:
             return
-        # 由于某些编辑器保存时会先删后建，需要重新添加监视
-        if not os.path.exists(path):
-            self.file_watcher.addPath(path)
-            return
-
-        # 加锁
         self.is_progressing = True
-
-        reply = QMessageBox.question(
-            self,
-            '文件已修改',
-            '检测到存档文件已被外部修改，是否重新加载？\n（未保存的更改将会丢失）',
-            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
-        )
-
-        if reply == QMessageBox.StandardButton.Yes:
-            try:
-                # 添加小延迟确保文件写入完成
-                QApplication.processEvents()
+        try:
+            reply = QMessageBox.question(
+                self,
+                '文件已修改',
+                '检测到存档文件已被外部修改，是否重新加载？\n（未保存的更改将会丢失）',
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+            )
+            if reply == QMessageBox.StandardButton.Yes:
                 self.load_archive(path)
                 self.archive_path_edit.setText(path)
-            except Exception as e:
-                QMessageBox.critical(self, "刷新失败", f"重新加载失败: {str(e)}")
-
-            finally:
-                self.is_progressing = False  # 释放状态锁
+        except Exception as e:
+            QMessageBox.critical(self, "刷新失败", f"重新加载失败: {str(e)}")
+        finally:
+            self.is_progressing = False
 
     # 保存配置到原始文件
     def save_config(self):
+        if self.main_window.config_streaming:
+            QMessageBox.information(self, "提示", "存档正在读取，请稍候")
+            return
         self.main_window.update_config(self.config)
 
         auto_save_path = self.archive_path_edit.text()
@@ -443,38 +534,74 @@ class InfoPage(QWidget):
             QMessageBox.warning(self, "错误", "请先选择存档文件路径")
             return
 
+        # 创建确认对话框
+        confirm_box = QMessageBox(self)
+        confirm_box.setWindowTitle("确认保存")
+        confirm_box.setText("此操作将覆盖原始文件，且不可恢复！\n ⚠️  确定要保存当前配置吗？")
+        confirm_box.setIcon(QMessageBox.Icon.Question)
+
+        # 添加按钮（确认+取消）
+        confirm_button = confirm_box.addButton("确认", QMessageBox.ButtonRole.YesRole)
+        cancel_button = confirm_box.addButton("取消", QMessageBox.ButtonRole.NoRole)
+        confirm_box.setDefaultButton(confirm_button)
+
+        # 显示对话框并等待用户选择
+        confirm_box.exec()
+
+        if confirm_box.clickedButton() == confirm_button:
+            try:
+                compact = self.compact_save_check.isChecked()
+                save_writer = getattr(self.main_window, 'save_writer', None)
+                if save_writer is not None and os.path.normcase(os.path.abspath(save_writer.path)) == \
+                        os.path.normcase(os.path.abspath(auto_save_path)):
+                    # 只重新序列化修改过的字段和卡牌，其余部分原样拷贝
+                    size, elapsed, _ = save_writer.write(self.main_window.config, compact=compact)
+                else:
+                    size, elapsed = write_save_file(auto_save_path, self.main_window.config, compact=compact)
+                # 记录写入后的文件指纹，自己写入触发的变化不会提示重新加载
+                self.main_window.file_watch.mark_written(auto_save_path)
+                # 显示保存成功提示
+                self.show_message("保存成功", f"配置文件已成功保存！\n{format_write_result(size, elapsed)}")
+            except Exception as e:
+                self.show_message("保存失败", f"保存过程中发生错误：\n{str(e)}")
+        else:
+            print("用户取消保存操作")
+
+    # 对比磁盘上的存档文件和内存中已修改的数据
+    def show_unsaved_changes(self):
+        path = self.archive_path_edit.text()
+        if not path or not self.main_window.config:
+            QMessageBox.warning(self, "警告", "当前没有已加载的存档文件")
+            return
+        if self.main_window.config_streaming:
+            QMessageBox.information(self, "提示", "存档正在读取，请稍候")
+            return
         try:
-            self.is_self_saving = True
-            if self.file_watcher.files():
-                self.file_watcher.removePaths(self.file_watcher.files())  # 临时移除文件监视
-            # 创建确认对话框
-            confirm_box = QMessageBox(self)
-            confirm_box.setWindowTitle("确认保存")
-            confirm_box.setText("此操作将覆盖原始文件，且不可恢复！\n ⚠️  确定要保存当前配置吗？")
-            confirm_box.setIcon(QMessageBox.Icon.Question)
-
-            # 添加按钮（确认+取消）
-            confirm_button = confirm_box.addButton("确认", QMessageBox.ButtonRole.YesRole)
-            cancel_button = confirm_box.addButton("取消", QMessageBox.ButtonRole.NoRole)
-            confirm_box.setDefaultButton(confirm_button)
-
-            # 显示对话框并等待用户选择
-            confirm_box.exec()
-
-            if confirm_box.clickedButton() == confirm_button:
-                try:
-                    with open(auto_save_path, 'w', encoding='utf-8') as asf:
-                        json.dump(self.main_window.config, asf, indent=4, ensure_ascii=False)
-                    # 显示保存成功提示
-                    self.show_message("保存成功", "配置文件已成功保存！")
-                except Exception as e:
-                    self.show_message("保存失败", f"保存过程中发生错误：\n{str(e)}")
-            else:
-                print("用户取消保存操作")
-        finally:
-            self.is_self_saving = False
-            if auto_save_path:
-                self.file_watcher.addPath(auto_save_path)
+            saved_config = load_save_file(path)
+        except Exception as e:
+            QMessageBox.warning(self, "错误", f"无法读取存档文件: {str(e)}")
+            return
+        # 读取存档时补充的计数器不是用户的修改，按同样方式补充后再比较
+        if isinstance(saved_config.get('counter'), dict):
+            ensure_counter_fields(saved_config, self.counter_fields)
+        dialog = SaveDiffDialog(saved_config, self.main_window.config, os.path.basename(path), "当前编辑",
+                                self.main_window.card_mgr, self.main_window.rite_mgr, self)
+        dialog.exec()
+
+    # 打开存档检查窗口，窗口已打开时重新检查
+    def show_validation(self):
+        if not self.main_window.config:
+            QMessageBox.warning(self, "警告", "当前没有已加载的存档文件")
+            return
+        if self.main_window.config_streaming:
+            QMessageBox.information(self, "提示", "存档正在读取，请稍候")
+            return
+        if self.validation_dialog is None:
+            self.validation_dialog = SaveValidationDialog(self.main_window, self)
+        else:
+            self.validation_dialog.run_check()
+        self.validation_dialog.show()
+        self.validation_dialog.raise_()
 
     # 显示消息弹窗
     def show_message(self, title, content):
@@ -491,12 +618,32 @@ if __name__ == "__main__":
             super().__init__()
             self.config = {}
             self.save_dir = ""
+            self.file_watch = FileWatchService(self)
 
 
         def update_config(self, new_config):
             self.config = new_config
             print("配置已更新，字段数:", len(new_config))
 
+        def begin_config_stream(self, new_config):
+            self.update_config(new_config)
+
+        def append_config_chunk(self, field, items):
+            self.config[field].extend(items)
+
+        def end_config_stream(self, rest, key_order, save_writer=None):
+            merge_streamed_config(self.config, rest, key_order)
+            print("存档读取完成，字段数:", len(self.config))
+
+        def abort_config_stream(self):
+            pass
+
+        def mark_config_dirty(self, section, card_uid=None):
+            pass
+
+        def record_edit(self, op):
+            pass
+
     # 初始化应用
     app = QApplication(sys.argv)
 
@@ -16,6 +16,7 @@ from component.riteDetailWindow import RiteDetailWindow
 
 from manager.cardDataManager import CardDataManager
 from manager.tagDataManager import TagDataManager
+from manager.saveEditOps import add_card, item_edit_op
 
 
 # 软件主界面
@@ -92,48 +93,82 @@ class RiteTablePage(QWidget):
 
     # 加载仪式数据到表格
     def load_data(self):
-        # 加载数据的时候断开信号连接
+        self.append_rows(0)
+        self.resize_to_contents()
+
+    # 从start行开始填充表格，存档分块读取时只填充新增的行
+    def append_rows(self, start: int):
+        # 加载数据的时候断开信号连接，并暂停排序，避免插入过程中行被重排
         self._disconnect_signals()
+        sorting = self.table.isSortingEnabled()
+        self.table.setSortingEnabled(False)
 
-        self.table.setRowCount(len(self.config.get('rites', {})))
+        rites = self.config.get('rites', [])
+        self.table.setRowCount(len(rites))
 
-        for row, rite in enumerate(self.config.get('rites', {})):
+        for row in range(start, len(rites)):
             # 添加查看卡片初始信息按钮
             front_btn = QPushButton("查看详情")
             front_btn.clicked.connect(partial(self.show_detail, row))
             self.table.setCellWidget(row, 0, front_btn)
 
-            # 创建不可编辑的UID项和id项
-            uid_item = QTableWidgetItem(str(rite.get('uid')))
-            uid_item.setFlags(uid_item.flags() ^ Qt.ItemFlag.ItemIsEditable)
-            id_item = QTableWidgetItem(str(rite.get('id')))
-            id_item.setFlags(id_item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-
-            # 获取仪式id对应的名称
-            rite_name = QTableWidgetItem(self.main_window.rite_mgr.get_rite_name(rite.get('id')))
-            rite_name.setFlags(rite_name.flags() & ~Qt.ItemFlag.ItemIsEditable)
-
-            self.table.setItem(row, 1, QTableWidgetItem(uid_item))
-            self.table.setItem(row, 2, QTableWidgetItem(id_item))
-            self.table.setItem(row, 3, QTableWidgetItem(rite_name))
-            self.table.setItem(row, 4, QTableWidgetItem(str(rite.get('new_born'))))
-            self.table.setItem(row, 5, QTableWidgetItem(str(rite.get('is_show'))))
-            self.table.setItem(row, 6, QTableWidgetItem(str(rite.get('start'))))
-            self.table.setItem(row, 7, QTableWidgetItem(str(rite.get('start_round'))))
-            self.table.setItem(row, 8, QTableWidgetItem(str(rite.get('start_life'))))
-            self.table.setItem(row, 9, QTableWidgetItem(str(rite.get('life'))))
-            self.table.setItem(row, 10, QTableWidgetItem(str(rite.get('cards'))))
-            self.table.setItem(row, 11, QTableWidgetItem(rite.get('custom_name')))
-
+            self._fill_row(row, rites[row])
 
             # 添加末端操作按钮
             end_btn = QPushButton("查看详情")
             end_btn.clicked.connect(partial(self.show_detail, row))
             self.table.setCellWidget(row, 12, end_btn)
 
+        self.table.setSortingEnabled(sorting)
         # 重新连接信号
         self._connect_signals()
 
+    # 用仪式数据填充一行的单元格，调用前需断开表格数据变更信号
+    def _fill_row(self, row: int, rite: dict):
+        # 创建不可编辑的UID项和id项
+        uid_item = QTableWidgetItem(str(rite.get('uid')))
+        uid_item.setFlags(uid_item.flags() ^ Qt.ItemFlag.ItemIsEditable)
+        id_item = QTableWidgetItem(str(rite.get('id')))
+        id_item.setFlags(id_item.flags() & ~Qt.ItemFlag.ItemIsEditable)
+
+        # 获取仪式id对应的名称，游戏数据尚未加载完成时显示占位文本
+        rite_mgr = self.main_window.rite_mgr
+        rite_name = QTableWidgetItem(rite_mgr.get_rite_name(rite.get('id')) if rite_mgr else "加载中...")
+        rite_name.setFlags(rite_name.flags() & ~Qt.ItemFlag.ItemIsEditable)
+
+        self.table.setItem(row, 1, QTableWidgetItem(uid_item))
+        self.table.setItem(row, 2, QTableWidgetItem(id_item))
+        self.table.setItem(row, 3, QTableWidgetItem(rite_name))
+        self.table.setItem(row, 4, QTableWidgetItem(str(rite.get('new_born'))))
+        self.table.setItem(row, 5, QTableWidgetItem(str(rite.get('is_show'))))
+        self.table.setItem(row, 6, QTableWidgetItem(str(rite.get('start'))))
+        self.table.setItem(row, 7, QTableWidgetItem(str(rite.get('start_round'))))
+        self.table.setItem(row, 8, QTableWidgetItem(str(rite.get('start_life'))))
+        self.table.setItem(row, 9, QTableWidgetItem(str(rite.get('life'))))
+        self.table.setItem(row, 10, QTableWidgetItem(str(rite.get('cards'))))
+        self.table.setItem(row, 11, QTableWidgetItem(rite.get('custom_name')))
+
+    # 按存档修改更新表格：增删仪式时重新加载，修改仪式时只重新填充对应的行
+    def apply_changes(self, changes):
+        uids = set()
+        for change in changes:
+            if change.section != 'rites':
+                continue
+            if change.uid is None:
+                self.load_data()
+                return
+            uids.add(change.uid)
+        if not uids:
+            return
+        self._disconnect_signals()
+        rites = self.config.get('rites', [])
+        for row in range(min(len(rites), self.table.rowCount())):
+            if rites[row].get('uid') in uids:
+                self._fill_row(row, rites[row])
+        self._connect_signals()
+
+    # 按内容调整行高列宽
+    def resize_to_contents(self):
         self.table.resizeColumnsToContents()  # 自动调整列宽
         # 卡牌列太长了，设置一个列宽最大值
         self.table.setColumnWidth(10, min(self.table.columnWidth(10), 500))
@@ -159,23 +194,15 @@ class RiteTablePage(QWidget):
         if dialog.exec() == QDialog.DialogCode.Accepted:
             new_card = dialog.get_new_card_data()
             if new_card:
-                # 添加新卡牌到数据列表
-                self.config['cards'].append(new_card)
-                # 获取新卡牌的type
-                new_card_id = new_card.get('id', -1)
-                new_card_data = self.main_window.card_mgr.get_card_data(new_card_id)
-                new_card_type = new_card_data.get('type', "")
-                # 如果新增卡牌为苏丹卡,在苏丹卡池中添加新苏丹卡的id
-                if new_card_type == "sudan":
-                    self.config['sudan_pool_cards'].append(new_card_id)
+                # 添加新卡牌到数据列表，如果新增卡牌为苏丹卡,在苏丹卡池中添加新苏丹卡的id，uid索引加1
+                is_sudan = self.main_window.card_mgr.is_sudan_card(new_card.get('id', -1))
+                op = add_card(self.config, new_card, is_sudan)
 
                 # 刷新表格
                 self.load_data()
-                # uid索引加1
-                self.config['card_uid_index'] += 1
-
-                # 调用主界面更新方法
-                self.main_window.update_config(self.config)
+                for section in ('cards', 'sudan_pool_cards', 'card_uid_index'):
+                    self.main_window.mark_config_dirty(section)
+                self.main_window.record_edit(op)
 
                 # 滚动到新增行
                 new_row = self.table.rowCount() - 1
@@ -191,6 +218,8 @@ class RiteTablePage(QWidget):
         row = item.row()
         column = item.column()
         rite = self.config.get('rites')[row]
+        # 修改前的字段浅拷贝，用于记录撤销操作
+        before = dict(rite)
 
         try:
             # 保存旧值用于错误恢复
@@ -245,6 +274,8 @@ class RiteTablePage(QWidget):
             elif column == 14:  # 描述
                 rite['custom_text'] = item.text()
 
+            self.main_window.record_edit(item_edit_op('rites', rite.get('uid'), before, rite))
+
         except Exception as e:
             # 恢复旧值并提示错误
             self.table.blockSignals(True)
@@ -256,8 +287,18 @@ class RiteTablePage(QWidget):
             print("更新后数据为")
             print(self.config.get('cards')[row])
             print('-----------------------')
-            # 调用主界面更新方法
-            self.main_window.update_config(self.config)
+            self.main_window.mark_config_dirty('rites')
+
+    # 选中并滚动到指定uid的行，该行被筛选隐藏时重新显示
+    def select_uid(self, uid) -> bool:
+        for row in range(self.table.rowCount()):
+            item = self.table.item(row, 1)
+            if item is not None and item.text() == str(uid):
+                self.table.setRowHidden(row, False)
+                self.table.scrollToItem(item, QTableWidget.ScrollHint.PositionAtCenter)
+                self.table.setCurrentCell(row, 1)
+                return True
+        return False
 
     # 根据列索引获取字段名称
     def _get_field_name(self, column: int) -> str:
@@ -275,6 +316,9 @@ class RiteTablePage(QWidget):
 
     # 显示卡牌详细信息
     def show_detail(self, row):
+        if self.main_window.rite_mgr is None:
+            self.show_message("提示", "游戏数据正在加载，请稍候")
+            return
         try:
             rite_id = int(self.table.item(row, 2).text())  # 获取ID列的文本
             rite_data = self.main_window.rite_mgr.get_rite_details(rite_id)
@@ -8,9 +8,15 @@ from functools import partial
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                              QTableWidget, QTableWidgetItem, QLineEdit, QPushButton,
                              QLabel, QMessageBox, QTextEdit, QFileDialog, QDialog, QProgressDialog, QInputDialog,
-                             QScrollArea)
-from PyQt6.QtCore import Qt, QFileSystemWatcher, QTimer
-from datetime import datetime
+                             QScrollArea, QComboBox)
+from PyQt6.QtCore import Qt
+
+from component.fileWatchService import FileWatchService
+from component.saveDiffDialog import SaveDiffDialog
+from manager.saveFileManager import format_write_result, load_save_file, write_save_file
+from manager.saveScanner import sudan_status
+from manager.saveTime import format_display_time
+from manager.slotStore import SlotStore
 
 
 class SaveArchivePage(QWidget):
@@ -19,9 +25,10 @@ class SaveArchivePage(QWidget):
         self.main_window = main_window
         self.config = self.main_window.config
         self.archive_data: List[Union[dict, None]] = [None] * 10
+        self.slot_store = None  # 存档位的去重压缩存储，第一次使用时打开
+        self.watched_path = None  # 正在监视的存档位列表文件
         self.initUI()
-        self.file_watcher = QFileSystemWatcher()  # 增加文件监视器
-        self.file_watcher.fileChanged.connect(self.on_archive_changed)
+        self.main_window.file_watch.changed.connect(self.on_archive_changed)
 
     def initUI(self):
         layout = QVBoxLayout()
@@ -30,6 +37,16 @@ class SaveArchivePage(QWidget):
         self.info_label = QLabel("点击存档位进行保存（位置1-10）")
         layout.addWidget(self.info_label)
 
+        # 存档位与当前存档文件对比
+        diff_layout = QHBoxLayout()
+        self.diff_slot_combo = QComboBox()
+        diff_btn = QPushButton("与当前存档文件对比")
+        diff_btn.clicked.connect(self.show_slot_diff)
+        diff_layout.addWidget(QLabel("对比存档位："))
+        diff_layout.addWidget(self.diff_slot_combo, 1)
+        diff_layout.addWidget(diff_btn)
+        layout.addLayout(diff_layout)
+
         # 创建滚动区域以容纳多个存档位
         scroll = QScrollArea()
         scroll.setWidgetResizable(True)
@@ -70,51 +87,31 @@ class SaveArchivePage(QWidget):
 
     # 处理保存时间的格式转换
     def format_iso_time(self, iso_str):
-        try:
-            # 处理微秒位数问题（最多支持6位）
-            if '.' in iso_str:
-                main_part, fractional = iso_str.split('.', 1)
-                fractional = fractional[:6]  # 截断到6位微秒
-                iso_str = f"{main_part}.{fractional}"
-            # 处理时区格式
-            iso_str = iso_str.replace('Z', '+00:00')
-            # 解析时间
-            dt = datetime.fromisoformat(iso_str)
-            # 格式化为指定字符串
-            return "{}/{:d}/{:d} {:02d}:{:02d}:{:02d}".format(
-                dt.year,
-                dt.month,  # 自动去除前导零
-                dt.day,  # 自动去除前导零
-                dt.hour,
-                dt.minute,
-                dt.second
-            )
-        except (TypeError, ValueError) as e:
-            print(f"时间格式转换失败: {str(e)}")
-            return iso_str  # 返回原始值
+        # 解析结果按字符串缓存，刷新列表时不重复解析
+        return format_display_time(iso_str)
 
     # 联动主界面信息更新
     def update_info(self):
         self.config = self.main_window.config
         self.load_archive_data()
 
+    # 存档修改通知：存档位列表读取自磁盘，与内存中存档的编辑无关，不需要重新读取
+    def apply_changes(self, changes):
+        pass
+
     # 加载user_archive.json文件
     def load_archive_data(self):
         try:
             save_dir = os.path.dirname(self.main_window.save_dir)  # 从文件路径提取目录
             archive_path = os.path.normpath(os.path.join(save_dir, "user_archive.json"))
 
-            # 添加文件监视（先移除旧路径再添加新路径）
-            if self.file_watcher.files():
-                self.file_watcher.removePaths(self.file_watcher.files())
-            self.file_watcher.addPath(archive_path)
-
             # 处理文件不存在的情况
             if not os.path.exists(archive_path):
                 try:
                     # 写入初始化文件
                     with open(archive_path, 'w', encoding='utf-8') as f:
                         json.dump(self.archive_data, f, indent=2, ensure_ascii=False)
+                    self._watch_archive_list(archive_path)
                     return  # 直接返回初始化数据
                 except PermissionError as pe:
                     QMessageBox.critical(
@@ -130,12 +127,25 @@ class SaveArchivePage(QWidget):
                         f"创建初始存档文件失败:\n{str(init_e)}"
                     )
                     return
-            # user_archive.json文件存在
+            # user_archive.json文件存在，以读取的内容为准记录文件指纹
+            self._watch_archive_list(archive_path)
             with open(archive_path, 'r', encoding='utf-8') as f:
                 self.archive_data = json.load(f)
                 # 确保总是10个存档位
                 if len(self.archive_data) < 10:
                     self.archive_data += [None] * (10 - len(self.archive_data))
+            # 存档位列表为准：已清空的存档位从存储中删除，仍列出但文件丢失的存档位从存储中重新导出
+            archive_dir = os.path.join(save_dir, "USERARCHIVE")
+            if os.path.exists(os.path.join(archive_dir, "slot_store.sqlite3")):
+                store = self._get_slot_store(archive_dir)
+                listed = [slot for slot, archive in enumerate(self.archive_data) if archive]
+                removed = store.prune_slots(listed)
+                if removed:
+                    print(f"已从存储中删除清空的存档位：{[slot + 1 for slot in removed]}")
+                restored = store.restore_missing_exports(
+                    listed, compact=self.main_window.info_page.compact_save_check.isChecked())
+                if restored:
+                    print(f"已从存储中恢复存档位文件：{[slot + 1 for slot in restored]}")
 
         except Exception as e:
             QMessageBox.critical(self, "错误", f"加载存档数据失败: {str(e)}")
@@ -145,6 +155,10 @@ class SaveArchivePage(QWidget):
 
     # 更新存档信息
     def update_slot_display(self):
+        self.diff_slot_combo.clear()
+        for i, archive in enumerate(self.archive_data):
+            if archive and isinstance(archive, dict):
+                self.diff_slot_combo.addItem(f"{i + 1:03d} {archive.get('name', '未命名存档')}", i)
         for i in range(10):
             btn = self.slots[i]
             archive = self.archive_data[i]
@@ -164,51 +178,69 @@ class SaveArchivePage(QWidget):
                 btn.setStyleSheet("background-color: #F5F5F5;")
             btn.setText(display_text)
 
-    # 当监视文件发生变化时触发
-    def on_archive_changed(self, path):
-        QApplication.processEvents()  # 确保UI线程响应
-        try:
-            if os.path.exists(path):
-                # 延时100ms避免文件被其他程序占用
-                QTimer.singleShot(100, self.delayed_reload)
-            else:
-                print(f"文件 {path} 已被删除")
-        except Exception as e:
-            print(f"文件变化处理异常: {str(e)}")
+    # 监视存档位列表文件，路径变化时更换监视的文件
+    def _watch_archive_list(self, archive_path: str):
+        self.main_window.file_watch.rewatch(self.watched_path, archive_path)
+        self.watched_path = archive_path
 
-    # 延时重新加载
-    def delayed_reload(self):
+    # 当监视文件发生变化时触发，文件监视服务只在文件稳定且内容确实变化后通知一次
+    def on_archive_changed(self, path):
+        if not FileWatchService.same_path(path, self.watched_path):
+            return
         try:
             self.load_archive_data()
             print("存档文件变化，已重新加载数据")
         except Exception as e:
             QMessageBox.critical(self, "错误", f"自动更新失败: {str(e)}")
 
+    # 打开存档位存储，存档目录变化时重新打开
+    def _get_slot_store(self, archive_dir: str) -> SlotStore:
+        if self.slot_store is None or os.path.normcase(self.slot_store.archive_dir) != os.path.normcase(archive_dir):
+            if self.slot_store is not None:
+                self.slot_store.close()
+            self.slot_store = SlotStore(archive_dir)
+        return self.slot_store
+
+    # 对比选中的存档位和当前存档文件（auto_save.json）
+    def show_slot_diff(self):
+        index = self.diff_slot_combo.currentData()
+        if index is None:
+            QMessageBox.information(self, "提示", "没有可对比的存档位")
+            return
+        save_dir = os.path.dirname(self.main_window.save_dir)
+        archive_dir = os.path.join(save_dir, "USERARCHIVE")
+        slot_path = os.path.join(archive_dir, f"{index:03d}.json")
+        try:
+            # 存档位文件不存在时从存储中还原
+            if os.path.exists(slot_path):
+                slot_config = load_save_file(slot_path)
+            else:
+                slot_config = self._get_slot_store(archive_dir).load_slot(index)
+            current_config = load_save_file(self.main_window.save_dir)
+        except Exception as e:
+            QMessageBox.critical(self, "错误", f"读取存档失败: {str(e)}")
+            return
+        dialog = SaveDiffDialog(slot_config, current_config, f"存档位 {index + 1}",
+                                os.path.basename(self.main_window.save_dir),
+                                self.main_window.card_mgr, self.main_window.rite_mgr, self)
+        dialog.exec()
+
     # 创建新存档
     def save_archive(self, index):
+        if self.main_window.card_mgr is None:
+            QMessageBox.information(self, "提示", "游戏数据正在加载，请稍候")
+            return
+        if self.main_window.config_streaming:
+            QMessageBox.information(self, "提示", "存档正在读取，请稍候")
+            return
         # 获取存档名称
         name, ok = QInputDialog.getText(self, '存档设置', '请输入存档名称:', text='未命名存档')
         if not ok:
             return
-        # 计算苏丹卡总数
-        # 创建卡牌类型缓存（提升性能）
-        card_type_cache = {}
-        sudan_count = 0
-        max_life = -10000000000000
-        for card in self.config.get('cards', []):
-            card_id = card.get('id')
-            # 优先使用缓存避免重复查询
-            if card_id not in card_type_cache:
-                card_data = self.main_window.card_mgr.get_card_data(card_id)
-                card_type_cache[card_id] = card_data.get('type', '') if card_data else ''
-
-            if card_type_cache[card_id] == 'sudan':
-                sudan_count += 1
-                current_life = card.get('life', 0)
-                if current_life > max_life:
-                    max_life = current_life
-        total_sudan = sudan_count + len(self.config.get('sudan_card_pool', []))
-        execution_day = 7 - max_life if sudan_count > 0 else 7
+        # 计算苏丹卡总数，卡牌类型使用卡牌管理器的类型索引查询
+        card_mgr = self.main_window.card_mgr
+        total_sudan, execution_day = sudan_status(self.config.get('cards', []), self.config.get('sudan_card_pool', []),
+                                                  lambda card: card_mgr.is_sudan_card(card.get('id')))
 
         archive = {
             "name": name,
@@ -230,9 +262,6 @@ class SaveArchivePage(QWidget):
 
         # 保存到系统
         try:
-            # 保存操作前临时移除监视
-            if self.file_watcher.files():
-                self.file_watcher.removePaths(self.file_watcher.files())
             # 创建存档目录
             save_dir = os.path.dirname(self.main_window.save_dir)
             archive_dir = os.path.join(save_dir, "USERARCHIVE")
@@ -242,22 +271,23 @@ class SaveArchivePage(QWidget):
                 os.makedirs(archive_dir)
                 print(f"已创建存档目录：{archive_dir}")  # 调试用，正式版可移除
 
-            # 保存具体存档文件
-            with open(os.path.join(archive_dir, f"{index:03d}.json"), 'w', encoding='utf-8') as f:
-                json.dump(self.main_window.config, f, ensure_ascii=False, indent=2)
+            # 存档写入去重存储，再导出为游戏读取的存档位文件，与基本信息页使用相同的保存格式
+            stats = self._get_slot_store(archive_dir).save_slot(
+                index, self.main_window.config, compact=self.main_window.info_page.compact_save_check.isChecked())
+            size, elapsed = stats["exported_bytes"], stats["elapsed"]
 
             # 更新存档列表
             self.archive_data[index] = archive
             archive_path = os.path.join(save_dir, "user_archive.json")
-            with open(archive_path, 'w', encoding='utf-8') as f:
-                json.dump(self.archive_data, f, ensure_ascii=False, indent=2)
+            write_save_file(archive_path, self.archive_data)
+            self.main_window.file_watch.mark_written(archive_path)
 
-            QMessageBox.information(self, "成功", f"存档位 {index + 1} 保存成功！")
+            QMessageBox.information(self, "成功", f"存档位 {index + 1} 保存成功！\n{format_write_result(size, elapsed)}\n"
+                                                 f"数据块 {stats['chunks']} 个，其中新增 {stats['new_chunks']} 个")
             self.update_slot_display()
         except Exception as e:
             QMessageBox.critical(self, "错误", f"保存存档失败: {str(e)}")
         finally:
-            # 保存完成后重新添加监视
             self.load_archive_data()
 
 
@@ -268,6 +298,7 @@ if __name__ == "__main__":
             super().__init__()
             self.config = {}
             self.save_dir = ""
+            self.file_watch = FileWatchService(self)
 
         def update_config(self, new_config):
             self.config = new_config
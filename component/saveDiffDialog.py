@@ -0,0 +1,135 @@
+import json
+
+from PyQt6.QtWidgets import QDialog, QVBoxLayout, QLabel, QTreeWidget, QTreeWidgetItem, QHeaderView
+from PyQt6.QtGui import QColor, QBrush
+
+from manager.saveDiff import diff_saves, summarize_diff, UID_SECTIONS, CHANGE_ADDED, CHANGE_REMOVED, CHANGE_CHANGED, \
+    CHANGE_DUPLICATE
+
+# 变化类型的显示文字和颜色
+CHANGE_STYLES = {
+    CHANGE_ADDED: ("新增", "#4CAF50"),
+    CHANGE_REMOVED: ("删除", "#F44336"),
+    CHANGE_CHANGED: ("修改", "#1976D2"),
+    CHANGE_DUPLICATE: ("uid重复", "#FF9800"),
+}
+# 单元格中值的最大显示长度，完整内容见悬浮提示
+VALUE_PREVIEW_LENGTH = 120
+
+
+# 存档差异窗口，按顶层字段分组展示两份存档之间的差异
+class SaveDiffDialog(QDialog):
+    def __init__(self, old_config: dict, new_config: dict, old_title: str, new_title: str,
+                 card_mgr=None, rite_mgr=None, parent=None):
+        super().__init__(parent)
+        self.card_mgr = card_mgr
+        self.rite_mgr = rite_mgr
+        self.old_config = old_config
+        self.new_config = new_config
+        self._uid_index = None  # (字段, uid) -> 元素，显示字段级差异的名称时才建立
+        self.entries = diff_saves(old_config, new_config)
+        self.setWindowTitle(f"存档对比：{old_title} → {new_title}")
+        self.resize(1000, 600)
+        self.initUI(old_title, new_title)
+
+    def initUI(self, old_title: str, new_title: str):
+        layout = QVBoxLayout(self)
+        summary = summarize_diff(self.entries)
+        if self.entries:
+            text = f"原存档：{old_title}\n新存档：{new_title}\n共 {len(self.entries)} 处差异"
+        else:
+            text = f"原存档：{old_title}\n新存档：{new_title}\n两份存档没有差异"
+        layout.addWidget(QLabel(text))
+
+        self.tree = QTreeWidget()
+        self.tree.setHeaderLabels(["字段/对象", "属性", "变化", "原值", "新值"])
+        self.tree.setUniformRowHeights(True)
+        self.tree.header().setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
+
+        section_items = {}
+        for section, counts in summary.items():
+            counts_text = "，".join(f"{CHANGE_STYLES[change][0]}{count}"
+                                    for change, count in counts.items() if count)
+            section_item = QTreeWidgetItem([section, "", counts_text])
+            section_items[section] = section_item
+        for entry in self.entries:
+            section_items[entry["section"]].addChild(self._create_entry_item(entry))
+        self.tree.addTopLevelItems(list(section_items.values()))
+        # 差异较少时直接展开
+        if len(self.entries) <= 200:
+            self.tree.expandAll()
+        for column, width in enumerate((260, 140, 60, 240, 240)):
+            self.tree.setColumnWidth(column, width)
+        layout.addWidget(self.tree)
+
+    def _create_entry_item(self, entry) -> QTreeWidgetItem:
+        change_text, color = CHANGE_STYLES[entry["change"]]
+        if entry["change"] == CHANGE_DUPLICATE:
+            old_text, new_text = f"出现{entry['old']}次", f"出现{entry['new']}次"
+        else:
+            old_text = self._format_value(entry["old"]) if entry["change"] != CHANGE_ADDED else ""
+            new_text = self._format_value(entry["new"]) if entry["change"] != CHANGE_REMOVED else ""
+        item = QTreeWidgetItem([
+            self._describe_key(entry),
+            "" if entry["field"] is None else str(entry["field"]),
+            change_text,
+            old_text[:VALUE_PREVIEW_LENGTH],
+            new_text[:VALUE_PREVIEW_LENGTH],
+        ])
+        item.setForeground(2, QBrush(QColor(color)))
+        item.setToolTip(3, old_text)
+        item.setToolTip(4, new_text)
+        return item
+
+    # 卡牌和仪式显示uid和名称，字典字段显示键名
+    def _describe_key(self, entry) -> str:
+        key = entry["key"]
+        if key is None:
+            return "（整个字段）"
+        if entry["section"] not in UID_SECTIONS:
+            return str(key)
+        # 重复uid第二次及以后出现的元素以(uid, 第几次出现)为键
+        occurrence = ""
+        if isinstance(key, tuple) and key[0] != '#':
+            key, occurrence = key[0], f"（第{key[1]}个）"
+        item = self._find_item(entry)
+        name = ""
+        if isinstance(item, dict) and item.get('id') is not None:
+            try:
+                if entry["section"] == 'cards' and self.card_mgr is not None:
+                    name = self.card_mgr.get_card_data(item.get('id')).get('name', '')
+                elif entry["section"] == 'rites' and self.rite_mgr is not None:
+                    name = self.rite_mgr.get_rite_name(item.get('id'))
+            except Exception:
+                name = ""
+            name = name or str(item.get('id'))
+        return f"uid {key}{occurrence} {name}".rstrip()
+
+    # 取差异对应的卡牌或仪式，用于显示名称
+    def _find_item(self, entry):
+        if entry["change"] == CHANGE_DUPLICATE:
+            return None
+        if entry["field"] is None:
+            return entry["new"] if entry["change"] == CHANGE_ADDED else entry["old"]
+        # 字段级差异只记录了字段值，从存档中查找所属元素（建立一次索引）
+        index = self._uid_index
+        if index is None:
+            index = self._uid_index = {}
+            for config in (self.old_config, self.new_config):
+                for section in UID_SECTIONS:
+                    for item in config.get(section, []) or []:
+                        if isinstance(item, dict):
+                            index.setdefault((section, item.get('uid')), item)
+        key = entry["key"]
+        if isinstance(key, tuple) and key[0] != '#':
+            key = key[0]
+        return index.get((entry["section"], key))
+
+    @staticmethod
+    def _format_value(value) -> str:
+        if isinstance(value, str):
+            return value
+        try:
+            return json.dumps(value, ensure_ascii=False)
+        except (TypeError, ValueError):
+            return str(value)
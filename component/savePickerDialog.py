@@ -0,0 +1,138 @@
+import os
+
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTreeWidget,
+                             QTreeWidgetItem, QFileDialog, QDialogButtonBox)
+from PyQt6.QtGui import QColor, QBrush
+from PyQt6.QtCore import Qt
+
+from component.dataLoadWorker import SaveScanLoader
+from manager.saveScanner import format_save_label
+from manager.saveTime import format_display_time
+
+
+# 存档选择窗口，按账号列出SAVEDATA下的自动存档和存档位，显示摘要，双击或确定后选中存档
+class SavePickerDialog(QDialog):
+    def __init__(self, root: str, parent=None):
+        super().__init__(parent)
+        self.root = root
+        self.selected_path = None
+        self.scan_loader = None
+        self.rescan_pending = False  # 扫描过程中更换了目录，当前扫描结束后重新扫描
+        self.setWindowTitle("选择存档")
+        self.resize(900, 500)
+        self.initUI()
+        self.start_scan()
+
+    def initUI(self):
+        layout = QVBoxLayout(self)
+        top_layout = QHBoxLayout()
+        self.root_label = QLabel()
+        top_layout.addWidget(self.root_label, 1)
+        root_btn = QPushButton("更换目录")
+        root_btn.clicked.connect(self.select_root)
+        top_layout.addWidget(root_btn)
+        self.rescan_btn = QPushButton("重新扫描")
+        self.rescan_btn.clicked.connect(self.start_scan)
+        top_layout.addWidget(self.rescan_btn)
+        layout.addLayout(top_layout)
+
+        self.tree = QTreeWidget()
+        self.tree.setUniformRowHeights(True)
+        self.tree.setHeaderLabels(["存档", "名称", "天数", "剩余苏丹卡", "保存时间", "文件"])
+        for column, width in enumerate((200, 120, 60, 90, 150, 240)):
+            self.tree.setColumnWidth(column, width)
+        self.tree.itemDoubleClicked.connect(self.on_item_double_clicked)
+        self.tree.currentItemChanged.connect(self.on_current_item_changed)
+        layout.addWidget(self.tree)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
+        self.ok_btn = buttons.button(QDialogButtonBox.StandardButton.Ok)
+        self.ok_btn.setEnabled(False)
+        buttons.accepted.connect(self.accept_current)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+
+    def select_root(self):
+        path = QFileDialog.getExistingDirectory(self, "选择SAVEDATA目录", self.root)
+        if path:
+            self.root = path
+            self.start_scan()
+
+    # 在后台扫描存档目录，已有扫描在进行时等其结束后再扫描
+    def start_scan(self):
+        if self.scan_loader is not None and self.scan_loader.isRunning():
+            self.rescan_pending = True
+            self.root_label.setText(f"等待当前扫描结束后扫描 {self.root} ...")
+            return
+        self.tree.clear()
+        self.ok_btn.setEnabled(False)
+        self.rescan_btn.setEnabled(False)
+        self.root_label.setText(f"正在扫描 {self.root} ...")
+        self.scan_loader = SaveScanLoader(self.root, self)
+        self.scan_loader.scanned.connect(self.on_scanned)
+        self.scan_loader.failed.connect(self.on_scan_failed)
+        self.scan_loader.finished.connect(self.on_scan_finished)
+        self.scan_loader.start()
+
+    # 扫描线程结束后执行排队的扫描
+    def on_scan_finished(self):
+        if self.rescan_pending:
+            self.rescan_pending = False
+            self.start_scan()
+
+    def on_scanned(self, root, entries):
+        self.rescan_btn.setEnabled(True)
+        if root != self.root:
+            return
+        profile_items = {}
+        for entry in entries:
+            profile_item = profile_items.get(entry["profile"])
+            if profile_item is None:
+                profile_item = QTreeWidgetItem([entry["profile"]])
+                profile_items[entry["profile"]] = profile_item
+            profile_item.addChild(self._create_entry_item(entry))
+        self.tree.addTopLevelItems(list(profile_items.values()))
+        self.tree.expandAll()
+        self.root_label.setText(f"{root}：{len(profile_items)} 个账号，{len(entries)} 个存档")
+
+    def on_scan_failed(self, root, message):
+        self.rescan_btn.setEnabled(True)
+        if root != self.root:
+            return
+        self.root_label.setText(f"扫描 {root} 失败: {message}")
+
+    def _create_entry_item(self, entry) -> QTreeWidgetItem:
+        summary = entry["summary"]
+        file_name = os.path.relpath(entry["path"], self.root)
+        if summary is None:
+            item = QTreeWidgetItem([format_save_label(entry), "读取失败", "", "", "", file_name])
+            item.setForeground(1, QBrush(QColor("#F44336")))
+            item.setToolTip(1, entry.get("error", ""))
+        else:
+            save_time = format_display_time(summary["saveTime"]) if summary["saveTime"] else ""
+            item = QTreeWidgetItem([format_save_label(entry), str(summary["name"] or ""), str(summary["round"]),
+                                    str(summary["left_sudan"]), save_time, file_name])
+        item.setData(0, Qt.ItemDataRole.UserRole, entry["path"])
+        return item
+
+    def on_current_item_changed(self, current, previous):
+        self.ok_btn.setEnabled(current is not None and current.data(0, Qt.ItemDataRole.UserRole) is not None)
+
+    def on_item_double_clicked(self, item, column):
+        if item.data(0, Qt.ItemDataRole.UserRole) is not None:
+            self.accept_current()
+
+    def accept_current(self):
+        item = self.tree.currentItem()
+        path = item.data(0, Qt.ItemDataRole.UserRole) if item is not None else None
+        if path is None:
+            return
+        self.selected_path = path
+        self.accept()
+
+    # 关闭窗口时等待扫描线程结束
+    def done(self, result):
+        self.rescan_pending = False
+        if self.scan_loader is not None and self.scan_loader.isRunning():
+            self.scan_loader.wait()
+        super().done(result)
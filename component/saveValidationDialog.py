@@ -0,0 +1,71 @@
+from PyQt6.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTreeWidget, QTreeWidgetItem
+from PyQt6.QtGui import QColor, QBrush
+from PyQt6.QtCore import Qt
+
+from manager.saveValidator import validate_save, format_location, LEVEL_ERROR, LEVEL_WARNING, LEVEL_NAMES
+
+# 问题级别的显示颜色
+LEVEL_COLORS = {LEVEL_ERROR: "#F44336", LEVEL_WARNING: "#FF9800"}
+# 问题所在字段 -> 跳转的表格
+ISSUE_TABLES = {"cards": "cards", "rites": "rites", "card_uid_index": "cards", "rite_uid_index": "rites"}
+
+
+# 存档检查窗口，列出引用完整性问题，点击问题跳转到对应的卡牌或仪式行
+# 非模态窗口，修改存档后可以点击重新检查
+class SaveValidationDialog(QDialog):
+    def __init__(self, main_window, parent=None):
+        super().__init__(parent)
+        self.main_window = main_window
+        self.setWindowTitle("存档检查")
+        self.resize(800, 500)
+        self.initUI()
+        self.run_check()
+
+    def initUI(self):
+        layout = QVBoxLayout(self)
+        top_layout = QHBoxLayout()
+        self.summary_label = QLabel()
+        top_layout.addWidget(self.summary_label, 1)
+        recheck_btn = QPushButton("重新检查")
+        recheck_btn.clicked.connect(self.run_check)
+        top_layout.addWidget(recheck_btn)
+        layout.addLayout(top_layout)
+
+        self.tree = QTreeWidget()
+        self.tree.setRootIsDecorated(False)
+        self.tree.setUniformRowHeights(True)
+        self.tree.setHeaderLabels(["级别", "位置", "问题"])
+        for column, width in enumerate((60, 180, 520)):
+            self.tree.setColumnWidth(column, width)
+        self.tree.itemClicked.connect(self.on_item_clicked)
+        layout.addWidget(self.tree)
+
+    # 检查当前编辑中的存档
+    def run_check(self):
+        main_window = self.main_window
+        issues = validate_save(main_window.config, main_window.card_mgr, main_window.rite_mgr)
+        self.tree.clear()
+        items = []
+        for issue in issues:
+            item = QTreeWidgetItem([LEVEL_NAMES[issue["level"]], format_location(issue), issue["message"]])
+            item.setForeground(0, QBrush(QColor(LEVEL_COLORS[issue["level"]])))
+            item.setToolTip(2, issue["message"])
+            item.setData(0, Qt.ItemDataRole.UserRole, issue)
+            items.append(item)
+        self.tree.addTopLevelItems(items)
+
+        error_count = sum(1 for issue in issues if issue["level"] == LEVEL_ERROR)
+        text = f"共 {len(issues)} 个问题，其中错误 {error_count} 个" if issues else "未发现问题"
+        if main_window.card_mgr is None or main_window.rite_mgr is None:
+            text += "（游戏数据尚未加载完成，未检查卡牌和仪式id）"
+        self.summary_label.setText(text)
+
+    # 跳转到问题所在的卡牌或仪式行
+    def on_item_clicked(self, item, column):
+        issue = item.data(0, Qt.ItemDataRole.UserRole)
+        if issue["uid"] is None:
+            return
+        # uid指针问题跳转到最大uid所在的行
+        section = ISSUE_TABLES.get(issue["section"])
+        if section is not None:
+            self.main_window.show_save_item(section, issue["uid"])
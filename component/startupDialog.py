@@ -8,6 +8,10 @@ from PyQt6.QtCore import Qt, QMimeData
 from PyQt6.QtGui import QDragEnterEvent, QDropEvent
 from pathlib import Path
 
+from component.savePickerDialog import SavePickerDialog
+from manager.dataCache import CONFIG_DIR
+from manager.saveScanner import DEFAULT_SAVEDATA_DIR, find_savedata_root
+
 
 class StartupDialog(QDialog):
     CONFIG_FILE = "app_config.json"
@@ -24,7 +28,7 @@ class StartupDialog(QDialog):
 
     # 获取跨平台的配置文件路径
     def get_config_path(self):
-        config_dir = Path.home() / ".SultansGame_Save_Editor"
+        config_dir = CONFIG_DIR
         config_dir.mkdir(exist_ok=True)
         return config_dir / self.CONFIG_FILE
 
@@ -100,6 +104,10 @@ class StartupDialog(QDialog):
         save_btn = QPushButton("浏览")
         save_btn.clicked.connect(self.select_save_dir)
         save_layout.addWidget(save_btn)
+        # 扫描SAVEDATA下所有账号的存档并选择
+        scan_btn = QPushButton("扫描存档")
+        scan_btn.clicked.connect(self.pick_save)
+        save_layout.addWidget(scan_btn)
         layout.addLayout(save_layout)
 
         # 按钮容器
@@ -156,6 +164,19 @@ class StartupDialog(QDialog):
         if path:
             self.save_edit.setText(path)
 
+    # 从SAVEDATA目录的存档列表中选择存档，目录由当前存档路径推断，推断不出时使用游戏默认目录
+    def pick_save(self):
+        root = find_savedata_root(self.save_edit.text())
+        if root is None and DEFAULT_SAVEDATA_DIR.is_dir():
+            root = str(DEFAULT_SAVEDATA_DIR)
+        if root is None:
+            root = QFileDialog.getExistingDirectory(self, "选择SAVEDATA目录")
+            if not root:
+                return
+        dialog = SavePickerDialog(root, self)
+        if dialog.exec() and dialog.selected_path:
+            self.save_edit.setText(dialog.selected_path)
+
     # 在手动输入文件目录时实时验证路径有效性，并且在选择/拖放/输入文件目录后改变输入框和按钮样式
     def validate_path(self):
         data_path = self.path_edit.text()
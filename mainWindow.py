@@ -1,4 +1,5 @@
 import gc
+import multiprocessing
 import os
 
 import json5
@@ -9,8 +10,9 @@ from functools import partial
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                              QTableWidget, QTableWidgetItem, QLineEdit, QPushButton,
                              QLabel, QMessageBox, QTextEdit, QFileDialog, QDialog, QProgressDialog, QInputDialog,
-                             QTabWidget)
-from PyQt6.QtCore import Qt, QFileSystemWatcher
+                             QTabWidget, QProgressBar)
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QAction, QKeySequence
 from component.startupDialog import StartupDialog
 from component.cardDetailWindow import CardDetailWindow
 from component.addCardDialog import AddCardDialog
@@ -18,53 +20,133 @@ from component.addCardDialog import AddCardDialog
 from manager.cardDataManager import CardDataManager
 from manager.tagDataManager import TagDataManager
 from manager.riteDataManager import RiteDataManager
+from manager.jsonLoader import format_load_report
+from manager.saveFileManager import merge_streamed_config
+from manager.saveEditOps import UndoStack
 from component.cardTablePage import CardTablePage
 from component.riteTablePage import RiteTablePage
 from component.infoPage import InfoPage
 from component.helpPage import HelpPage
 from component.saveArchivePage import SaveArchivePage
+from component.dataLoadWorker import GameDataLoader
+from component.fileWatchService import FileWatchService
+from component.configChangeBus import ConfigChangeBus
 
 
 class MainWindow(QMainWindow):
+    # 数据页面：(属性名, 页面类, 选项卡标题)，基本信息页负责读取存档，启动时创建，其余页面第一次显示时才创建
+    DATA_PAGES = (
+        ("info_page", InfoPage, "基本信息"),
+        ("table_page", CardTablePage, "卡牌编辑"),
+        ("rite_page", RiteTablePage, "仪式编辑"),
+        ("save_page", SaveArchivePage, "存档管理"),
+    )
+
+    # 分块读取的存档字段 -> 显示该字段的页面
+    STREAMED_PAGES = {"cards": "table_page", "rites": "rite_page"}
+
     def __init__(self, data_dir: str, save_dir: str):
         super().__init__()
         self.config = {}  # 统一管理配置数据
         self.card_mgr = None
+        self.tag_mgr = None
         self.rite_mgr = None
         self.default_data_dir = data_dir
         self.data_dir = data_dir
         self.save_dir = save_dir
+        self.file_watch = FileWatchService(self)  # 各页面共用的文件监视
+        self.change_bus = ConfigChangeBus(self)  # 存档修改通知
+        self.change_bus.changed.connect(self._on_config_changed)
         self.info_page = InfoPage(self)
-        self.table_page = CardTablePage(self)
-        self.rite_page = RiteTablePage(self)
-        self.save_page = SaveArchivePage(self)
-
+        self.table_page = None
+        self.rite_page = None
+        self.save_page = None
+        self.data_loader = None
+        self._load_result = None  # 游戏数据加载未完成的原因
+        self._tab_pages = {}  # 选项卡序号 -> 页面属性名
+        self._page_containers = {}  # 页面属性名 -> 延迟创建页面的容器
+        self._dirty_pages = set()  # 数据已变化、等待显示时刷新的页面
+        self._page_changes: Dict[str, list] = {}  # 隐藏的页面 -> 等待显示时应用的存档修改
+        self.config_streaming = False  # 存档是否正在分块读取
+        self._config_before_stream = None  # 分块读取失败时恢复的存档
+        self.save_writer = None  # 当前存档的增量写入器
+        self._pending_dirty = []  # 增量写入器就绪前记录的修改
+        self.undo_stack = UndoStack()  # 存档编辑的撤销/重做记录
 
         self.initUI()
 
-        # 尝试加载默认manager数据
+        # 在后台线程中并行加载游戏数据和存档，各部分加载完成后刷新对应页面
         self._init_managers(self.default_data_dir)
         self.info_page._init_save_file()
-        self.info_page.update_info()
-        self.table_page.update_info()
-        self.rite_page.update_info()
-        self.save_page.update_info()
 
-    # 初始化卡牌和标签管理器
+    # 在后台加载卡牌和仪式管理器
     def _init_managers(self, data_dir: str):
+        self.data_loader = GameDataLoader(data_dir, self)
+        self.data_loader.progress.connect(self._on_load_progress)
+        self.data_loader.tag_mgr_loaded.connect(self._on_tag_mgr_loaded)
+        self.data_loader.card_mgr_loaded.connect(self._on_card_mgr_loaded)
+        self.data_loader.rite_mgr_loaded.connect(self._on_rite_mgr_loaded)
+        self.data_loader.failed.connect(self._on_load_failed)
+        self.data_loader.cancelled.connect(self._on_load_cancelled)
+        self.data_loader.finished.connect(self._on_loader_finished)
         self.show_loading()
-        try:
-            cards_path = os.path.join(data_dir, "cards.json")
-            tags_path = os.path.join(data_dir, "tag.json")
-            rites_path = os.path.join(data_dir, "rite")
-            try:
-                self.card_mgr = CardDataManager(cards_path)
-                # self.tag_mgr = TagDataManager(tags_path)
-                self.rite_mgr = RiteDataManager(rites_path)
-            except Exception as e:
-                QMessageBox.critical(self, "错误", f"加载默认游戏数据失败: {str(e)}")
-        finally:
-            self.hide_loading()
+        self.data_loader.start()
+
+    # 重新在后台加载游戏数据，用于取消或加载失败之后
+    def reload_game_data(self):
+        if self.data_loader and self.data_loader.isRunning():
+            return
+        if self.data_loader:
+            self.data_loader.deleteLater()
+        self._init_managers(self.data_dir)
+
+    # 标签管理器就绪，卡牌页面可以按标签筛选（页面尚未创建时在创建时加载）
+    def _on_tag_mgr_loaded(self, tag_mgr):
+        self.tag_mgr = tag_mgr
+        if self.table_page is not None:
+            self.table_page.update_tag_types()
+
+    # 卡牌数据加载完成，刷新依赖卡牌名称的页面
+    def _on_card_mgr_loaded(self, card_mgr):
+        self.card_mgr = card_mgr
+        self.mark_pages_dirty("table_page")
+
+    # 仪式数据加载完成，刷新仪式页面
+    def _on_rite_mgr_loaded(self, rite_mgr):
+        self.rite_mgr = rite_mgr
+        self.mark_pages_dirty("rite_page")
+        print(f"游戏数据加载完成：{format_load_report()}")
+
+    def _on_load_progress(self, percent, message):
+        # 无法估计进度的阶段显示忙碌状态
+        if percent < 0:
+            self.loading_bar.setRange(0, 0)
+        else:
+            self.loading_bar.setRange(0, 100)
+            self.loading_bar.setValue(percent)
+        self.loading_label.setText(message)
+
+    def _on_load_failed(self, message):
+        self._load_result = "加载游戏数据失败"
+        QMessageBox.critical(self, "错误", f"加载默认游戏数据失败: {message}")
+
+    def _on_load_cancelled(self):
+        self._load_result = "已取消加载游戏数据"
+
+    # 加载线程结束，数据未加载完成时在状态栏提供重新加载按钮
+    def _on_loader_finished(self):
+        self.hide_loading()
+        if self.card_mgr is None or self.rite_mgr is None:
+            self.loading_label.setText(self._load_result or "游戏数据未加载完成")
+            self.loading_label.show()
+            self.reload_data_btn.show()
+
+    # 取消后台加载
+    def cancel_loading(self):
+        if self.data_loader and self.data_loader.isRunning():
+            self.data_loader.requestInterruption()
+        self.info_page.cancel_loading()
+        self.loading_label.setText("正在取消加载...")
 
     def initUI(self):
         self.setWindowTitle('苏丹')
@@ -74,45 +156,246 @@ class MainWindow(QMainWindow):
         self.tabs = QTabWidget()
         self.setCentralWidget(self.tabs)
 
-        # 初始化页面
-        self.tabs.addTab(self.info_page, "基本信息")
-        self.tabs.addTab(self.table_page, "卡牌编辑")
-        self.tabs.addTab(self.rite_page, "仪式编辑")
-        self.tabs.addTab(self.save_page, "存档管理")
+        # 初始化页面，未创建的页面先放入空容器占位
+        for attr, _, title in self.DATA_PAGES:
+            page = getattr(self, attr)
+            if page is None:
+                page = QWidget()
+                container_layout = QVBoxLayout(page)
+                container_layout.setContentsMargins(0, 0, 0, 0)
+                self._page_containers[attr] = page
+            self._tab_pages[self.tabs.addTab(page, title)] = attr
         help_page = HelpPage()
         self.tabs.addTab(help_page, "帮助信息")
+        self.tabs.currentChanged.connect(self._on_tab_changed)
 
-    # 显示加载提示对话框
+        # 编辑菜单：撤销/重做存档修改
+        edit_menu = self.menuBar().addMenu("编辑")
+        self.undo_action = QAction("撤销", self)
+        self.undo_action.setShortcut(QKeySequence.StandardKey.Undo)
+        self.undo_action.triggered.connect(self.undo_edit)
+        self.redo_action = QAction("重做", self)
+        self.redo_action.setShortcuts([QKeySequence("Ctrl+Y"), QKeySequence("Ctrl+Shift+Z")])
+        self.redo_action.triggered.connect(self.redo_edit)
+        edit_menu.addAction(self.undo_action)
+        edit_menu.addAction(self.redo_action)
+        self._update_undo_actions()
+
+        # 状态栏中的加载进度
+        self.loading_label = QLabel()
+        self.loading_bar = QProgressBar()
+        self.loading_bar.setRange(0, 100)
+        self.loading_bar.setFixedWidth(200)
+        self.loading_cancel_btn = QPushButton("取消加载")
+        self.loading_cancel_btn.clicked.connect(self.cancel_loading)
+        self.reload_data_btn = QPushButton("重新加载")
+        self.reload_data_btn.clicked.connect(self.reload_game_data)
+        self.statusBar().addWidget(self.loading_label, 1)
+        self.statusBar().addPermanentWidget(self.loading_bar)
+        self.statusBar().addPermanentWidget(self.loading_cancel_btn)
+        self.statusBar().addPermanentWidget(self.reload_data_btn)
+        self.hide_loading()
+
+    # 显示加载进度
     def show_loading(self):
-        self.loading_dialog = QProgressDialog("正在加载数据，请稍候...", None, 0, 0, self)
-        self.loading_dialog.setWindowTitle("加载中")
-        self.loading_dialog.setCancelButton(None)
-        self.loading_dialog.setWindowModality(Qt.WindowModality.WindowModal)
-        self.loading_dialog.setMinimumDuration(0)
-        self.loading_dialog.show()
-        QApplication.processEvents()  # 强制刷新界面
-
-    # 隐藏加载提示对话框
+        self._load_result = None
+        self.reload_data_btn.hide()
+        self.loading_bar.setRange(0, 100)
+        self.loading_bar.setValue(0)
+        self.loading_label.setText("正在加载数据，请稍候...")
+        self.loading_label.show()
+        self.loading_bar.show()
+        self.loading_cancel_btn.show()
+
+    # 隐藏加载进度
     def hide_loading(self):
-        if hasattr(self, 'loading_dialog') and self.loading_dialog:
-            self.loading_dialog.close()
-            self.loading_dialog = None
+        self.loading_label.hide()
+        self.loading_bar.hide()
+        self.loading_cancel_btn.hide()
+        self.reload_data_btn.hide()
+
+    # 切换选项卡时创建页面，或刷新在隐藏期间数据发生变化的页面
+    def _on_tab_changed(self, index):
+        attr = self._tab_pages.get(index)
+        if attr is None:
+            return
+        if getattr(self, attr) is None:
+            self._create_page(attr)
+        elif attr in self._dirty_pages:
+            self._refresh_page(attr)
+        elif attr in self._page_changes:
+            getattr(self, attr).apply_changes(self._page_changes.pop(attr))
 
-    # 添加配置更新方法
+    # 创建页面并放入占位容器
+    def _create_page(self, attr: str):
+        page_class = next(cls for name, cls, _ in self.DATA_PAGES if name == attr)
+        page = page_class(self)
+        setattr(self, attr, page)
+        self._page_containers.pop(attr).layout().addWidget(page)
+        if attr == "table_page":
+            page.update_tag_types()
+        self._refresh_page(attr)
+
+    def _refresh_page(self, attr: str):
+        self._dirty_pages.discard(attr)
+        self._page_changes.pop(attr, None)
+        getattr(self, attr).update_info()
+
+    # 标记页面数据已变化：当前显示的页面立即刷新，隐藏的页面在下次显示时刷新，未创建的页面创建时再加载
+    def mark_pages_dirty(self, *attrs: str):
+        current = self._tab_pages.get(self.tabs.currentIndex())
+        for attr in attrs:
+            if getattr(self, attr) is None:
+                continue
+            if attr == current:
+                self._refresh_page(attr)
+            else:
+                self._dirty_pages.add(attr)
+
+    # 添加配置更新方法，所有页面整体刷新
     def update_config(self, new_config):
         self.config = new_config
-        self.info_page.update_info()
-        self.table_page.update_info()
-        self.rite_page.update_info()
-        self.save_page.update_info()
+        self.change_bus.discard()
+        self.mark_pages_dirty(*(attr for attr, _, _ in self.DATA_PAGES))
+
+    # 存档修改通知：当前显示的页面立即按修改位置局部更新，隐藏的页面累积修改，显示时再更新
+    def _on_config_changed(self, changes):
+        current = self._tab_pages.get(self.tabs.currentIndex())
+        for attr, _, _ in self.DATA_PAGES:
+            if getattr(self, attr) is None or attr in self._dirty_pages:
+                continue
+            if attr == current:
+                getattr(self, attr).apply_changes(changes)
+            else:
+                self._page_changes.setdefault(attr, []).extend(changes)
+
+    # 开始分块读取存档：基本信息先显示，卡牌和仪式表格先清空
+    def begin_config_stream(self, new_config):
+        if not self.config_streaming:
+            self._config_before_stream = self.config
+        self.config_streaming = True
+        self.save_writer = None
+        self._pending_dirty = []
+        # 读取了新的存档，之前的编辑记录不再适用
+        self.undo_stack.clear()
+        self._update_undo_actions()
+        self.update_config(new_config)
+
+    # 追加一块卡牌或仪式数据，当前显示的表格只填充新增的行，隐藏的表格在显示时整体刷新
+    def append_config_chunk(self, field: str, items: list):
+        start = len(self.config[field])
+        self.config[field].extend(items)
+        attr = self.STREAMED_PAGES[field]
+        page = getattr(self, attr)
+        if page is None or attr in self._dirty_pages:
+            return
+        if attr == self._tab_pages.get(self.tabs.currentIndex()):
+            page.append_rows(start)
+        else:
+            self._dirty_pages.add(attr)
+
+    # 存档读取完成，合并其余字段，读取期间的修改补记到增量写入器
+    def end_config_stream(self, rest: dict, key_order: list, save_writer=None):
+        merge_streamed_config(self.config, rest, key_order)
+        self.config_streaming = False
+        self.save_writer = save_writer
+        for section, card_uid in self._pending_dirty:
+            self.mark_config_dirty(section, card_uid)
+        self._pending_dirty = []
+        self._config_before_stream = None
+        for attr in self.STREAMED_PAGES.values():
+            page = getattr(self, attr)
+            if page is not None and attr not in self._dirty_pages:
+                page.resize_to_contents()
+        # 位于cards之后的基本信息字段随其余字段读取，基本信息页需要重新显示
+        self.mark_pages_dirty("info_page", "save_page")
+
+    # 分块读取失败，恢复读取前的存档
+    def abort_config_stream(self):
+        if self.config_streaming:
+            self.config_streaming = False
+            self.update_config(self._config_before_stream)
+            self._config_before_stream = None
+
+    # 记录修改过的存档字段，保存时只重新序列化这些部分；card_uid不为空时只记录cards中的这张卡牌
+    def mark_config_dirty(self, section: str, card_uid=None):
+        if self.save_writer is None:
+            if self.config_streaming:
+                self._pending_dirty.append((section, card_uid))
+            return
+        if card_uid is not None:
+            self.save_writer.mark_card_dirty(card_uid)
+        else:
+            self.save_writer.mark_dirty(section)
+
+    # 记录一次已经完成的存档编辑，用于撤销，并通知页面更新修改的部分
+    def record_edit(self, op):
+        if op is None:
+            return
+        self.undo_stack.push(op)
+        self._update_undo_actions()
+        self._notify_edit(op)
+
+    # 通知页面编辑涉及的修改；增删了列表元素时立即通知，使表格模型的行数与列表同步，
+    # 否则视图在通知发出前重绘会按旧的行数读取已删除的元素
+    def _notify_edit(self, op):
+        changes = op.changes()
+        self.change_bus.notify_changes(changes)
+        if any(change.uid is None and change.field is None and isinstance(self.config.get(change.section), list)
+               for change in changes):
+            self.change_bus.flush()
+
+    # 撤销最近一次编辑
+    def undo_edit(self):
+        self._replay_edit(self.undo_stack.undo, "撤销")
+
+    # 重做最近一次撤销的编辑
+    def redo_edit(self):
+        self._replay_edit(self.undo_stack.redo, "重做")
+
+    # 执行撤销或重做，标记涉及的存档字段并刷新页面
+    def _replay_edit(self, replay, action_name: str):
+        try:
+            op = replay(self.config)
+        except (KeyError, IndexError) as e:
+            # 存档已被替换或元素已不存在，编辑记录失效
+            self.undo_stack.clear()
+            self._update_undo_actions()
+            QMessageBox.warning(self, "错误", f"{action_name}失败，编辑记录已清空: {str(e)}")
+            return
+        if op is None:
+            return
+        for section, card_uid in op.dirty_marks():
+            self.mark_config_dirty(section, card_uid)
+        self._notify_edit(op)
+        self._update_undo_actions()
+        self.statusBar().showMessage(f"已{action_name}：{op.description()}", 3000)
+
+    def _update_undo_actions(self):
+        self.undo_action.setEnabled(self.undo_stack.can_undo())
+        self.redo_action.setEnabled(self.undo_stack.can_redo())
+
+    # 切换到卡牌或仪式页面并选中指定uid的行
+    def show_save_item(self, section: str, uid):
+        attr = self.STREAMED_PAGES[section]
+        index = next(index for index, name in self._tab_pages.items() if name == attr)
+        self.tabs.setCurrentIndex(index)
+        page = getattr(self, attr)
+        if not page.select_uid(uid):
+            QMessageBox.information(self, "提示", f"表格中没有uid为{uid}的行，存档可能已被修改")
 
     # 在关闭窗口时增加
     def closeEvent(self, event):
-        self.info_page.file_watcher.deleteLater()
+        # 等待后台加载线程退出
+        self.cancel_loading()
+        if self.data_loader:
+            self.data_loader.wait()
         super().closeEvent(event)
 
 
 if __name__ == "__main__":
+    # 打包后使用进程池构建仪式名索引需要此调用
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
 
     startup_dialog = StartupDialog()
@@ -0,0 +1,245 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Tuple
+
+from manager.jsonLoader import load_json_file
+from manager.saveEditOps import (add_card, default_card_tag, new_card_template, remove_card, set_field,
+                                 set_item_fields)
+from manager.saveFileManager import load_save_file, write_save_file
+
+# 命令行批量编辑存档，不依赖Qt，启动只需导入数据层
+# 用法：python -m manager.batchEditor <脚本.json> <存档...> [--config 游戏config目录] [--jobs 进程数]
+#       [--output-dir 输出目录] [--compact] [--dry-run]
+#
+# 脚本为编辑操作列表（或带有"ops"列表的对象），按顺序应用到每个存档：
+#   {"op": "set_counter", "id": 7000001, "value": 5}
+#   {"op": "set_field", "key": "round", "value": 10}
+#   {"op": "add_card", "id": 2000001, "copies": 1, "fields": {"life": 3}}
+#   {"op": "remove_cards", "id": 2000001}
+#   {"op": "remove_card", "uid": 123}
+#   {"op": "edit_card", "uid": 123, "fields": {"count": 2}}
+#   {"op": "edit_rite", "uid": 45, "fields": {"round": 1}}
+
+# 存档数不少于该值时才启用进程池，存档较少时进程启动开销大于收益
+BATCH_POOL_THRESHOLD = 2
+
+# 工作进程中的卡牌数据管理器，由_init_worker加载，未提供config目录时为None
+_card_mgr = None
+
+
+# 编辑脚本格式错误或操作无法应用
+class ScriptError(ValueError):
+    pass
+
+
+# 加载卡牌数据，在每个工作进程启动时执行一次，必须定义在模块顶层
+def _init_worker(config_dir: Optional[str]):
+    global _card_mgr
+    if config_dir:
+        from manager.cardDataManager import CardDataManager
+        _card_mgr = CardDataManager(os.path.join(config_dir, "cards.json"))
+
+
+# 读取并校验编辑脚本
+def load_script(path: str) -> List[Dict[str, Any]]:
+    script = load_json_file(path, report=False)
+    ops = script.get('ops') if isinstance(script, dict) else script
+    if not isinstance(ops, list):
+        raise ScriptError("脚本必须是操作列表，或带有ops列表的对象")
+    for number, op in enumerate(ops, start=1):
+        if not isinstance(op, dict) or op.get('op') not in _OP_HANDLERS:
+            raise ScriptError(f"第{number}个操作无法识别: {op!r}")
+    return ops
+
+
+# 有卡牌数据时按类型判断苏丹卡，否则按是否带有苏丹卡池序号判断
+def _is_sudan(card: Dict[str, Any]) -> bool:
+    if _card_mgr is not None:
+        return _card_mgr.is_sudan_card(card.get('id'))
+    tag = card.get('tag')
+    return isinstance(tag, dict) and 'sudan_pool_index' in tag
+
+
+def _op_set_counter(config: Dict, op: Dict[str, Any]) -> int:
+    return int(set_field(config, 'counter', str(op['id']), op['value']) is not None)
+
+
+def _op_set_field(config: Dict, op: Dict[str, Any]) -> int:
+    return int(set_field(config, None, op['key'], op['value']) is not None)
+
+
+def _op_add_card(config: Dict, op: Dict[str, Any]) -> int:
+    card_id = op['id']
+    copies = op.get('copies', 1)
+    for _ in range(copies):
+        card = new_card_template(config.get('card_uid_index', 0), card_id)
+        card_type = _card_mgr.get_card_type(card_id) if _card_mgr is not None else op.get('type', '')
+        card['tag'] = default_card_tag(card_type, len(config.get('sudan_pool_cards', [])))
+        card.update(op.get('fields', {}))
+        add_card(config, card, _is_sudan(card))
+    return copies
+
+
+# 删除时从后往前，尚未删除的卡牌位置不变；苏丹卡池序号由remove_card重新编号
+def _op_remove_cards(config: Dict, op: Dict[str, Any]) -> int:
+    cards = config.get('cards', [])
+    positions = [position for position, card in enumerate(cards) if card.get('id') == op['id']]
+    for position in reversed(positions):
+        remove_card(config, position, _is_sudan(cards[position]))
+    return len(positions)
+
+
+def _op_remove_card(config: Dict, op: Dict[str, Any]) -> int:
+    cards = config.get('cards', [])
+    for position, card in enumerate(cards):
+        if card.get('uid') == op['uid']:
+            remove_card(config, position, _is_sudan(card))
+            return 1
+    raise KeyError(f"cards中不存在uid为{op['uid']}的元素")
+
+
+def _op_edit_card(config: Dict, op: Dict[str, Any]) -> int:
+    return int(set_item_fields(config, 'cards', op['uid'], op['fields']) is not None)
+
+
+def _op_edit_rite(config: Dict, op: Dict[str, Any]) -> int:
+    return int(set_item_fields(config, 'rites', op['uid'], op['fields']) is not None)
+
+
+# 操作名 -> 处理函数，返回修改的条目数
+_OP_HANDLERS = {
+    'set_counter': _op_set_counter,
+    'set_field': _op_set_field,
+    'add_card': _op_add_card,
+    'remove_cards': _op_remove_cards,
+    'remove_card': _op_remove_card,
+    'edit_card': _op_edit_card,
+    'edit_rite': _op_edit_rite,
+}
+
+
+# 按顺序应用脚本中的操作，返回修改的条目总数；某个操作失败时抛出异常，存档不写回
+def apply_script(config: Dict, ops: List[Dict[str, Any]]) -> int:
+    changed = 0
+    for number, op in enumerate(ops, start=1):
+        try:
+            changed += _OP_HANDLERS[op['op']](config, op)
+        except (KeyError, IndexError, TypeError, ValueError, AttributeError) as e:
+            raise ScriptError(f"第{number}个操作 {op['op']} 失败: {e}") from e
+    return changed
+
+
+# 计算每个存档的写回路径，未指定输出目录时覆盖原存档；
+# 指定输出目录时保留各存档相对于共同上级目录的路径（如<账号>/auto_save.json），同名存档不会写到同一个文件
+# 同一个存档出现多次或写回路径重复时抛出ScriptError，不做任何修改
+def output_paths(save_paths: List[str], output_dir: Optional[str] = None) -> List[str]:
+    sources = [os.path.normcase(os.path.abspath(path)) for path in save_paths]
+    if len(set(sources)) != len(sources):
+        raise ScriptError("存档列表中有重复的存档")
+    if not output_dir:
+        return list(save_paths)
+    if len(save_paths) == 1:
+        return [os.path.join(output_dir, os.path.basename(save_paths[0]))]
+    try:
+        root = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in save_paths])
+    except ValueError:
+        # 不在同一个驱动器上，只能使用文件名
+        root = None
+    paths = [os.path.join(output_dir, os.path.relpath(os.path.abspath(path), root) if root else os.path.basename(path))
+             for path in save_paths]
+    if len({os.path.normcase(path) for path in paths}) != len(paths):
+        raise ScriptError("多个存档的输出路径相同，请分别指定输出目录")
+    return paths
+
+
+# 编辑单个存档，在进程池中执行，必须定义在模块顶层
+# output_path为写回路径；返回(存档路径, 是否成功, 结果描述)
+def edit_save(save_path: str, output_path: str, ops: List[Dict[str, Any]],
+              compact: bool = False, dry_run: bool = False) -> Tuple[str, bool, str]:
+    start = time.perf_counter()
+    try:
+        config = load_save_file(save_path)
+        changed = apply_script(config, ops)
+        if dry_run:
+            return save_path, True, f"修改 {changed} 项（未写回）"
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+        size, _ = write_save_file(output_path, config, compact)
+        return save_path, True, f"修改 {changed} 项，写入 {size / 1024:.1f} KB，耗时 {(time.perf_counter() - start) * 1000:.0f}ms"
+    except Exception as e:
+        return save_path, False, str(e)
+
+
+# 批量编辑存档，存档较多时使用进程池并行处理；进程池不可用或中途崩溃时，只逐个处理尚未得到结果的存档，
+# 已经写回的存档不会再次应用脚本（脚本中的新增、删除等操作不能重复执行）
+# 输出路径冲突时抛出ScriptError
+def run_batch(save_paths: List[str], ops: List[Dict[str, Any]], config_dir: Optional[str] = None,
+              max_workers: Optional[int] = None, output_dir: Optional[str] = None,
+              compact: bool = False, dry_run: bool = False) -> List[Tuple[str, bool, str]]:
+    targets = output_paths(save_paths, output_dir)
+    args = (ops, compact, dry_run)
+    results: Dict[int, Tuple[str, bool, str]] = {}
+    if len(save_paths) >= BATCH_POOL_THRESHOLD and max_workers != 1:
+        executor = None
+        futures = {}
+        try:
+            executor = ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(config_dir,))
+            for index, (path, target) in enumerate(zip(save_paths, targets)):
+                futures[executor.submit(edit_save, path, target, *args)] = index
+            for future, index in futures.items():
+                results[index] = future.result()
+        except (OSError, BrokenProcessPool) as e:
+            print(f"进程池编辑存档失败，剩余存档改为逐个处理: {e}")
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True, cancel_futures=True)
+        # 收集崩溃前已经完成的存档
+        for future, index in futures.items():
+            if index not in results and future.done() and not future.cancelled() and future.exception() is None:
+                results[index] = future.result()
+    if len(results) < len(save_paths):
+        _init_worker(config_dir)
+        for index, (path, target) in enumerate(zip(save_paths, targets)):
+            if index not in results:
+                results[index] = edit_save(path, target, *args)
+    return [results[index] for index in range(len(save_paths))]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m manager.batchEditor", description="按脚本批量编辑存档")
+    parser.add_argument("script", help="编辑脚本（JSON）")
+    parser.add_argument("saves", nargs="+", help="存档文件")
+    parser.add_argument("--config", dest="config_dir", help="游戏config目录，用于判断卡牌类型")
+    parser.add_argument("--jobs", type=int, default=None, help="并行进程数，默认为CPU核数")
+    parser.add_argument("--output-dir", help="输出目录，默认覆盖原存档")
+    parser.add_argument("--compact", action="store_true", help="输出紧凑格式")
+    parser.add_argument("--dry-run", action="store_true", help="只应用脚本，不写回")
+    args = parser.parse_args(argv)
+
+    try:
+        ops = load_script(args.script)
+    except (OSError, ValueError) as e:
+        print(f"读取脚本失败: {e}")
+        return 2
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    start = time.perf_counter()
+    try:
+        results = run_batch(args.saves, ops, args.config_dir, args.jobs, args.output_dir, args.compact, args.dry_run)
+    except ScriptError as e:
+        print(f"无法处理: {e}")
+        return 2
+    failed = 0
+    for path, ok, message in results:
+        print(f"{'成功' if ok else '失败'} {path}: {message}")
+        failed += not ok
+    print(f"共{len(results)}个存档，失败{failed}个，耗时 {time.perf_counter() - start:.2f}s")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
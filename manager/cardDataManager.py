@@ -1,20 +1,27 @@
 import os
 
-import json5
 import json
-from typing import Dict
+from typing import Dict, FrozenSet, List, Optional
 import sys
 from functools import partial
-from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-                             QTableWidget, QTableWidgetItem, QLineEdit, QPushButton,
-                             QLabel, QMessageBox, QTextEdit, QFileDialog, QDialog, QProgressDialog)
-from PyQt6.QtCore import Qt
+
+from manager.dataCache import load_compiled
+from manager.jsonLoader import load_json_file
+from manager.cardSearchIndex import CardSearchIndex
+from manager.cardRecord import CardRecord, memory_report
+
+# 苏丹卡的卡牌类型
+CARD_TYPE_SUDAN = "sudan"
+
+_EMPTY_IDS: FrozenSet[int] = frozenset()
+
 
 # 卡牌元数据管理器
 class CardDataManager:
     # 初始化对象，包括定义未知卡牌信息、加载卡牌数据、定义卡牌id和卡牌数据的映射
-    def __init__(self, card_db_path: str):
-        self.unknown_card = {
+    # config_db为已构建的配置数据库（ConfigDatabase），提供时全文搜索使用数据库的FTS索引
+    def __init__(self, card_db_path: str, config_db=None):
+        self.unknown_card = CardRecord.from_dict({
             "id": -1,
             "name": "未知卡牌",
             "title": "cards文件中不存在的卡牌",
@@ -30,16 +37,23 @@ class CardDataManager:
             "vanish": {},
             "equips": [],
             "is_only": -1
-        }
-        self.card_db = self._load_card_db(card_db_path)
-        self.card_data_mapping = self._build_card_data_mapping()
+        })
+        self.card_db_path = card_db_path
+        self.config_db = config_db
+        self.card_data_mapping = self._load_card_db(card_db_path)
+        self._search_index = None
+        # 属性索引：#键: 类型/稀有度/是否唯一/默认标签名  值: 卡牌id集合
+        self.ids_by_type: Dict[str, FrozenSet[int]] = {}
+        self.ids_by_rare: Dict[int, FrozenSet[int]] = {}
+        self.ids_by_is_only: Dict[int, FrozenSet[int]] = {}
+        self.ids_by_tag: Dict[str, FrozenSet[int]] = {}
+        self._build_attribute_indexes()
 
-    # 加载卡牌数据
+    # 加载卡牌数据，优先读取编译缓存，游戏更新cards.json后自动重建
     @staticmethod
     def _load_card_db(path: str) -> Dict:
         try:
-            with open(path, 'r', encoding='utf-8') as card_db_path:
-                return json5.load(card_db_path)
+            return load_compiled(path, CardDataManager._parse_card_db, 'cards')
         except FileNotFoundError:
             print(f"卡牌数据库文件 {path} 未找到")
             return {}
@@ -47,13 +61,86 @@ class CardDataManager:
             print(f"加载卡牌数据库时发生错误: {e}")
             return {}
 
-    # 创建ID到卡牌数据的映射
-    def _build_card_data_mapping(self) -> Dict[int, dict]:
+    # 解析cards.json源文件，并创建ID到紧凑卡牌记录的映射
+    @staticmethod
+    def _parse_card_db(path: str) -> Dict[int, CardRecord]:
         return {
-            int(cid): data
-            for cid, data in self.card_db.items()
+            int(cid): CardRecord.from_dict(data)
+            for cid, data in load_json_file(path).items()
         }
 
+    # 遍历一次卡牌数据，按类型、稀有度、是否唯一和默认标签建立id集合
+    def _build_attribute_indexes(self):
+        by_type, by_rare, by_is_only, by_tag = {}, {}, {}, {}
+        for card_id, card in self.card_data_mapping.items():
+            by_type.setdefault(card.get('type', ''), set()).add(card_id)
+            by_rare.setdefault(card.get('rare', -1), set()).add(card_id)
+            by_is_only.setdefault(card.get('is_only', -1), set()).add(card_id)
+            tags = card.get('tag')
+            if isinstance(tags, dict):
+                for tag in tags:
+                    by_tag.setdefault(tag, set()).add(card_id)
+        self.ids_by_type = {key: frozenset(ids) for key, ids in by_type.items()}
+        self.ids_by_rare = {key: frozenset(ids) for key, ids in by_rare.items()}
+        self.ids_by_is_only = {key: frozenset(ids) for key, ids in by_is_only.items()}
+        self.ids_by_tag = {key: frozenset(ids) for key, ids in by_tag.items()}
+
+    # 卡牌类型，未知卡牌返回空字符串
+    def get_card_type(self, card_id: int) -> str:
+        return self.get_card_data(card_id).get('type', '')
+
+    # 判断卡牌是否为指定类型，O(1)集合查询
+    def is_card_type(self, card_id: int, card_type: str) -> bool:
+        return card_id in self.ids_by_type.get(card_type, _EMPTY_IDS)
+
+    def is_sudan_card(self, card_id: int) -> bool:
+        return self.is_card_type(card_id, CARD_TYPE_SUDAN)
+
+    # 按条件查询卡牌id，条件为None时不限制，多个条件取交集，结果按id排序
+    def query_card_ids(self, card_type: Optional[str] = None, rare: Optional[int] = None,
+                       is_only: Optional[int] = None, tag: Optional[str] = None) -> List[int]:
+        candidates = [index.get(key, _EMPTY_IDS) for index, key in (
+            (self.ids_by_type, card_type), (self.ids_by_rare, rare),
+            (self.ids_by_is_only, is_only), (self.ids_by_tag, tag)) if key is not None]
+        if not candidates:
+            return sorted(self.card_data_mapping)
+        # 从最小的集合开始求交集
+        candidates.sort(key=len)
+        result = set(candidates[0])
+        for ids in candidates[1:]:
+            result &= ids
+        return sorted(result)
+
     # 根据id获取卡牌初始数据
-    def get_card_data(self, card_id: int) -> dict:
-        return self.card_data_mapping.get(card_id, self.unknown_card)
\ No newline at end of file
+    def get_card_data(self, card_id: int) -> CardRecord:
+        return self.card_data_mapping.get(card_id, self.unknown_card)
+
+    # 在卡牌名称、描述和提示中搜索，返回卡牌id列表；没有配置数据库时逐张匹配内存中的卡牌数据
+    def search_card_text(self, text: str, limit: int = 50) -> List[int]:
+        text = text.strip()
+        if not text:
+            return []
+        if self.config_db is not None:
+            results = self.config_db.search(text, 'cards', limit)
+            return [int(result['key']) for result in results if result['key'].isdigit()]
+        matches = []
+        for card_id, card in self.card_data_mapping.items():
+            if any(text in str(card.get(field) or '') for field in ('name', 'text', 'tips')):
+                matches.append(card_id)
+                if len(matches) >= limit:
+                    break
+        return matches
+
+    # 获取卡牌搜索索引，第一次使用时构建
+    def get_search_index(self) -> CardSearchIndex:
+        if self._search_index is None:
+            self._search_index = CardSearchIndex(self.card_data_mapping)
+        return self._search_index
+
+    # 对比原始字典和紧凑记录占用的内存，需要重新解析一次cards.json
+    def memory_report(self) -> str:
+        return memory_report(load_json_file(self.card_db_path, report=False), self.card_data_mapping)
+
+
+if __name__ == "__main__":
+    print(CardDataManager(sys.argv[1]).memory_report())
@@ -0,0 +1,150 @@
+import json
+import sys
+from collections.abc import Mapping
+from typing import Any, Dict
+
+# orjson为可选依赖，未安装时使用标准库json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 字段顺序表，字段相同的卡牌共用同一个元组
+_KEY_LAYOUTS: Dict[tuple, tuple] = {}
+# 缺失字段的占位对象
+_MISSING = object()
+
+
+def _intern_value(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _dumps(value) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _loads(raw: bytes):
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+# 紧凑的卡牌定义记录
+# 表格和对话框常用的字段保存在__slots__中，卡牌类型、标签键等字符串做了驻留，所有卡牌共用同一个对象；
+# 描述、提示、pops等大字段序列化为一段紧凑的JSON字节，访问时才解析，不常驻内存
+# 实现了Mapping接口，界面代码仍可以像字典一样使用get()和[]访问
+class CardRecord(Mapping):
+    __slots__ = ('id', 'name', 'title', 'type', 'rare', 'is_only', 'tag', 'equips', '_keys', '_heavy')
+
+    # 常驻字段，其余字段都按需解析
+    LIGHT_FIELDS = ('id', 'name', 'title', 'type', 'rare', 'is_only', 'tag', 'equips')
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'CardRecord':
+        record = cls.__new__(cls)
+        record.id = data.get('id', _MISSING)
+        record.name = _intern_value(data.get('name', _MISSING))
+        record.title = data.get('title', _MISSING)
+        record.type = _intern_value(data.get('type', _MISSING))
+        record.rare = data.get('rare', _MISSING)
+        record.is_only = data.get('is_only', _MISSING)
+        tag = data.get('tag', _MISSING)
+        if isinstance(tag, dict):
+            tag = {sys.intern(k): _intern_value(v) for k, v in tag.items()}
+        record.tag = tag
+        equips = data.get('equips', _MISSING)
+        if isinstance(equips, list):
+            equips = [_intern_value(v) for v in equips]
+        record.equips = equips
+        keys = tuple(sys.intern(k) for k in data)
+        record._keys = _KEY_LAYOUTS.setdefault(keys, keys)
+        heavy = {k: v for k, v in data.items() if k not in cls.LIGHT_FIELDS}
+        record._heavy = _dumps(heavy) if heavy else None
+        return record
+
+    # 解析大字段
+    def heavy_fields(self) -> Dict[str, Any]:
+        return _loads(self._heavy) if self._heavy is not None else {}
+
+    def __getitem__(self, key):
+        if key in self.LIGHT_FIELDS:
+            value = getattr(self, key)
+            if value is _MISSING:
+                raise KeyError(key)
+            return value
+        if key not in self._keys:
+            raise KeyError(key)
+        return self.heavy_fields()[key]
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    # 还原为与cards.json一致的字典，字段顺序不变
+    def to_dict(self) -> Dict[str, Any]:
+        heavy = self.heavy_fields()
+        return {key: (self[key] if key in self.LIGHT_FIELDS else heavy[key]) for key in self._keys}
+
+    # 序列化时只保存槽位数据，缺失字段用None以外的标记保存
+    def __reduce__(self):
+        return _restore_record, tuple(
+            _MissingMarker if value is _MISSING else value
+            for value in (getattr(self, slot) for slot in self.__slots__)
+        )
+
+    def __repr__(self):
+        return f"CardRecord(id={self.id!r}, name={self.name!r})"
+
+
+# 序列化时代表缺失字段的标记
+class _MissingMarker:
+    pass
+
+
+# 从序列化数据还原卡牌记录，字段顺序表重新共享
+def _restore_record(*values) -> CardRecord:
+    record = CardRecord.__new__(CardRecord)
+    for slot, value in zip(CardRecord.__slots__, values):
+        setattr(record, slot, _MISSING if value is _MissingMarker else value)
+    record._keys = _KEY_LAYOUTS.setdefault(record._keys, record._keys)
+    return record
+
+
+# 递归计算对象占用的内存，共享的对象只计算一次
+def deep_sizeof(obj, seen=None) -> int:
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    else:
+        # CardRecord等使用__slots__的对象统计各槽位的值，未赋值的槽位跳过
+        for cls in type(obj).__mro__:
+            for slot in cls.__dict__.get('__slots__', ()):
+                value = getattr(obj, slot, _MISSING)
+                if value is not _MISSING:
+                    size += deep_sizeof(value, seen)
+    return size
+
+
+# 对比原始字典和紧凑记录占用的内存
+def memory_report(raw_cards: Dict[Any, dict], records: Dict[int, CardRecord]) -> str:
+    # 共享的字段顺序表计入紧凑记录的开销
+    seen = {id(_MISSING)}
+    raw_size = deep_sizeof(raw_cards)
+    record_size = deep_sizeof(records, seen) + deep_sizeof(_KEY_LAYOUTS, seen)
+    ratio = record_size / raw_size if raw_size else 0
+    return (f"卡牌数：{len(records)}\n"
+            f"原始字典：{raw_size / 1024 / 1024:.2f} MB\n"
+            f"紧凑记录：{record_size / 1024 / 1024:.2f} MB（{ratio:.0%}）")
@@ -0,0 +1,124 @@
+from bisect import bisect_left
+from typing import Dict, List, Set, Tuple
+
+_pypinyin = None
+
+
+# pypinyin为可选依赖，未安装时只支持中文名和id搜索；导入需要加载词典，较慢，第一次建立索引时才导入
+def _get_pypinyin():
+    global _pypinyin
+    if _pypinyin is None:
+        try:
+            import pypinyin
+            _pypinyin = pypinyin
+        except ImportError:
+            _pypinyin = False
+    return _pypinyin
+
+# 匹配等级，数值越小排序越靠前
+RANK_EXACT = 0  # 名称或id完全一致
+RANK_PREFIX = 1  # 名称或id前缀
+RANK_SUBSTRING = 2  # 名称包含
+RANK_PINYIN = 3  # 拼音全拼或首字母包含
+RANK_FUZZY = 4  # 按顺序包含所有字符
+
+
+# 卡牌名称搜索索引，按id排序一次后建立n-gram倒排索引，支持中文名、拼音全拼、拼音首字母和id前缀搜索
+class CardSearchIndex:
+    def __init__(self, card_data_mapping: Dict[int, dict]):
+        # 条目按id排序，结果中的位置即排序后的顺序
+        self.entries: List[Tuple[int, str]] = sorted(
+            (card_id, str(card.get('name', ''))) for card_id, card in card_data_mapping.items()
+        )
+        self.ids = [card_id for card_id, _ in self.entries]
+        self.names = [name.lower() for _, name in self.entries]
+        self.pinyin_full: List[str] = []
+        self.pinyin_initials: List[str] = []
+        # id字符串排序后用于前缀二分查找
+        self._id_strings = sorted((str(card_id), pos) for pos, card_id in enumerate(self.ids))
+        # 倒排索引：#键: 单字或双字  值: 包含该片段的条目位置
+        self._grams: Dict[str, Set[int]] = {}
+
+        pypinyin = _get_pypinyin()
+        for pos, name in enumerate(self.names):
+            if pypinyin:
+                self.pinyin_full.append(''.join(pypinyin.lazy_pinyin(name)).lower())
+                self.pinyin_initials.append(
+                    ''.join(pypinyin.lazy_pinyin(name, style=pypinyin.Style.FIRST_LETTER)).lower())
+            else:
+                self.pinyin_full.append('')
+                self.pinyin_initials.append('')
+            for key in (name, self.pinyin_full[pos], self.pinyin_initials[pos]):
+                for gram in self._iter_grams(key):
+                    self._grams.setdefault(gram, set()).add(pos)
+
+    # 拆分出单字和双字片段
+    @staticmethod
+    def _iter_grams(text: str):
+        for i, char in enumerate(text):
+            yield char
+            if i + 1 < len(text):
+                yield text[i:i + 2]
+
+    # 通过倒排索引取候选条目，查询越长候选越少
+    def _candidates(self, query: str) -> Set[int]:
+        grams = [query] if len(query) == 1 else [query[i:i + 2] for i in range(len(query) - 1)]
+        postings = [self._grams.get(gram, set()) for gram in grams]
+        postings.sort(key=len)
+        result = set(postings[0])
+        for posting in postings[1:]:
+            result &= posting
+            if not result:
+                break
+        return result
+
+    # id前缀匹配
+    def _id_prefix_matches(self, query: str) -> List[int]:
+        start = bisect_left(self._id_strings, (query, -1))
+        matches = []
+        for id_string, pos in self._id_strings[start:]:
+            if not id_string.startswith(query):
+                break
+            matches.append(pos)
+        return matches
+
+    # 判断query中的字符是否按顺序出现在text中
+    @staticmethod
+    def _is_subsequence(query: str, text: str) -> bool:
+        it = iter(text)
+        return all(char in it for char in query)
+
+    # 搜索卡牌，返回按匹配等级和id排序的条目位置，空查询返回全部条目
+    def search(self, query: str) -> List[int]:
+        query = query.strip().lower()
+        if not query:
+            return list(range(len(self.entries)))
+
+        ranks: Dict[int, int] = {}
+        if query.isdigit():
+            for pos in self._id_prefix_matches(query):
+                ranks[pos] = RANK_EXACT if str(self.ids[pos]) == query else RANK_PREFIX
+
+        for pos in self._candidates(query):
+            name = self.names[pos]
+            if name == query:
+                rank = RANK_EXACT
+            elif name.startswith(query):
+                rank = RANK_PREFIX
+            elif query in name:
+                rank = RANK_SUBSTRING
+            elif query in self.pinyin_full[pos] or query in self.pinyin_initials[pos]:
+                rank = RANK_PINYIN
+            else:
+                continue
+            ranks[pos] = min(rank, ranks.get(pos, rank))
+
+        # 没有直接匹配时退回模糊匹配
+        if not ranks and len(query) > 1:
+            first_char_candidates = self._grams.get(query[0], set())
+            for pos in first_char_candidates:
+                if (self._is_subsequence(query, self.names[pos])
+                        or self._is_subsequence(query, self.pinyin_initials[pos])):
+                    ranks[pos] = RANK_FUZZY
+
+        return sorted(ranks, key=lambda pos: (ranks[pos], pos))
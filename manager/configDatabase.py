@@ -0,0 +1,249 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from manager.dataCache import cache_file_path, hash_file
+from manager.jsonLoader import loads_json_bytes
+
+# 数据库结构版本，结构变化时递增，旧数据库会被重建
+CONFIG_DB_VERSION = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta(key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS files(
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS documents(
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL,
+    category TEXT NOT NULL,
+    key TEXT NOT NULL,
+    name TEXT,
+    text TEXT,
+    tips TEXT,
+    body TEXT NOT NULL,
+    UNIQUE(path, key)
+);
+CREATE INDEX IF NOT EXISTS documents_category ON documents(category, key);
+CREATE INDEX IF NOT EXISTS documents_path ON documents(path);
+"""
+
+# 同一分类的同一个键出现在多个文件中时（如rite.json和rite文件夹），子文件夹中的记录优先
+_PREFER_FOLDER = "ORDER BY INSTR(path, '/') = 0 LIMIT 1"
+
+
+# 游戏配置目录的SQLite索引
+# 配置目录下的每个json文件按文件指纹增量导入，字典套字典的文件（如cards.json）每个键一条记录，
+# 子文件夹中的文件（如rite/5000001.json）每个文件一条记录，名称、描述和提示建立FTS5全文索引
+# 记录按(文件, 键)区分，rite.json和rite文件夹中同一仪式的记录同时保留，按分类查询时子文件夹中的记录优先
+# CardDataManager/RiteDataManager传入config_db后通过它查询和全文搜索
+class ConfigDatabase:
+    def __init__(self, config_dir: str, db_path: Optional[str] = None):
+        self.config_dir = os.path.abspath(config_dir)
+        self.db_path = db_path or str(cache_file_path(self.config_dir, 'config_index', '.sqlite3'))
+        # 允许在后台线程中构建后由界面线程查询，连接的所有使用都经过_lock串行化
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self._lock = threading.RLock()
+        self.has_fts = False
+        self.fts_tokenize = None
+        self._init_schema()
+
+    # 初始化表结构，版本不一致时清空重建
+    def _init_schema(self):
+        conn = self.conn
+        conn.execute("CREATE TABLE IF NOT EXISTS meta(key TEXT PRIMARY KEY, value TEXT)")
+        row = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if row is None or int(row['value']) != CONFIG_DB_VERSION:
+            conn.executescript("DROP TABLE IF EXISTS files; DROP TABLE IF EXISTS documents; "
+                               "DROP TABLE IF EXISTS documents_fts;")
+            conn.execute("INSERT OR REPLACE INTO meta(key, value) VALUES('version', ?)", (str(CONFIG_DB_VERSION),))
+        conn.executescript(_SCHEMA)
+        # trigram分词支持中文子串搜索，SQLite版本过低或未编译FTS5时退回LIKE查询
+        # 已有的全文索引使用的分词器不是当前最优的分词器时（如SQLite升级后支持了trigram），按documents表重建
+        existing = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'documents_fts'").fetchone()
+        for tokenize in ("trigram", "unicode61"):
+            if existing is not None and f"tokenize='{tokenize}'" in existing['sql']:
+                self.has_fts = True
+                self.fts_tokenize = tokenize
+                break
+            try:
+                conn.execute("DROP TABLE IF EXISTS documents_fts")
+                existing = None
+                conn.execute(f"CREATE VIRTUAL TABLE documents_fts USING fts5(name, text, tips, tokenize='{tokenize}')")
+                conn.execute("INSERT INTO documents_fts(rowid, name, text, tips) "
+                             "SELECT id, name, text, tips FROM documents")
+                self.has_fts = True
+                self.fts_tokenize = tokenize
+                break
+            except sqlite3.OperationalError:
+                continue
+        conn.commit()
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    # 扫描配置目录，重新导入新增或变化的文件，删除已不存在的文件
+    # on_progress(已处理数, 总数)用于汇报进度，返回导入、跳过、删除和解析失败的文件数
+    def build(self, on_progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, int]:
+        with self._lock:
+            return self._build(on_progress)
+
+    def _build(self, on_progress: Optional[Callable[[int, int], None]]) -> Dict[str, int]:
+        conn = self.conn
+        known = {row['path']: row for row in conn.execute("SELECT path, size, mtime_ns, hash FROM files")}
+        paths = []
+        for root, _, filenames in os.walk(self.config_dir):
+            for filename in filenames:
+                if filename.endswith('.json'):
+                    paths.append(os.path.relpath(os.path.join(root, filename), self.config_dir).replace(os.sep, '/'))
+
+        stats = {"imported": 0, "skipped": 0, "removed": 0, "failed": 0}
+        with conn:
+            for done, rel_path in enumerate(sorted(paths), start=1):
+                full_path = os.path.join(self.config_dir, rel_path)
+                stat = os.stat(full_path)
+                old = known.pop(rel_path, None)
+                if old is not None and old['size'] == stat.st_size and old['mtime_ns'] == stat.st_mtime_ns:
+                    stats["skipped"] += 1
+                else:
+                    file_hash = hash_file(full_path)
+                    if old is not None and old['hash'] == file_hash:
+                        stats["skipped"] += 1
+                    elif self._import_file(rel_path, full_path):
+                        stats["imported"] += 1
+                    else:
+                        # 解析失败时不记录指纹，下次构建时重试
+                        conn.execute("DELETE FROM files WHERE path = ?", (rel_path,))
+                        stats["failed"] += 1
+                        continue
+                    conn.execute("INSERT OR REPLACE INTO files(path, size, mtime_ns, hash) VALUES(?, ?, ?, ?)",
+                                 (rel_path, stat.st_size, stat.st_mtime_ns, file_hash))
+                if on_progress:
+                    on_progress(done, len(paths))
+
+            for rel_path in known:
+                self._delete_file_documents(rel_path)
+                conn.execute("DELETE FROM files WHERE path = ?", (rel_path,))
+                stats["removed"] += 1
+        return stats
+
+    # 删除某个文件导入的所有记录
+    def _delete_file_documents(self, rel_path: str):
+        if self.has_fts:
+            self.conn.execute("DELETE FROM documents_fts WHERE rowid IN (SELECT id FROM documents WHERE path = ?)",
+                              (rel_path,))
+        self.conn.execute("DELETE FROM documents WHERE path = ?", (rel_path,))
+
+    # 导入单个文件，解析失败时返回False
+    def _import_file(self, rel_path: str, full_path: str) -> bool:
+        self._delete_file_documents(rel_path)
+        try:
+            with open(full_path, 'rb') as f:
+                data, _ = loads_json_bytes(f.read())
+        except Exception as e:
+            print(f"导入配置文件 {rel_path} 失败: {e}")
+            return False
+
+        directory, filename = os.path.split(rel_path)
+        stem = os.path.splitext(filename)[0]
+        if directory:
+            # 子文件夹中每个文件是一条记录，例如rite/5000001.json
+            documents = [(directory, stem, data)]
+        elif isinstance(data, dict) and data and all(isinstance(v, dict) for v in data.values()):
+            # 字典套字典的文件每个键是一条记录，例如cards.json
+            documents = [(stem, str(key), value) for key, value in data.items()]
+        else:
+            documents = [(stem, '', data)]
+
+        for category, key, value in documents:
+            fields = value if isinstance(value, dict) else {}
+            name, text, tips = (self._as_text(fields.get(field)) for field in ('name', 'text', 'tips'))
+            cursor = self.conn.execute(
+                "INSERT INTO documents(path, category, key, name, text, tips, body) "
+                "VALUES(?, ?, ?, ?, ?, ?, ?)",
+                (rel_path, category, key, name, text, tips, json.dumps(value, ensure_ascii=False)))
+            if self.has_fts:
+                self.conn.execute("INSERT INTO documents_fts(rowid, name, text, tips) VALUES(?, ?, ?, ?)",
+                                  (cursor.lastrowid, name, text, tips))
+        return True
+
+    @staticmethod
+    def _as_text(value) -> str:
+        if value is None:
+            return ''
+        return value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+
+    # 获取一条配置记录，不存在时返回None；多个文件中都有该记录时子文件夹中的优先
+    def get_document(self, category: str, key) -> Optional[Any]:
+        with self._lock:
+            row = self.conn.execute(f"SELECT body FROM documents WHERE category = ? AND key = ? {_PREFER_FOLDER}",
+                                    (category, str(key))).fetchone()
+        return json.loads(row['body']) if row else None
+
+    def get_card(self, card_id: int) -> Optional[dict]:
+        return self.get_document('cards', card_id)
+
+    def get_rite(self, rite_id: int) -> Optional[dict]:
+        return self.get_document('rite', rite_id)
+
+    # 获取记录名称，不反序列化整条记录
+    def get_name(self, category: str, key) -> Optional[str]:
+        with self._lock:
+            row = self.conn.execute(f"SELECT name FROM documents WHERE category = ? AND key = ? {_PREFER_FOLDER}",
+                                    (category, str(key))).fetchone()
+        return row['name'] if row else None
+
+    # 某个分类下的所有键
+    def list_keys(self, category: str) -> List[str]:
+        with self._lock:
+            return [row['key'] for row in self.conn.execute(
+                "SELECT DISTINCT key FROM documents WHERE category = ? ORDER BY key", (category,))]
+
+    # 某个分类下所有记录的名称：{键: 名称}，同一个键在多个文件中时子文件夹中的优先
+    def list_names(self, category: str) -> Dict[str, str]:
+        with self._lock:
+            rows = self.conn.execute("SELECT key, name FROM documents WHERE category = ? "
+                                     "ORDER BY INSTR(path, '/') > 0", (category,)).fetchall()
+        return {row['key']: row['name'] or '' for row in rows}
+
+    # 在名称、描述和提示中搜索，可限定分类
+    def search(self, text: str, category: Optional[str] = None, limit: int = 50) -> List[Dict[str, str]]:
+        text = text.strip()
+        if not text:
+            return []
+        # trigram分词至少需要3个字符，较短的查询使用LIKE
+        use_fts = self.has_fts and (self.fts_tokenize != 'trigram' or len(text) >= 3)
+        if use_fts:
+            sql = ("SELECT d.category, d.key, d.name, d.text, d.tips FROM documents_fts "
+                   "JOIN documents d ON d.id = documents_fts.rowid WHERE documents_fts MATCH ?")
+            params: list = ['"' + text.replace('"', '""') + '"']
+        else:
+            pattern = '%' + text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+            sql = ("SELECT d.category, d.key, d.name, d.text, d.tips FROM documents d "
+                   "WHERE (d.name LIKE ? ESCAPE '\\' OR d.text LIKE ? ESCAPE '\\' OR d.tips LIKE ? ESCAPE '\\')")
+            params = [pattern, pattern, pattern]
+        if category is not None:
+            sql += " AND d.category = ?"
+            params.append(category)
+        sql += " LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            return [dict(row) for row in self.conn.execute(sql, params)]
+
+
+if __name__ == "__main__":
+    # 用法：python -m manager.configDatabase <游戏配置目录> [搜索内容]
+    database = ConfigDatabase(sys.argv[1])
+    print(database.build())
+    if len(sys.argv) > 2:
+        for result in database.search(sys.argv[2]):
+            print(f"{result['category']}/{result['key']}: {result['name']}")
+    database.close()
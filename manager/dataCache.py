@@ -0,0 +1,116 @@
+import hashlib
+import os
+import pickle
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+# 编辑器配置目录，与启动配置app_config.json所在目录一致
+CONFIG_DIR = Path.home() / ".SultansGame_Save_Editor"
+# 编译缓存目录
+CACHE_DIR = CONFIG_DIR / "cache"
+# 缓存格式版本，缓存结构变化时递增，旧缓存会自动失效
+CACHE_FORMAT_VERSION = 2
+# 缓存文件头标识
+_CACHE_MAGIC = b"SGSE-CACHE\n"
+
+
+# 获取缓存目录，不存在时自动创建
+def get_cache_dir() -> Path:
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    return CACHE_DIR
+
+
+# 计算文件内容哈希
+def hash_file(path: str) -> str:
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# 获取源文件指纹：路径、大小、修改时间，可选内容哈希
+def file_fingerprint(path: str, with_hash: bool = True) -> Dict[str, Any]:
+    stat = os.stat(path)
+    fingerprint = {
+        "path": os.path.normcase(os.path.abspath(path)),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+    }
+    if with_hash:
+        fingerprint["hash"] = hash_file(path)
+    return fingerprint
+
+
+# 根据源文件路径生成缓存文件路径，不同路径的源文件互不干扰
+def cache_file_path(source_path: str, name: str, suffix: str = '.bin') -> Path:
+    key = os.path.normcase(os.path.abspath(source_path)).encode('utf-8')
+    return get_cache_dir() / f"{name}_{hashlib.sha1(key).hexdigest()[:16]}{suffix}"
+
+
+# 读取缓存，文件头与源文件指纹不一致时返回None
+def _read_cache(cache_path: Path, source_path: str) -> Optional[Any]:
+    if not cache_path.exists():
+        return None
+    with open(cache_path, 'rb') as f:
+        if f.read(len(_CACHE_MAGIC)) != _CACHE_MAGIC:
+            return None
+        # 文件头单独序列化，校验失败时无需反序列化整个数据
+        header = pickle.load(f)
+        if header.get("version") != CACHE_FORMAT_VERSION:
+            return None
+        cached = header.get("fingerprint", {})
+        current = file_fingerprint(source_path, with_hash=False)
+        # 先比较路径、大小和修改时间，全部一致后再比较内容哈希
+        if any(cached.get(k) != v for k, v in current.items()):
+            return None
+        if cached.get("hash") != hash_file(source_path):
+            return None
+        return pickle.load(f)
+
+
+# 写入缓存文件，先写临时文件再替换，避免中断时留下损坏的缓存
+def write_cache_file(cache_path: Path, data: bytes):
+    fd, tmp_path = tempfile.mkstemp(dir=str(cache_path.parent), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, cache_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+# 写入编译缓存：文件头 + 指纹 + 数据
+def _write_cache(cache_path: Path, fingerprint: Dict[str, Any], payload: Any):
+    header = pickle.dumps({"version": CACHE_FORMAT_VERSION, "fingerprint": fingerprint},
+                          protocol=pickle.HIGHEST_PROTOCOL)
+    write_cache_file(cache_path, _CACHE_MAGIC + header + pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+# 带编译缓存的加载：缓存有效时直接读取二进制缓存，否则调用parser解析源文件并重建缓存
+# 源文件不存在时抛出FileNotFoundError，缓存读写失败只打印提示，不影响正常加载
+def load_compiled(source_path: str, parser: Callable[[str], Any], name: str) -> Any:
+    if not os.path.isfile(source_path):
+        raise FileNotFoundError(source_path)
+
+    cache_path = None
+    try:
+        cache_path = cache_file_path(source_path, name)
+        payload = _read_cache(cache_path, source_path)
+        if payload is not None:
+            return payload
+    except Exception as e:
+        print(f"读取缓存 {cache_path} 失败，将重新解析: {e}")
+
+    # 解析前记录指纹，解析过程中源文件被修改时下次启动会重新校验
+    fingerprint = file_fingerprint(source_path)
+    payload = parser(source_path)
+    if cache_path is not None:
+        try:
+            _write_cache(cache_path, fingerprint, payload)
+        except Exception as e:
+            print(f"写入缓存 {cache_path} 失败: {e}")
+    return payload
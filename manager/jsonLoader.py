@@ -0,0 +1,71 @@
+import json
+import os
+import time
+from typing import Any, Dict, Tuple
+
+import json5
+
+# orjson为可选依赖，未安装时使用标准库json（同样带有C加速）
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 严格JSON解析器名称
+FAST_PARSER = 'orjson' if orjson is not None else 'json'
+# 各文件的解析记录，键: 文件路径  值: (使用的解析器, 耗时秒数)
+LOAD_STATS: Dict[str, Tuple[str, float]] = {}
+
+_UTF8_BOM = b'\xef\xbb\xbf'
+
+
+# 解析JSON字节串，先尝试严格JSON解析器，失败时（注释、尾逗号等）回退到json5
+# 返回解析结果和实际使用的解析器名称
+def loads_json_bytes(raw: bytes) -> Tuple[Any, str]:
+    if raw.startswith(_UTF8_BOM):
+        raw = raw[len(_UTF8_BOM):]
+    try:
+        if orjson is not None:
+            return orjson.loads(raw), FAST_PARSER
+        return json.loads(raw), FAST_PARSER
+    except ValueError:
+        return json5.loads(raw.decode('utf-8')), 'json5'
+
+
+# 序列化为UTF-8字节串，优先使用orjson，pretty为True时缩进2格，否则输出不含空白的紧凑格式
+# orjson不支持的数据（如超过64位的整数）退回标准库json
+def dumps_json_bytes(data: Any, pretty: bool = False) -> bytes:
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_INDENT_2 if pretty else 0)
+        except TypeError:
+            pass
+    if pretty:
+        return json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+# 加载游戏数据JSON文件，并记录该文件走的是快速路径还是json5回退路径
+def load_json_file(path: str, report: bool = True) -> Any:
+    start = time.perf_counter()
+    with open(path, 'rb') as f:
+        raw = f.read()
+    data, parser = loads_json_bytes(raw)
+    elapsed = time.perf_counter() - start
+    LOAD_STATS[path] = (parser, elapsed)
+    if report:
+        print(f"加载 {os.path.basename(path)}: {parser}，耗时 {elapsed * 1000:.1f}ms")
+    return data
+
+
+# 汇总各解析器加载的文件数和总耗时
+def format_load_report() -> str:
+    summary: Dict[str, list] = {}
+    for parser, elapsed in LOAD_STATS.values():
+        count_and_time = summary.setdefault(parser, [0, 0.0])
+        count_and_time[0] += 1
+        count_and_time[1] += elapsed
+    return "，".join(
+        f"{parser}: {count}个文件 {total * 1000:.1f}ms"
+        for parser, (count, total) in sorted(summary.items())
+    ) or "未加载任何文件"
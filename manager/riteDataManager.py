@@ -1,22 +1,96 @@
+import copy
 import os
 import time
 
-import json5
 import json
-from typing import Dict, Any
+from typing import Dict, Any, Callable, List, Optional
 import sys
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from functools import partial, lru_cache
-from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-                             QTableWidget, QTableWidgetItem, QLineEdit, QPushButton,
-                             QLabel, QMessageBox, QTextEdit, QFileDialog, QDialog, QProgressDialog)
-from PyQt6.QtCore import Qt
 from ijson import items
 
+from manager.dataCache import cache_file_path, write_cache_file
+from manager.jsonLoader import load_json_file, loads_json_bytes
+
+# 仪式名索引缓存格式版本
+RITE_INDEX_VERSION = 1
+# 需要重新解析的文件数超过该值时才启用进程池，文件较少时进程启动开销大于收益
+RITE_INDEX_POOL_THRESHOLD = 64
+
+
+# 读取单个仪式文件的名称，在进程池中执行，必须定义在模块顶层
+def _read_rite_name(file_path: str) -> str:
+    try:
+        with open(file_path, 'rb') as f:
+            data, _ = loads_json_bytes(f.read())
+        return data.get('name', '') if isinstance(data, dict) else ''
+    except Exception as e:
+        print(f"解析仪式文件 {file_path} 失败: {e}")
+        return ''
+
+
+# 构建仪式名索引，只重新解析大小或修改时间发生变化的仪式文件
+# previous_entries为上次的索引条目，返回值格式：{仪式ID: {"size": 文件大小, "mtime_ns": 修改时间, "name": 仪式名}}
+# on_progress(已解析数, 需解析总数)用于汇报进度，回调中抛出的异常会中止构建并取消未开始的任务
+def build_rite_index(rite_dir: str, previous_entries: Dict[str, dict] = None, max_workers: int = None,
+                     on_progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, dict]:
+    previous_entries = previous_entries or {}
+    entries: Dict[str, dict] = {}
+    changed = []
+    with os.scandir(rite_dir) as it:
+        for entry in it:
+            if not entry.name.endswith('.json') or not entry.is_file():
+                continue
+            file_id = os.path.splitext(entry.name)[0]
+            stat = entry.stat()
+            old = previous_entries.get(file_id)
+            if old and old.get('size') == stat.st_size and old.get('mtime_ns') == stat.st_mtime_ns:
+                entries[file_id] = old
+            else:
+                entries[file_id] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "name": ''}
+                changed.append((file_id, entry.path))
+
+    if changed:
+        paths = [path for _, path in changed]
+        names = None
+        if len(changed) >= RITE_INDEX_POOL_THRESHOLD:
+            executor = None
+            try:
+                executor = ProcessPoolExecutor(max_workers=max_workers)
+                names = []
+                for name in executor.map(_read_rite_name, paths, chunksize=32):
+                    names.append(name)
+                    if on_progress:
+                        on_progress(len(names), len(paths))
+            except (OSError, BrokenProcessPool) as e:
+                print(f"进程池解析仪式文件失败，改为逐个解析: {e}")
+                names = None
+            finally:
+                if executor is not None:
+                    executor.shutdown(wait=True, cancel_futures=True)
+        if names is None:
+            names = []
+            for path in paths:
+                names.append(_read_rite_name(path))
+                if on_progress:
+                    on_progress(len(names), len(paths))
+        for (file_id, _), name in zip(changed, names):
+            entries[file_id]["name"] = name
+        print(f"仪式名索引已更新：重新解析 {len(changed)} 个文件，共 {len(entries)} 个仪式")
+
+    return dict(sorted(entries.items()))
+
 
 # 仪式元数据管理器
 class RiteDataManager:
     # 初始化对象，包括定义未知仪式信息、加载仪式数据、定义仪式id和仪式数据的映射
-    def __init__(self, rite_db_path: str):
+    # detail_cache_size为仪式详情缓存的最大条目数，为0时不缓存
+    # on_progress用于汇报构建仪式名索引的进度，参见build_rite_index
+    # config_db为已构建的配置数据库（ConfigDatabase），提供时仪式名和仪式详情从数据库查询，不再扫描rite文件夹
+    def __init__(self, rite_db_path: str, detail_cache_size: int = 128,
+                 on_progress: Optional[Callable[[int, int], None]] = None, config_db=None):
         self.unknown_rite = {
             "id": -1,
             "name": "未知仪式",
@@ -44,21 +118,54 @@ class RiteDataManager:
             "cards_slot": {}
         }
         self.rite_dir = rite_db_path
+        self.config_db = config_db
         # 元数据索引：#键: 仪式ID  值: 仪式名
         self.metadata_index: Dict[str, str] = {}
+        # 仪式详情LRU缓存：#键: 仪式ID  值: (文件修改时间, 文件大小, 仪式详情)
+        self.detail_cache_size = detail_cache_size
+        self._detail_cache: OrderedDict = OrderedDict()
+        self.detail_cache_hits = 0
+        self.detail_cache_misses = 0
 
-        def resource_path(relative_path):
-            if hasattr(sys, '_MEIPASS'):
-                print(sys._MEIPASS)
-                return os.path.join(sys._MEIPASS, relative_path)
-            return os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), relative_path)
+        self._build_metadata_index(on_progress)
 
-        default_rite_db = resource_path('rite_map_info.json')
-        self._build_metadata_index(default_rite_db)
+    # 从配置的rite文件夹构建仪式名索引，并持久化到缓存目录，下次启动时增量更新
+    def _build_metadata_index(self, on_progress=None):
+        if self.config_db is not None:
+            self.metadata_index = self.config_db.list_names('rite')
+            return
+        if not os.path.isdir(self.rite_dir):
+            # rite文件夹不可用时退回到随程序发布的索引文件
+            self.metadata_index = load_json_file(self._resource_path('rite_map_info.json'))
+            return
 
-    def _build_metadata_index(self, default_rite_db):
-        with open(default_rite_db, 'r', encoding='utf-8') as f:
-            self.metadata_index = json5.load(f)
+        index_path = None
+        previous_entries = {}
+        try:
+            index_path = cache_file_path(self.rite_dir, 'rite_index', '.json')
+            if index_path.exists():
+                cached = load_json_file(str(index_path), report=False)
+                if cached.get('version') == RITE_INDEX_VERSION:
+                    previous_entries = cached.get('entries', {})
+        except Exception as e:
+            print(f"读取仪式名索引缓存失败，将重新构建: {e}")
+
+        entries = build_rite_index(self.rite_dir, previous_entries, on_progress=on_progress)
+        self.metadata_index = {file_id: entry['name'] for file_id, entry in entries.items()}
+
+        if index_path is not None and entries != previous_entries:
+            try:
+                data = {"version": RITE_INDEX_VERSION, "rite_dir": self.rite_dir, "entries": entries}
+                write_cache_file(index_path, json.dumps(data, ensure_ascii=False).encode('utf-8'))
+            except Exception as e:
+                print(f"写入仪式名索引缓存失败: {e}")
+
+    # 获取随程序发布的资源文件路径
+    @staticmethod
+    def _resource_path(relative_path):
+        if hasattr(sys, '_MEIPASS'):
+            return os.path.join(sys._MEIPASS, relative_path)
+        return os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), relative_path)
 
     def get_rite_name(self, rite_id: int) -> str:
         if str(rite_id) not in self.metadata_index:
@@ -66,17 +173,62 @@ class RiteDataManager:
         else:
             return self.metadata_index[str(rite_id)]
 
+    # 获取仪式详情，文件未变化时使用缓存，文件大小或修改时间变化后重新解析
+    # 返回的是副本，调用方修改返回值不会影响缓存和之后的查询
     def get_rite_details(self, rite_id: int) -> Dict[str, Any]:
         if str(rite_id) not in self.metadata_index:
-            return self.unknown_rite
+            return copy.deepcopy(self.unknown_rite)
+
+        if self.config_db is not None:
+            # 数据库每次查询都返回新的字典，不需要缓存
+            return self.config_db.get_rite(rite_id) or copy.deepcopy(self.unknown_rite)
 
         filename = str(rite_id) + '.json'
         file_path = os.path.join(self.rite_dir, filename)
-        with open(file_path, 'r', encoding='utf-8') as f:
-            full_data = json5.load(f)
+        stat = os.stat(file_path)
+        cached = self._detail_cache.get(rite_id)
+        if cached is not None and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            self.detail_cache_hits += 1
+            self._detail_cache.move_to_end(rite_id)
+            return copy.deepcopy(cached[2])
 
+        self.detail_cache_misses += 1
+        full_data = load_json_file(file_path)
+        if self.detail_cache_size > 0:
+            self._detail_cache[rite_id] = (stat.st_mtime_ns, stat.st_size, full_data)
+            self._detail_cache.move_to_end(rite_id)
+            # 超出容量时淘汰最久未使用的仪式
+            while len(self._detail_cache) > self.detail_cache_size:
+                self._detail_cache.popitem(last=False)
+            return copy.deepcopy(full_data)
         return full_data
 
+    # 在仪式名称、描述和提示中搜索，返回仪式ID列表；没有配置数据库时只按名称匹配
+    def search_rites(self, text: str, limit: int = 50) -> List[int]:
+        text = text.strip()
+        if not text:
+            return []
+        if self.config_db is not None:
+            results = self.config_db.search(text, 'rite', limit)
+            return list(dict.fromkeys(int(result['key']) for result in results if result['key'].isdigit()))
+        return [int(rite_id) for rite_id, name in self.metadata_index.items()
+                if text in name and rite_id.isdigit()][:limit]
+
+    # 仪式详情缓存的统计信息
+    def get_detail_cache_info(self) -> Dict[str, int]:
+        return {
+            "hits": self.detail_cache_hits,
+            "misses": self.detail_cache_misses,
+            "size": len(self._detail_cache),
+            "max_size": self.detail_cache_size
+        }
+
+    # 清空仪式详情缓存
+    def clear_detail_cache(self):
+        self._detail_cache.clear()
+        self.detail_cache_hits = 0
+        self.detail_cache_misses = 0
+
 
 if __name__ == "__main__":
     riteDataManager = RiteDataManager("E:\SteamLibrary\steamapps\common\Sultan's Game\Sultan's Game_Data\StreamingAssets\config\\rite")
@@ -0,0 +1,110 @@
+from typing import Any, Dict, List, Tuple
+
+# 按uid匹配元素的列表字段
+UID_SECTIONS = ('cards', 'rites')
+
+# 变化类型
+CHANGE_ADDED = 'added'
+CHANGE_REMOVED = 'removed'
+CHANGE_CHANGED = 'changed'
+CHANGE_DUPLICATE = 'duplicate'  # uid重复，old/new为两份存档中该uid出现的次数
+
+_MISSING = object()
+
+
+# 生成一条差异记录
+# section: 顶层字段  key: uid或字典键（整个字段变化时为None）  field: 卡牌/仪式中变化的字段（仅uid字段）
+def _entry(change: str, section: str, key=None, field=None, old=None, new=None) -> Dict[str, Any]:
+    return {"change": change, "section": section, "key": key, "field": field, "old": old, "new": new}
+
+
+# 以uid建立哈希索引，没有uid的元素用序号代替
+# 同一uid第二次及以后出现的元素以(uid, 第几次出现)为键，两份存档中的重复元素按出现顺序一一比较
+# 返回索引和重复uid的出现次数
+def _index_by_uid(items: list) -> Tuple[Dict[Any, Any], Dict[Any, int]]:
+    index = {}
+    counts: Dict[Any, int] = {}
+    for position, item in enumerate(items):
+        uid = item.get('uid') if isinstance(item, dict) else None
+        if uid is None:
+            index[('#', position)] = item
+            continue
+        count = counts[uid] = counts.get(uid, 0) + 1
+        index[uid if count == 1 else (uid, count)] = item
+    return index, {uid: count for uid, count in counts.items() if count > 1}
+
+
+# 按uid比较卡牌或仪式列表，修改过的元素逐字段列出差异，重复的uid单独列出
+def _diff_uid_section(section: str, old_items: list, new_items: list) -> List[Dict[str, Any]]:
+    old_index, old_duplicates = _index_by_uid(old_items)
+    new_index, new_duplicates = _index_by_uid(new_items)
+    entries = []
+    for uid in list(old_duplicates) + [uid for uid in new_duplicates if uid not in old_duplicates]:
+        old_count = old_duplicates.get(uid, 1 if uid in old_index else 0)
+        new_count = new_duplicates.get(uid, 1 if uid in new_index else 0)
+        entries.append(_entry(CHANGE_DUPLICATE, section, uid, old=old_count, new=new_count))
+    for uid, old_item in old_index.items():
+        new_item = new_index.get(uid, _MISSING)
+        if new_item is _MISSING:
+            entries.append(_entry(CHANGE_REMOVED, section, uid, old=old_item))
+        elif new_item != old_item:
+            if isinstance(old_item, dict) and isinstance(new_item, dict):
+                entries.extend(_diff_mapping(section, old_item, new_item, key=uid))
+            else:
+                entries.append(_entry(CHANGE_CHANGED, section, uid, old=old_item, new=new_item))
+    for uid, new_item in new_index.items():
+        if uid not in old_index:
+            entries.append(_entry(CHANGE_ADDED, section, uid, new=new_item))
+    return entries
+
+
+# 逐键比较字典；key不为None时比较的是uid元素内部的字段
+def _diff_mapping(section: str, old: dict, new: dict, key=None) -> List[Dict[str, Any]]:
+    entries = []
+    for name, old_value in old.items():
+        new_value = new.get(name, _MISSING)
+        if new_value is _MISSING:
+            change, new_value = CHANGE_REMOVED, None
+        elif new_value != old_value:
+            change = CHANGE_CHANGED
+        else:
+            continue
+        entries.append(_entry(change, section, *((key, name) if key is not None else (name, None)),
+                              old=old_value, new=new_value))
+    for name, new_value in new.items():
+        if name not in old:
+            entries.append(_entry(CHANGE_ADDED, section, *((key, name) if key is not None else (name, None)),
+                                  new=new_value))
+    return entries
+
+
+# 比较两份存档，返回差异列表
+# cards和rites按uid匹配，字典字段（counter、event_status、gen_cards等）逐键比较，其余字段整体比较
+def diff_saves(old: Dict[str, Any], new: Dict[str, Any]) -> List[Dict[str, Any]]:
+    entries = []
+    for section in list(old) + [section for section in new if section not in old]:
+        old_value = old.get(section, _MISSING)
+        new_value = new.get(section, _MISSING)
+        if old_value is _MISSING:
+            entries.append(_entry(CHANGE_ADDED, section, new=new_value))
+        elif new_value is _MISSING:
+            entries.append(_entry(CHANGE_REMOVED, section, old=old_value))
+        elif old_value == new_value:
+            continue
+        elif section in UID_SECTIONS and isinstance(old_value, list) and isinstance(new_value, list):
+            entries.extend(_diff_uid_section(section, old_value, new_value))
+        elif isinstance(old_value, dict) and isinstance(new_value, dict):
+            entries.extend(_diff_mapping(section, old_value, new_value))
+        else:
+            entries.append(_entry(CHANGE_CHANGED, section, old=old_value, new=new_value))
+    return entries
+
+
+# 统计各字段的差异条数
+def summarize_diff(entries: List[Dict[str, Any]]) -> Dict[str, Dict[str, int]]:
+    summary: Dict[str, Dict[str, int]] = {}
+    for entry in entries:
+        counts = summary.setdefault(entry["section"], {CHANGE_ADDED: 0, CHANGE_REMOVED: 0, CHANGE_CHANGED: 0,
+                                                       CHANGE_DUPLICATE: 0})
+        counts[entry["change"]] += 1
+    return summary
@@ -0,0 +1,354 @@
+import time
+from collections import namedtuple
+from typing import Any, Dict, List, Optional, Tuple
+
+from manager.cardDataManager import CARD_TYPE_SUDAN
+from manager.jsonLoader import dumps_json_bytes
+
+# 撤销栈默认上限：记录条数和估算字节数
+UNDO_MAX_ENTRIES = 200
+UNDO_MAX_BYTES = 4 * 1024 * 1024
+# 同一字段的连续修改间隔不超过该秒数时合并为一条撤销记录（如逐字输入）
+UNDO_MERGE_SECONDS = 1.0
+
+
+# 字段原本不存在时的占位，撤销时删除该字段
+class _Absent:
+    def __repr__(self):
+        return 'ABSENT'
+
+
+ABSENT = _Absent()
+
+# 一次存档修改的位置，用于通知页面局部刷新：
+# section为顶层字段；uid不为None时为列表字段中uid对应的元素；field为元素或字典字段中被修改的键
+# uid和field都为None表示整个字段发生变化（如cards中增删了卡牌）
+ConfigChange = namedtuple('ConfigChange', ['section', 'uid', 'field'])
+
+
+def _estimate_size(value) -> int:
+    if value is ABSENT or value is None or isinstance(value, (bool, int, float)):
+        return 16
+    try:
+        return len(dumps_json_bytes(value))
+    except TypeError:
+        return 64
+
+
+# 按uid查找cards或rites中的元素
+def find_by_uid(items: list, uid) -> Optional[dict]:
+    for item in items:
+        if isinstance(item, dict) and item.get('uid') == uid:
+            return item
+    return None
+
+
+# 修改一个字段
+# section为None时修改顶层字段key；uid为None时修改字典字段section中的key（如counter）；
+# 否则修改列表字段section中uid对应元素的key（如cards中某张卡牌的life）
+class SetField:
+    def __init__(self, section: Optional[str], key: str, old: Any, new: Any, uid=None):
+        self.section = section
+        self.key = key
+        self.old = old
+        self.new = new
+        self.uid = uid
+        self.edited_at = time.monotonic()  # 最近一次修改的时间，用于判断是否合并
+
+    def _container(self, config: Dict) -> dict:
+        if self.section is None:
+            return config
+        if self.uid is None:
+            return config.setdefault(self.section, {})
+        item = find_by_uid(config.get(self.section, []), self.uid)
+        if item is None:
+            raise KeyError(f"{self.section}中不存在uid为{self.uid}的元素")
+        return item
+
+    def _set(self, config: Dict, value):
+        container = self._container(config)
+        if value is ABSENT:
+            container.pop(self.key, None)
+        else:
+            container[self.key] = value
+
+    def apply(self, config: Dict):
+        self._set(config, self.new)
+
+    def revert(self, config: Dict):
+        self._set(config, self.old)
+
+    # 短时间内连续修改同一字段（如逐字输入）时合并为一条记录，保留最早的旧值
+    def merge(self, other) -> bool:
+        if (isinstance(other, SetField) and (other.section, other.key, other.uid) == (self.section, self.key, self.uid)
+                and other.edited_at - self.edited_at <= UNDO_MERGE_SECONDS):
+            self.new = other.new
+            self.edited_at = other.edited_at
+            return True
+        return False
+
+    # 合并后改回了原值
+    def is_noop(self) -> bool:
+        return self.old == self.new
+
+    # 修改涉及的存档字段：(顶层字段, 卡牌uid)
+    def dirty_marks(self) -> List[Tuple[str, Any]]:
+        if self.section is None:
+            return [(self.key, None)]
+        if self.uid is not None and self.section == 'cards':
+            return [(self.section, self.uid)]
+        return [(self.section, None)]
+
+    # 修改的位置，用于通知页面
+    def changes(self) -> List[ConfigChange]:
+        if self.section is None:
+            return [ConfigChange(self.key, None, None)]
+        return [ConfigChange(self.section, self.uid, self.key)]
+
+    def size(self) -> int:
+        return 64 + _estimate_size(self.old) + _estimate_size(self.new)
+
+    def description(self) -> str:
+        target = self.key if self.section is None else f"{self.section}.{self.key}"
+        if self.uid is not None:
+            target = f"{self.section}[uid={self.uid}].{self.key}"
+        return f"修改 {target}"
+
+
+# 在列表字段中插入一个元素，撤销时移除
+class InsertItem:
+    def __init__(self, section: str, index: int, item: Any):
+        self.section = section
+        self.index = index
+        self.item = item
+
+    def apply(self, config: Dict):
+        config.setdefault(self.section, []).insert(self.index, self.item)
+
+    def revert(self, config: Dict):
+        del config[self.section][self.index]
+
+    def merge(self, other) -> bool:
+        return False
+
+    def is_noop(self) -> bool:
+        return False
+
+    def dirty_marks(self) -> List[Tuple[str, Any]]:
+        return [(self.section, None)]
+
+    def changes(self) -> List[ConfigChange]:
+        return [ConfigChange(self.section, None, None)]
+
+    def size(self) -> int:
+        return 64 + _estimate_size(self.item)
+
+    def description(self) -> str:
+        return f"新增 {self.section}[{self.index}]"
+
+
+# 从列表字段中移除一个元素，撤销时插回原位置
+class RemoveItem(InsertItem):
+    def apply(self, config: Dict):
+        InsertItem.revert(self, config)
+
+    def revert(self, config: Dict):
+        InsertItem.apply(self, config)
+
+    def description(self) -> str:
+        return f"删除 {self.section}[{self.index}]"
+
+
+# 由多个操作组成的一次编辑（如新增卡牌同时修改cards、苏丹卡池和uid索引），撤销时逆序执行
+class CompoundOp:
+    def __init__(self, ops: List[Any], description: str):
+        self.ops = ops
+        self._description = description
+
+    def apply(self, config: Dict):
+        for op in self.ops:
+            op.apply(config)
+
+    def revert(self, config: Dict):
+        for op in reversed(self.ops):
+            op.revert(config)
+
+    def merge(self, other) -> bool:
+        return False
+
+    def is_noop(self) -> bool:
+        return False
+
+    def dirty_marks(self) -> List[Tuple[str, Any]]:
+        return [mark for op in self.ops for mark in op.dirty_marks()]
+
+    def changes(self) -> List[ConfigChange]:
+        return [change for op in self.ops for change in op.changes()]
+
+    def size(self) -> int:
+        return sum(op.size() for op in self.ops)
+
+    def description(self) -> str:
+        return self._description
+
+
+# 比较元素修改前后的浅拷贝，生成对应的字段修改操作，没有变化或元素没有uid（无法再定位）时返回None
+def item_edit_op(section: str, uid, before: dict, after: dict):
+    if uid is None:
+        return None
+    ops = [SetField(section, key, before.get(key, ABSENT), after.get(key, ABSENT), uid)
+           for key in list(before) + [key for key in after if key not in before]
+           if before.get(key, ABSENT) != after.get(key, ABSENT)]
+    if not ops:
+        return None
+    return ops[0] if len(ops) == 1 else CompoundOp(ops, f"修改 {section}[uid={uid}]")
+
+
+# 新卡牌的默认字段，与游戏新生成的卡牌一致
+def new_card_template(uid: int, card_id: int = -1) -> Dict[str, Any]:
+    return {
+        'uid': uid,
+        'id': card_id,
+        'count': 1,
+        'life': 0,
+        'rareup': 0,
+        'tag': {},
+        'equip_slots': [],
+        'equips': [],
+        'bag': 0,
+        'bagpos': 2,
+        'custom_name': "",
+        'custom_text': ""
+    }
+
+
+# 新卡牌的默认标签：苏丹卡记录在苏丹卡池中的序号，人物卡为追随者，其余卡牌为空
+def default_card_tag(card_type: str, sudan_pool_length: int) -> Dict[str, int]:
+    if card_type == CARD_TYPE_SUDAN:
+        return {'sudan_pool_index': sudan_pool_length + 1}
+    if card_type == 'char':
+        return {'adherent': 1}
+    return {}
+
+
+# 以下编辑函数直接修改存档并返回对应的操作，可记录到撤销栈；界面和命令行批量编辑共用
+
+# 新增卡牌：加入cards，苏丹卡同时加入苏丹卡池，uid指针加1
+def add_card(config: Dict, card: Dict[str, Any], is_sudan: bool) -> CompoundOp:
+    cards = config.setdefault('cards', [])
+    cards.append(card)
+    ops = [InsertItem('cards', len(cards) - 1, card)]
+    if is_sudan:
+        pool = config.setdefault('sudan_pool_cards', [])
+        pool.append(card.get('id'))
+        ops.append(InsertItem('sudan_pool_cards', len(pool) - 1, card.get('id')))
+    old_index = config.get('card_uid_index', ABSENT)
+    config['card_uid_index'] = (0 if old_index is ABSENT else old_index) + 1
+    ops.append(SetField(None, 'card_uid_index', old_index, config['card_uid_index']))
+    return CompoundOp(ops, f"新增卡牌 uid {card.get('uid')}")
+
+
+# 删除cards中第position张卡牌，苏丹卡同时按标签中的序号从苏丹卡池中移除，
+# 其余苏丹卡中更大的序号减1，与卡池中的位置保持对应
+# 序号缺失或超出卡池范围时（存档检查会报告）只删除卡牌，不改动卡池
+def remove_card(config: Dict, position: int, is_sudan: bool) -> CompoundOp:
+    cards = config['cards']
+    ops = []
+    tag = cards[position].get('tag')
+    pool_index = tag.get('sudan_pool_index') if isinstance(tag, dict) else None
+    pool = config.get('sudan_pool_cards')
+    if is_sudan and isinstance(pool_index, int) and isinstance(pool, list) and 1 <= pool_index <= len(pool):
+        pool_card = pool.pop(pool_index - 1)
+        ops.append(RemoveItem('sudan_pool_cards', pool_index - 1, pool_card))
+        for index, other in enumerate(cards):
+            other_tag = other.get('tag') if isinstance(other, dict) else None
+            if index == position or not isinstance(other_tag, dict):
+                continue
+            other_index = other_tag.get('sudan_pool_index')
+            if isinstance(other_index, int) and other_index > pool_index:
+                # 替换为新的标签字典，撤销时还原原来的字典
+                new_tag = dict(other_tag, sudan_pool_index=other_index - 1)
+                other['tag'] = new_tag
+                ops.append(SetField('cards', 'tag', other_tag, new_tag, other.get('uid')))
+    card = cards.pop(position)
+    ops.append(RemoveItem('cards', position, card))
+    return CompoundOp(ops, f"删除卡牌 uid {card.get('uid')}")
+
+
+# 修改字段：section为None时修改顶层字段，否则修改字典字段section（如counter）中的key；值未变化时返回None
+def set_field(config: Dict, section: Optional[str], key: str, value: Any) -> Optional[SetField]:
+    container = config if section is None else config.setdefault(section, {})
+    old_value = container.get(key, ABSENT)
+    container[key] = value
+    return SetField(section, key, old_value, value) if old_value != value else None
+
+
+# 修改cards或rites中uid对应元素的字段，返回修改操作（没有变化时为None），找不到元素时抛出KeyError
+def set_item_fields(config: Dict, section: str, uid, fields: Dict[str, Any]):
+    item = find_by_uid(config.get(section, []), uid)
+    if item is None:
+        raise KeyError(f"{section}中不存在uid为{uid}的元素")
+    before = dict(item)
+    item.update(fields)
+    return item_edit_op(section, uid, before, item)
+
+
+# 撤销/重做栈，只记录操作本身（逆操作所需的旧值），不复制整个存档
+# 超过条数或估算字节数上限时丢弃最早的记录
+class UndoStack:
+    def __init__(self, max_entries: int = UNDO_MAX_ENTRIES, max_bytes: int = UNDO_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.undo_ops: List[Any] = []
+        self.redo_ops: List[Any] = []
+        self.total_bytes = 0
+
+    # 记录一次已经执行的编辑
+    def push(self, op, merge: bool = True):
+        self.redo_ops.clear()
+        if merge and self.undo_ops:
+            last = self.undo_ops[-1]
+            last_size = last.size()
+            if last.merge(op):
+                # 合并后按新值重新计算大小，改回原值的记录直接丢弃
+                self.total_bytes -= last_size
+                if last.is_noop():
+                    self.undo_ops.pop()
+                else:
+                    self.total_bytes += last.size()
+                return
+        self.undo_ops.append(op)
+        self.total_bytes += op.size()
+        while self.undo_ops and (len(self.undo_ops) > self.max_entries or self.total_bytes > self.max_bytes):
+            self.total_bytes -= self.undo_ops.pop(0).size()
+
+    # 撤销最近一次编辑，返回该操作，没有可撤销的编辑时返回None
+    def undo(self, config: Dict):
+        if not self.undo_ops:
+            return None
+        op = self.undo_ops.pop()
+        self.total_bytes -= op.size()
+        op.revert(config)
+        self.redo_ops.append(op)
+        return op
+
+    # 重做最近一次撤销的编辑
+    def redo(self, config: Dict):
+        if not self.redo_ops:
+            return None
+        op = self.redo_ops.pop()
+        op.apply(config)
+        self.undo_ops.append(op)
+        self.total_bytes += op.size()
+        return op
+
+    def can_undo(self) -> bool:
+        return bool(self.undo_ops)
+
+    def can_redo(self) -> bool:
+        return bool(self.redo_ops)
+
+    def clear(self):
+        self.undo_ops.clear()
+        self.redo_ops.clear()
+        self.total_bytes = 0
@@ -0,0 +1,199 @@
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from manager.jsonLoader import dumps_json_bytes, loads_json_bytes
+
+# 流式读取时最先返回的基本信息字段（位于cards之前的部分，之后的随其余字段返回）
+SAVE_HEADER_FIELDS = ('name', 'round', 'difficulty', 'counter')
+# 分块返回的大列表字段
+SAVE_STREAMED_FIELDS = ('cards', 'rites')
+# 每块包含的列表元素个数
+SAVE_CHUNK_SIZE = 200
+
+_UTF8_BOM = b'\xef\xbb\xbf'
+_DECODER = json.JSONDecoder()
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+# 读取存档文件
+def load_save_file(path: str) -> Dict:
+    with open(path, 'rb') as f:
+        config, _ = loads_json_bytes(f.read())
+    if not isinstance(config, dict):
+        raise ValueError("存档文件格式错误，根元素必须为字典")
+    return config
+
+
+# 读取存档原始字节，同时返回读取前的文件状态(大小, 修改时间)，用于判断之后文件是否被外部修改
+def read_save_bytes(path: str) -> Tuple[bytes, Tuple[int, int]]:
+    stat = os.stat(path)
+    with open(path, 'rb') as f:
+        raw = f.read()
+    return raw, (stat.st_size, stat.st_mtime_ns)
+
+
+# 校验存档的counter字段，并初始化缺失的计数器，返回是否补充了计数器
+def ensure_counter_fields(config: Dict, field_ids: Iterable[int]) -> bool:
+    if 'counter' not in config:
+        raise ValueError("存档文件缺少counter字段")
+    added = False
+    for field_id in field_ids:
+        if str(field_id) not in config['counter']:
+            config['counter'][str(field_id)] = 0
+            added = True
+    return added
+
+
+# 逐个解析顶层字段（标准库解析器，C实现）：cards和rites逐个元素解析，每凑满一块就返回一块；
+# 基本信息字段在遇到第一个分块字段时返回，之后出现的基本信息字段并入其余字段
+# sent记录已经返回的内容，解析失败时由调用方从完整读取的结果中接着返回
+def _iter_text_events(text: str, header_fields: Tuple[str, ...], chunk_size: int,
+                      sent: Dict[str, Any]) -> Iterator[Tuple[str, Any]]:
+    def skip(pos: int) -> int:
+        return _WHITESPACE.match(text, pos).end()
+
+    def expect(pos: int, char: str) -> int:
+        if text[pos:pos + 1] != char:
+            raise ValueError(f"存档格式错误：位置{pos}处应为'{char}'")
+        return pos + 1
+
+    pos = skip(0)
+    if text[pos:pos + 1] != '{':
+        raise ValueError("存档文件格式错误，根元素必须为字典")
+    pos = skip(pos + 1)
+    header, rest, key_order = {}, {}, []
+    if text[pos:pos + 1] == '}':
+        pos = skip(pos + 1)
+    else:
+        while True:
+            key, pos = _DECODER.raw_decode(text, pos)
+            if not isinstance(key, str):
+                raise ValueError(f"存档格式错误：位置{pos}处应为字段名")
+            pos = skip(expect(skip(pos), ':'))
+            key_order.append(key)
+            if key in SAVE_STREAMED_FIELDS and text[pos:pos + 1] == '[':
+                if sent['header'] is None:
+                    sent['header'] = header
+                    yield 'header', header
+                chunk = []
+                pos = skip(pos + 1)
+                if text[pos:pos + 1] != ']':
+                    while True:
+                        item, pos = _DECODER.raw_decode(text, pos)
+                        chunk.append(item)
+                        if len(chunk) >= chunk_size:
+                            sent[key] += len(chunk)
+                            yield key, chunk
+                            chunk = []
+                        pos = skip(pos)
+                        if text[pos:pos + 1] != ',':
+                            break
+                        pos = skip(pos + 1)
+                pos = expect(pos, ']')
+                if chunk:
+                    sent[key] += len(chunk)
+                    yield key, chunk
+            else:
+                value, pos = _DECODER.raw_decode(text, pos)
+                if key in header_fields and sent['header'] is None:
+                    header[key] = value
+                else:
+                    rest[key] = value
+            pos = skip(pos)
+            if text[pos:pos + 1] != ',':
+                break
+            pos = skip(pos + 1)
+        pos = skip(expect(pos, '}'))
+    if pos != len(text):
+        raise ValueError(f"存档格式错误：位置{pos}处有多余内容")
+    if sent['header'] is None:
+        sent['header'] = header
+        yield 'header', header
+    yield 'rest', (rest, key_order)
+
+
+# 把完整的存档拆成与流式读取相同的事件，sent不为空时跳过已经返回的部分
+def _iter_config_events(config: Dict, header_fields: Tuple[str, ...], chunk_size: int,
+                        sent: Optional[Dict[str, Any]] = None):
+    sent = sent or {}
+    header = sent.get('header')
+    if header is None:
+        header = {key: config[key] for key in header_fields if key in config}
+        yield 'header', header
+    streamed = [field for field in SAVE_STREAMED_FIELDS if isinstance(config.get(field), list)]
+    for field in streamed:
+        items = config[field]
+        for start in range(sent.get(field, 0), len(items), chunk_size):
+            yield field, items[start:start + chunk_size]
+    rest = {key: value for key, value in config.items() if key not in header and key not in streamed}
+    yield 'rest', (rest, list(config))
+
+
+# 流式读取存档，只解析一遍，依次返回(事件, 内容)：
+# ('header', 基本信息字段) -> ('cards'/'rites', 一块列表元素)... -> ('rest', (其余字段, 原始字段顺序))
+# 文件不是严格JSON时退回完整读取（json5），从出错前已返回的位置接着返回；raw为已读取的文件内容时不再重复读取
+def stream_save_file(path: str, header_fields: Iterable[str] = SAVE_HEADER_FIELDS,
+                     chunk_size: int = SAVE_CHUNK_SIZE, raw: Optional[bytes] = None) -> Iterator[Tuple[str, Any]]:
+    header_fields = tuple(field for field in header_fields if field not in SAVE_STREAMED_FIELDS)
+    if raw is None:
+        raw, _ = read_save_bytes(path)
+    if raw.startswith(_UTF8_BOM):
+        raw = raw[len(_UTF8_BOM):]
+
+    sent = {'header': None, **{field: 0 for field in SAVE_STREAMED_FIELDS}}
+    try:
+        yield from _iter_text_events(raw.decode('utf-8'), header_fields, chunk_size, sent)
+        return
+    except ValueError as e:
+        print(f"存档不是严格的JSON格式，改为完整读取: {e}")
+    config, _ = loads_json_bytes(raw)
+    if not isinstance(config, dict):
+        raise ValueError("存档文件格式错误，根元素必须为字典")
+    yield from _iter_config_events(config, header_fields, chunk_size, sent)
+
+
+# 流式读取结束后合并其余字段，并按存档原始字段顺序重排（原地修改，保持对象不变）
+def merge_streamed_config(config: Dict, rest: Dict, key_order: List[str]):
+    merged = {**config, **rest}
+    config.clear()
+    config.update((key, merged[key]) for key in key_order if key in merged)
+
+
+# 原子写入文件：先写入同目录下的临时文件并刷到磁盘，再替换目标文件，写入中断时原文件保持不变
+def write_bytes_atomic(path: str, data: bytes):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        # 临时文件默认只有当前用户可读写，沿用原文件的权限
+        if os.path.exists(path):
+            shutil.copymode(path, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+# 保存存档，compact为True时输出紧凑格式（更快、文件更小），否则缩进2格便于阅读
+# 返回写入的字节数和耗时秒数
+def write_save_file(path: str, config: Any, compact: bool = False) -> Tuple[int, float]:
+    start = time.perf_counter()
+    data = dumps_json_bytes(config, pretty=not compact)
+    write_bytes_atomic(path, data)
+    elapsed = time.perf_counter() - start
+    print(f"保存 {os.path.basename(path)}: {len(data)}字节，耗时 {elapsed * 1000:.1f}ms")
+    return len(data), elapsed
+
+
+# 格式化写入结果，用于提示信息
+def format_write_result(size: int, elapsed: float) -> str:
+    return f"写入 {size / 1024:.1f} KB，耗时 {elapsed * 1000:.0f}ms"
@@ -0,0 +1,210 @@
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from manager.dataCache import cache_file_path, write_cache_file
+from manager.jsonLoader import load_json_file, loads_json_bytes
+
+# 游戏存档根目录的默认位置（Windows），其下每个Steam账号一个子目录
+DEFAULT_SAVEDATA_DIR = Path.home() / "AppData" / "LocalLow" / "DoubleCross" / "SultansGame" / "SAVEDATA"
+# 自动存档、存档位列表文件和存档位目录的名称
+AUTO_SAVE_NAME = "auto_save.json"
+ARCHIVE_LIST_NAME = "user_archive.json"
+ARCHIVE_DIR_NAME = "USERARCHIVE"
+# 存档摘要缓存格式版本，摘要字段变化时递增
+SAVE_SUMMARY_VERSION = 1
+# 摘要中保留的存档字段
+SUMMARY_FIELDS = ('name', 'round', 'difficulty', 'saveTime')
+# 读取摘要的线程数，读取文件时不占用GIL
+SAVE_SCAN_WORKERS = 4
+
+# 存档类型
+KIND_AUTO = 'auto'
+KIND_ARCHIVE = 'archive'
+
+
+# 剩余苏丹卡数和处决日，与游戏存档位列表的计算方式一致：
+# 手中的苏丹卡加上苏丹卡池中未抽出的卡，处决日为7减去手中苏丹卡的最大剩余天数
+def sudan_status(cards: list, sudan_card_pool: list, is_sudan: Callable[[dict], bool]) -> Tuple[int, int]:
+    sudan_count = 0
+    max_life = None
+    for card in cards:
+        if isinstance(card, dict) and is_sudan(card):
+            sudan_count += 1
+            life = card.get('life', 0)
+            if max_life is None or life > max_life:
+                max_life = life
+    execution_day = 7 - max_life if max_life is not None else 7
+    return sudan_count + len(sudan_card_pool or []), execution_day
+
+
+# 没有卡牌数据时按标签判断苏丹卡，游戏会给每张苏丹卡记录苏丹卡池序号
+def _has_sudan_tag(card: dict) -> bool:
+    tag = card.get('tag')
+    return isinstance(tag, dict) and 'sudan_pool_index' in tag
+
+
+# 读取单个存档的摘要，在线程池中执行
+# 整个文件交给C实现的解析器解析后只保留摘要字段，比逐个事件流式解析快数倍
+def read_save_summary(path: str) -> Dict[str, Any]:
+    with open(path, 'rb') as f:
+        config, _ = loads_json_bytes(f.read())
+    if not isinstance(config, dict):
+        raise ValueError("存档文件格式错误，根元素必须为字典")
+    summary = {field: config.get(field) for field in SUMMARY_FIELDS}
+    cards = config.get('cards')
+    summary['cards'] = len(cards) if isinstance(cards, list) else 0
+    summary['left_sudan'], summary['execution_day'] = sudan_status(
+        cards if isinstance(cards, list) else [], config.get('sudan_card_pool'), _has_sudan_tag)
+    return summary
+
+
+# 从存档文件、账号目录或SAVEDATA目录推断SAVEDATA根目录，无法推断时返回None
+def find_savedata_root(path: str) -> Optional[str]:
+    if not path:
+        return None
+    path = os.path.abspath(path)
+    if os.path.isfile(path):
+        path = os.path.dirname(path)
+        if os.path.basename(path) == ARCHIVE_DIR_NAME:
+            path = os.path.dirname(path)
+    if os.path.isfile(os.path.join(path, AUTO_SAVE_NAME)) or os.path.isdir(os.path.join(path, ARCHIVE_DIR_NAME)):
+        return os.path.dirname(path)
+    return path if os.path.isdir(path) else None
+
+
+# 读取存档位列表中的存档位名称：{存档位序号: 名称}
+def _read_slot_names(profile_dir: str) -> Dict[int, str]:
+    list_path = os.path.join(profile_dir, ARCHIVE_LIST_NAME)
+    if not os.path.isfile(list_path):
+        return {}
+    try:
+        slots = load_json_file(list_path, report=False)
+    except Exception as e:
+        print(f"读取存档位列表 {list_path} 失败: {e}")
+        return {}
+    return {index: slot.get('name', '') for index, slot in enumerate(slots or []) if isinstance(slot, dict)}
+
+
+# 列出SAVEDATA下所有账号的自动存档和存档位文件，只读取目录和文件状态
+def list_save_files(root: str) -> List[Dict[str, Any]]:
+    entries = []
+    with os.scandir(root) as profiles:
+        profile_dirs = sorted((entry.name, entry.path) for entry in profiles if entry.is_dir())
+    for profile, profile_dir in profile_dirs:
+        files = []
+        auto_path = os.path.join(profile_dir, AUTO_SAVE_NAME)
+        if os.path.isfile(auto_path):
+            files.append((KIND_AUTO, None, auto_path))
+        archive_dir = os.path.join(profile_dir, ARCHIVE_DIR_NAME)
+        if os.path.isdir(archive_dir):
+            with os.scandir(archive_dir) as it:
+                for entry in it:
+                    stem, ext = os.path.splitext(entry.name)
+                    if ext == '.json' and stem.isdigit() and entry.is_file():
+                        files.append((KIND_ARCHIVE, int(stem), entry.path))
+        if not files:
+            continue
+        slot_names = _read_slot_names(profile_dir)
+        for kind, slot, path in sorted(files, key=lambda item: (item[0] != KIND_AUTO, item[1] or 0)):
+            stat = os.stat(path)
+            entries.append({
+                "profile": profile,
+                "kind": kind,
+                "slot": slot,
+                "label": slot_names.get(slot, '') if slot is not None else '',
+                "path": path,
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+            })
+    return entries
+
+
+# 扫描SAVEDATA下所有存档并读取摘要
+# previous为上次扫描结果的缓存 {路径: {"size", "mtime_ns", "summary"}}，大小和修改时间未变的存档直接使用缓存的摘要
+# 每个条目的summary为None时表示读取失败，error为错误信息
+def scan_savedata(root: str, previous: Optional[Dict[str, dict]] = None,
+                  max_workers: int = SAVE_SCAN_WORKERS) -> List[Dict[str, Any]]:
+    previous = previous or {}
+    entries = list_save_files(root)
+    changed = []
+    for entry in entries:
+        old = previous.get(entry["path"])
+        if old and old.get("size") == entry["size"] and old.get("mtime_ns") == entry["mtime_ns"]:
+            entry["summary"] = old.get("summary")
+        else:
+            changed.append(entry)
+
+    def read(entry):
+        try:
+            entry["summary"] = read_save_summary(entry["path"])
+        except Exception as e:
+            entry["summary"] = None
+            entry["error"] = str(e)
+            print(f"读取存档摘要 {entry['path']} 失败: {e}")
+
+    if len(changed) > 1 and max_workers > 1:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(read, changed))
+    else:
+        for entry in changed:
+            read(entry)
+    if changed:
+        print(f"存档摘要已更新：重新读取 {len(changed)} 个存档，共 {len(entries)} 个存档")
+    return entries
+
+
+# 带持久化缓存的扫描，缓存保存在编辑器缓存目录中，下次打开时只重新读取变化的存档
+def scan_savedata_cached(root: str, max_workers: int = SAVE_SCAN_WORKERS) -> List[Dict[str, Any]]:
+    cache_path = None
+    previous = {}
+    try:
+        cache_path = cache_file_path(root, 'save_summaries', '.json')
+        if cache_path.exists():
+            cached = load_json_file(str(cache_path), report=False)
+            if cached.get('version') == SAVE_SUMMARY_VERSION:
+                previous = cached.get('entries', {})
+    except Exception as e:
+        print(f"读取存档摘要缓存失败，将重新扫描: {e}")
+
+    entries = scan_savedata(root, previous, max_workers)
+    # 读取失败的存档不写入缓存，下次重新读取
+    current = {entry["path"]: {"size": entry["size"], "mtime_ns": entry["mtime_ns"], "summary": entry["summary"]}
+               for entry in entries if entry["summary"] is not None}
+    if cache_path is not None and current != previous:
+        try:
+            data = {"version": SAVE_SUMMARY_VERSION, "root": root, "entries": current}
+            write_cache_file(cache_path, json.dumps(data, ensure_ascii=False).encode('utf-8'))
+        except Exception as e:
+            print(f"写入存档摘要缓存失败: {e}")
+    return entries
+
+
+# 存档的显示名称，如 自动存档、存档位3 槽
+def format_save_label(entry: Dict[str, Any]) -> str:
+    if entry["kind"] == KIND_AUTO:
+        return "自动存档"
+    label = f"存档位{entry['slot'] + 1}"
+    return f"{label} {entry['label']}" if entry["label"] else label
+
+
+if __name__ == "__main__":
+    # 用法：python -m manager.saveScanner [SAVEDATA目录]，列出所有存档的摘要
+    from manager.saveTime import format_display_time
+
+    scan_root = find_savedata_root(sys.argv[1]) if len(sys.argv) > 1 else str(DEFAULT_SAVEDATA_DIR)
+    start = time.perf_counter()
+    results = scan_savedata_cached(scan_root)
+    elapsed = time.perf_counter() - start
+    for result in results:
+        info = result["summary"]
+        if info is None:
+            print(f"{result['profile']} {format_save_label(result)}: 读取失败 {result.get('error', '')}")
+            continue
+        print(f"{result['profile']} {format_save_label(result)}: {info['name']} 第{info['round']}天 "
+              f"剩余苏丹卡{info['left_sudan']} {format_display_time(info['saveTime'])}")
+    print(f"共{len(results)}个存档，耗时 {elapsed * 1000:.1f}ms")
@@ -0,0 +1,290 @@
+import json
+import os
+import re
+import time
+from bisect import bisect_right
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from manager.jsonLoader import dumps_json_bytes
+from manager.saveFileManager import read_save_bytes, write_bytes_atomic
+
+# 按卡牌uid分段记录的列表字段
+CARD_SECTION = 'cards'
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_UTF8_BOM = b'\xef\xbb\xbf'
+
+
+# 扫描存档字节流，返回顶层字段顺序、各字段值的字节区间、cards中每张卡牌的字节区间和uid
+# 以latin-1解码后每个字符对应一个字节，JSON结构字符都是ASCII，因此解析得到的位置就是字节偏移
+def scan_save_layout(raw: bytes) -> Tuple[List[str], Dict[str, Tuple[int, int]], List[Tuple[int, int]], list]:
+    text = raw.decode('latin-1')
+
+    def skip(pos: int) -> int:
+        return _WHITESPACE.match(text, pos).end()
+
+    def expect(pos: int, char: str) -> int:
+        if text[pos:pos + 1] != char:
+            raise ValueError(f"存档格式错误：位置{pos}处应为'{char}'")
+        return pos + 1
+
+    keys, spans, card_spans, card_uids = [], {}, [], []
+    pos = expect(skip(len(_UTF8_BOM) if raw.startswith(_UTF8_BOM) else 0), '{')
+    pos = skip(pos)
+    if text[pos:pos + 1] == '}':
+        return keys, spans, card_spans, card_uids
+    while True:
+        key, pos = _DECODER.raw_decode(text, pos)
+        key = key.encode('latin-1').decode('utf-8')
+        pos = skip(expect(skip(pos), ':'))
+        start = pos
+        if key == CARD_SECTION and text[pos:pos + 1] == '[':
+            pos = skip(pos + 1)
+            if text[pos:pos + 1] != ']':
+                while True:
+                    card, end = _DECODER.raw_decode(text, pos)
+                    card_spans.append((pos, end))
+                    card_uids.append(card.get('uid') if isinstance(card, dict) else None)
+                    pos = skip(end)
+                    if text[pos:pos + 1] != ',':
+                        break
+                    pos = skip(pos + 1)
+            pos = expect(pos, ']')
+        else:
+            _, pos = _DECODER.raw_decode(text, pos)
+        keys.append(key)
+        spans[key] = (start, pos)
+        pos = skip(pos)
+        if text[pos:pos + 1] != ',':
+            break
+        pos = skip(pos + 1)
+    expect(pos, '}')
+    return keys, spans, card_spans, card_uids
+
+
+# 存档的书写格式：(缩进, 元素分隔符, 键值分隔符)，缩进为None表示整个存档写在一行
+SaveFormat = Tuple[Optional[bytes], bytes, bytes]
+# 完整写入时使用的格式，与dumps_json_bytes一致
+PRETTY_FORMAT: SaveFormat = (b'  ', b',', b': ')
+COMPACT_FORMAT: SaveFormat = (None, b',', b':')
+
+
+# 从存档字节流推断书写格式：第一个字段前的空白决定缩进，第一个字段前后的分隔符决定分隔符
+def detect_save_format(raw: bytes, keys: List[str], spans: Dict[str, Tuple[int, int]]) -> SaveFormat:
+    if not keys:
+        return COMPACT_FORMAT
+    start, end = spans[keys[0]]
+    colon = raw.rindex(b':', 0, start)
+    key_separator = raw[colon:start]
+    brace = raw.index(b'{')
+    head = raw[brace + 1:raw.index(b'"', brace)]
+    if b'\n' in head:
+        return head[head.rindex(b'\n') + 1:], b',', key_separator
+    item_separator = raw[end:raw.index(b'"', end)] if len(keys) > 1 else b','
+    return None, item_separator, key_separator
+
+
+# 按存档格式和所在层级序列化一个值，多行格式时续行缩进到所在层级
+def _dump_value(value: Any, save_format: SaveFormat, depth: int) -> bytes:
+    indent, item_separator, key_separator = save_format
+    if indent is None:
+        if save_format == COMPACT_FORMAT:
+            return dumps_json_bytes(value)
+        return json.dumps(value, ensure_ascii=False,
+                          separators=(item_separator.decode(), key_separator.decode())).encode('utf-8')
+    if save_format == PRETTY_FORMAT:
+        data = dumps_json_bytes(value, pretty=True)
+    else:
+        data = json.dumps(value, ensure_ascii=False, indent=indent.decode(),
+                          separators=(',', key_separator.decode())).encode('utf-8')
+    # JSON字符串中的换行都已转义，字节流中的换行只会出现在缩进处
+    return data.replace(b'\n', b'\n' + indent * depth)
+
+
+# 逐张序列化卡牌列表，返回整个列表的字节串和每张卡牌在其中的区间
+def _dump_cards(cards: list, save_format: SaveFormat) -> Tuple[bytes, List[Tuple[int, int]]]:
+    if not cards:
+        return b'[]', []
+    indent, item_separator, _ = save_format
+    if indent is None:
+        head, separator, tail = b'[', item_separator, b']'
+    else:
+        head, separator, tail = b'[\n' + indent * 2, b',\n' + indent * 2, b'\n' + indent + b']'
+    parts, spans = [head], []
+    offset = len(head)
+    for index, card in enumerate(cards):
+        if index:
+            parts.append(separator)
+            offset += len(separator)
+        data = _dump_value(card, save_format, 2)
+        spans.append((offset, offset + len(data)))
+        parts.append(data)
+        offset += len(data)
+    parts.append(tail)
+    return b''.join(parts), spans
+
+
+# 按存档格式序列化一个顶层字段的值
+def dump_section(section: str, value: Any, save_format: SaveFormat) -> bytes:
+    if section == CARD_SECTION and isinstance(value, list):
+        return _dump_cards(value, save_format)[0]
+    return _dump_value(value, save_format, 1)
+
+
+# 按字段增量写入存档
+# 记录上次读取或写入的字节流及各字段位置，保存时只重新序列化被标记修改的顶层字段和cards中被修改的卡牌，
+# 按原文件的缩进和分隔符书写，其余字节原样拷贝；
+# 文件被外部修改、字段增删、字节流无法解析或要求的紧凑/多行格式与原文件不同时退回完整写入
+class SaveSectionWriter:
+    # raw和file_state为读取存档时得到的字节流和读取前的文件状态，未提供时重新读取
+    def __init__(self, path: str, raw: Optional[bytes] = None, file_state: Optional[Tuple[int, int]] = None):
+        self.path = path
+        self.dirty_sections: Set[str] = set()
+        self.dirty_cards: Set[Any] = set()
+        if raw is None:
+            raw, file_state = read_save_bytes(path)
+        self._set_baseline(raw, file_state=file_state)
+
+    # 记录新的基准字节流和文件状态，无法解析时没有布局，下次保存完整写入
+    def _set_baseline(self, raw: bytes, layout=None, file_state: Optional[Tuple[int, int]] = None):
+        self.raw = raw
+        try:
+            self.keys, self.spans, self.card_spans, self.card_uids = layout or scan_save_layout(raw)
+            self.save_format = detect_save_format(raw, self.keys, self.spans)
+            self.has_layout = True
+        except ValueError as e:
+            print(f"无法解析存档结构，保存时将完整写入: {e}")
+            self.keys, self.spans, self.card_spans, self.card_uids = [], {}, [], []
+            self.save_format = None
+            self.has_layout = False
+        if file_state is None:
+            try:
+                stat = os.stat(self.path)
+                file_state = (stat.st_size, stat.st_mtime_ns)
+            except OSError:
+                pass
+        self.file_state = file_state
+
+    # 标记修改过的顶层字段
+    def mark_dirty(self, section: str):
+        self.dirty_sections.add(section)
+
+    # 标记修改过的卡牌
+    def mark_card_dirty(self, uid):
+        self.dirty_cards.add(uid)
+
+    # 文件自上次读取或写入后是否未被外部修改
+    def is_current(self) -> bool:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return False
+        return self.file_state == (stat.st_size, stat.st_mtime_ns)
+
+    # 保存存档，返回写入的字节数、耗时秒数和重新序列化的片段数（完整写入时为-1）
+    def write(self, config: Dict, compact: bool = False) -> Tuple[int, float, int]:
+        start = time.perf_counter()
+        replacements = self._collect_replacements(config, compact)
+        if replacements is None:
+            data = dumps_json_bytes(config, pretty=not compact)
+            write_bytes_atomic(self.path, data)
+            self._set_baseline(data)
+            spliced = -1
+        else:
+            data, layout = self._splice(replacements)
+            write_bytes_atomic(self.path, data)
+            self._set_baseline(data, layout)
+            spliced = len(replacements)
+        self.dirty_sections.clear()
+        self.dirty_cards.clear()
+        elapsed = time.perf_counter() - start
+        mode = "完整写入" if spliced < 0 else f"增量写入{spliced}个片段"
+        print(f"保存 {os.path.basename(self.path)}: {mode}，{len(data)}字节，耗时 {elapsed * 1000:.1f}ms")
+        return len(data), elapsed, spliced
+
+    # 计算需要替换的片段：(起始, 结束, 新字节串, 字段名, 卡牌序号)，需要完整写入时返回None
+    def _collect_replacements(self, config: Dict, compact: bool) -> Optional[list]:
+        if not self.has_layout or not self.is_current() or list(config) != self.keys:
+            return None
+        if compact != (self.save_format[0] is None):
+            return None
+        sections = set(self.dirty_sections)
+        cards = config.get(CARD_SECTION)
+        if CARD_SECTION in self.spans and not isinstance(cards, list):
+            return None
+        if CARD_SECTION in self.spans and CARD_SECTION not in sections:
+            # 增删卡牌、顺序变化或uid重复时整个cards字段重新序列化
+            card_uids = [card.get('uid') if isinstance(card, dict) else None for card in cards]
+            if card_uids != self.card_uids or (self.dirty_cards and len(set(card_uids)) != len(card_uids)):
+                sections.add(CARD_SECTION)
+
+        replacements = []
+        for section in sections:
+            if section not in self.spans:
+                return None
+            begin, end = self.spans[section]
+            if section == CARD_SECTION:
+                data, card_spans = _dump_cards(cards, self.save_format)
+                card_uids = [card.get('uid') if isinstance(card, dict) else None for card in cards]
+                replacements.append((begin, end, data, section, (card_spans, card_uids)))
+            else:
+                replacements.append((begin, end, dump_section(section, config[section], self.save_format), section, None))
+        if CARD_SECTION not in sections:
+            positions = {uid: index for index, uid in enumerate(self.card_uids)}
+            for uid in self.dirty_cards:
+                index = positions.get(uid)
+                if index is None:
+                    return None
+                begin, end = self.card_spans[index]
+                replacements.append((begin, end, _dump_value(cards[index], self.save_format, 2), None, index))
+        replacements.sort(key=lambda replacement: replacement[0])
+        return replacements
+
+    # 拼接新的字节流，并推算替换后各字段和卡牌的位置
+    def _splice(self, replacements: list):
+        parts, ends, deltas = [], [], []
+        new_sections, new_cards = {}, {}
+        cards_layout = None
+        cursor = delta = 0
+        for begin, end, data, section, extra in replacements:
+            parts.append(self.raw[cursor:begin])
+            parts.append(data)
+            new_span = (begin + delta, begin + delta + len(data))
+            if section is None:
+                new_cards[extra] = new_span
+            else:
+                new_sections[section] = new_span
+                if section == CARD_SECTION:
+                    cards_layout = extra
+            cursor = end
+            delta += len(data) - (end - begin)
+            ends.append(end)
+            deltas.append(delta)
+        parts.append(self.raw[cursor:])
+
+        # 未替换的字段按其之前所有替换累计的长度变化平移，包含被替换卡牌的cards字段结尾也随之平移
+        def shift(span: Tuple[int, int]) -> Tuple[int, int]:
+            return tuple(offset + (deltas[index - 1] if index else 0)
+                         for offset, index in ((offset, bisect_right(ends, offset)) for offset in span))
+
+        spans = {key: new_sections.get(key) or shift(span) for key, span in self.spans.items()}
+        if cards_layout is not None:
+            card_offsets, card_uids = cards_layout
+            cards_begin = new_sections[CARD_SECTION][0]
+            card_spans = [(cards_begin + begin, cards_begin + end) for begin, end in card_offsets]
+        else:
+            # 卡牌区间按顺序排列且互不包含，顺序合并一遍即可，避免逐个二分查找
+            card_spans = []
+            next_replacement = offset = 0
+            for index, (begin, end) in enumerate(self.card_spans):
+                new_span = new_cards.get(index)
+                if new_span is not None:
+                    card_spans.append(new_span)
+                    continue
+                while next_replacement < len(ends) and ends[next_replacement] <= begin:
+                    offset = deltas[next_replacement]
+                    next_replacement += 1
+                card_spans.append((begin + offset, end + offset) if offset else (begin, end))
+            card_uids = self.card_uids
+        return b''.join(parts), (list(self.keys), spans, card_spans, card_uids)
@@ -0,0 +1,149 @@
+import re
+import sys
+import time
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+# 存档的saveTime使用.NET的往返格式，如 2025-05-01T12:34:56.1234567+08:00，小数秒为7位（100纳秒）
+_FRACTION_PATTERN = re.compile(r'\.(\d{1,7})')
+_ZONE_PATTERN = re.compile(r'[+-]\d{2}:\d{2}')
+# 100纳秒为单位的小数秒位数
+TICK_DIGITS = 7
+# 解析结果缓存的条目数，存档位列表每次刷新都会格式化同一批时间
+SAVE_TIME_CACHE_SIZE = 1024
+
+
+# 解析后的存档时间
+# dt为精确到微秒的datetime（没有时区时为naive）；tick为datetime放不下的第7位小数；
+# fraction_digits为原字符串的小数位数，utc_z表示时区写作Z，二者用于原样写回
+class SaveTime(NamedTuple):
+    dt: datetime
+    tick: int = 0
+    fraction_digits: int = TICK_DIGITS
+    utc_z: bool = False
+
+    # 小数秒，单位100纳秒
+    @property
+    def ticks(self) -> int:
+        return self.dt.microsecond * 10 + self.tick
+
+    # 从datetime生成存档时间，按游戏的格式写7位小数
+    @classmethod
+    def from_datetime(cls, dt: datetime) -> 'SaveTime':
+        return cls(dt)
+
+    # 界面显示的格式，如 2025/5/1 12:34:56
+    def display(self) -> str:
+        dt = self.dt
+        return f"{dt.year}/{dt.month}/{dt.day} {dt.hour:02d}:{dt.minute:02d}:{dt.second:02d}"
+
+
+# 解析saveTime字符串，格式不符时抛出ValueError；结果不可变，按字符串缓存
+# 小数位和时区先在这里拆出来，日期时间部分交给datetime.fromisoformat（C实现）解析和校验
+@lru_cache(maxsize=SAVE_TIME_CACHE_SIZE)
+def parse_save_time(text: str) -> SaveTime:
+    if len(text) < 19 or text[10] != 'T':
+        raise ValueError(f"无法识别的保存时间: {text!r}")
+    ticks = digits = 0
+    zone_start = 19
+    fraction = _FRACTION_PATTERN.match(text, 19)
+    if fraction is not None:
+        digits = fraction.end() - 20
+        ticks = int(fraction.group(1)) * 10 ** (TICK_DIGITS - digits)
+        zone_start = fraction.end()
+    zone = text[zone_start:]
+    utc_z = zone == 'Z'
+    if utc_z:
+        zone = '+00:00'
+    elif zone and not _ZONE_PATTERN.fullmatch(zone):
+        raise ValueError(f"无法识别的保存时间: {text!r}")
+    microsecond, tick = divmod(ticks, 10)
+    dt = datetime.fromisoformat(f"{text[:19]}.{microsecond:06d}{zone}")
+    return SaveTime(dt, tick, digits, utc_z)
+
+
+# 格式化为saveTime字符串，解析得到的值原样还原
+def format_save_time(value: SaveTime) -> str:
+    dt = value.dt
+    text = (f"{dt.year:04d}-{dt.month:02d}-{dt.day:02d}"
+            f"T{dt.hour:02d}:{dt.minute:02d}:{dt.second:02d}")
+    if value.fraction_digits:
+        text += '.' + f"{value.ticks:07d}"[:value.fraction_digits]
+    offset = dt.utcoffset()
+    if value.utc_z:
+        text += 'Z'
+    elif offset is not None:
+        minutes = int(offset.total_seconds()) // 60
+        sign = '-' if minutes < 0 else '+'
+        hours, minutes = divmod(abs(minutes), 60)
+        text += f"{sign}{hours:02d}:{minutes:02d}"
+    return text
+
+
+# 解析为datetime，供需要时间运算的地方使用
+# 第7位小数按之前dateutil解析方式的round()舍入到微秒（恰好为5时取偶数），进位到下一秒时正常进位
+def save_time_to_datetime(text: str) -> datetime:
+    value = parse_save_time(text)
+    if value.tick > 5 or (value.tick == 5 and value.dt.microsecond % 2):
+        return value.dt + timedelta(microseconds=1)
+    return value.dt
+
+
+# 界面显示用的时间，无法解析时返回原值
+@lru_cache(maxsize=SAVE_TIME_CACHE_SIZE)
+def format_display_time(text) -> str:
+    try:
+        return parse_save_time(text).display()
+    except (TypeError, ValueError) as e:
+        print(f"时间格式转换失败: {str(e)}")
+        return text
+
+
+# 对比之前的解析方式（手工截断小数位后交给dateutil或datetime.fromisoformat）和新解析器的耗时
+def benchmark_save_time(count: int = 20000) -> str:
+    from dateutil import parser
+
+    def legacy_convert(iso_str: str) -> datetime:
+        date_part, time_part = iso_str.split('.', 1)
+        time_part, tz_part = time_part.split('+', 1) if '+' in time_part else (
+            time_part.split('-', 1) if '-' in time_part else (time_part, ''))
+        microseconds = time_part[:7].ljust(7, '0')[:7]
+        rounded = str(round(int(microseconds) / 10)).zfill(6)
+        return parser.isoparse(f"{date_part}.{rounded[:6]}+{tz_part}")
+
+    def legacy_display(iso_str: str) -> str:
+        main_part, fractional = iso_str.split('.', 1)
+        dt = datetime.fromisoformat(f"{main_part}.{fractional[:6]}".replace('Z', '+00:00'))
+        return "{}/{:d}/{:d} {:02d}:{:02d}:{:02d}".format(dt.year, dt.month, dt.day, dt.hour, dt.minute, dt.second)
+
+    # 存档位列表的典型情况：少量不同的时间被反复格式化
+    samples = [f"2025-05-{day:02d}T12:34:56.{day * 1234567 % 10000000:07d}+08:00" for day in range(1, 21)]
+    texts = [samples[i % len(samples)] for i in range(count)]
+
+    def measure(func) -> float:
+        start = time.perf_counter()
+        for text in texts:
+            func(text)
+        return time.perf_counter() - start
+
+    parse_save_time.cache_clear()
+    format_display_time.cache_clear()
+    results = [
+        ("dateutil解析", measure(legacy_convert)),
+        ("新解析器", measure(save_time_to_datetime)),
+        ("fromisoformat显示格式", measure(legacy_display)),
+        ("新显示格式", measure(format_display_time)),
+    ]
+    parse_save_time.cache_clear()
+    uncached = measure(parse_save_time.__wrapped__)
+    results.append(("新解析器（不使用缓存）", uncached))
+    round_trip = all(format_save_time(parse_save_time(text)) == text for text in samples)
+    lines = [f"{name}: {elapsed * 1000:.1f}ms（{elapsed / count * 1e6:.2f}us/次）" for name, elapsed in results]
+    lines.append(f"往返一致: {round_trip}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    # 用法：python -m manager.saveTime [次数]
+    print(benchmark_save_time(int(sys.argv[1]) if len(sys.argv) > 1 else 20000))
@@ -0,0 +1,166 @@
+import os
+import sys
+from typing import Any, Dict, List, Optional
+
+# 问题级别
+LEVEL_ERROR = 'error'
+LEVEL_WARNING = 'warning'
+LEVEL_NAMES = {LEVEL_ERROR: "错误", LEVEL_WARNING: "警告"}
+
+
+# 生成一条检查结果
+# section: 所在字段  index: 列表中的序号  uid: 卡牌或仪式的uid（用于跳转到表格行）
+def _issue(level: str, section: str, message: str, index: Optional[int] = None, uid=None) -> Dict[str, Any]:
+    return {"level": level, "section": section, "index": index, "uid": uid, "message": message}
+
+
+# 装备和仪式卡槽中引用卡牌的写法可能是uid本身，也可能是带uid的字典
+def _ref_uid(ref):
+    return ref.get('uid') if isinstance(ref, dict) else ref
+
+
+# 建立uid -> 序号索引，同时记录重复的uid
+def _index_uids(section: str, items: list, issues: List[Dict[str, Any]]) -> Dict[Any, int]:
+    index = {}
+    for position, item in enumerate(items):
+        if not isinstance(item, dict):
+            issues.append(_issue(LEVEL_ERROR, section, "元素不是对象", position))
+            continue
+        uid = item.get('uid')
+        if uid is None:
+            issues.append(_issue(LEVEL_ERROR, section, "缺少uid", position))
+        elif uid in index:
+            issues.append(_issue(LEVEL_ERROR, section, f"uid {uid} 与第{index[uid] + 1}个元素重复", position, uid))
+        else:
+            index[uid] = position
+    return index
+
+
+# uid指针必须大于已有的最大uid，否则新增的卡牌或仪式会与已有的uid重复
+def _check_uid_pointer(config: Dict[str, Any], key: str, section: str, uid_index: Dict[Any, int],
+                       issues: List[Dict[str, Any]]):
+    pointer = config.get(key)
+    numeric_uids = [uid for uid in uid_index if isinstance(uid, int)]
+    if pointer is None or not numeric_uids:
+        return
+    max_uid = max(numeric_uids)
+    if not isinstance(pointer, int) or pointer <= max_uid:
+        issues.append(_issue(LEVEL_ERROR, key, f"{key}为{pointer}，不大于{section}中的最大uid {max_uid}，"
+                                               f"新增时会产生重复uid", uid=max_uid))
+
+
+# 检查存档的引用完整性，返回问题列表
+# 先建立一次卡牌和仪式的uid索引，然后各线性扫描一遍：重复uid、uid指针、未知的卡牌/仪式id、
+# 装备和仪式卡槽中不存在的uid、苏丹卡与苏丹卡池是否一致；card_mgr和rite_mgr为None时跳过id检查
+def validate_save(config: Dict[str, Any], card_mgr=None, rite_mgr=None) -> List[Dict[str, Any]]:
+    issues: List[Dict[str, Any]] = []
+    cards = config.get('cards') or []
+    rites = config.get('rites') or []
+    pool = config.get('sudan_pool_cards')
+    card_index = _index_uids('cards', cards, issues)
+    rite_index = _index_uids('rites', rites, issues)
+    _check_uid_pointer(config, 'card_uid_index', 'cards', card_index, issues)
+    _check_uid_pointer(config, 'rite_uid_index', 'rites', rite_index, issues)
+    known_cards = card_mgr.card_data_mapping if card_mgr is not None else None
+    known_rites = rite_mgr.metadata_index if rite_mgr is not None else None
+
+    pool_owners: Dict[Any, Any] = {}  # 苏丹卡池序号 -> 占用该序号的卡牌uid
+    for position, card in enumerate(cards):
+        if not isinstance(card, dict):
+            continue
+        uid = card.get('uid')
+        card_id = card.get('id')
+        if known_cards is not None and card_id not in known_cards:
+            issues.append(_issue(LEVEL_ERROR, 'cards', f"未知的卡牌id {card_id}", position, uid))
+
+        tag = card.get('tag')
+        if not isinstance(tag, dict):
+            issues.append(_issue(LEVEL_ERROR, 'cards', f"标签不是字典格式：{tag!r}", position, uid))
+            tag = {}
+
+        equips = card.get('equips') or []
+        if not isinstance(equips, list):
+            issues.append(_issue(LEVEL_ERROR, 'cards', "装备不是列表格式", position, uid))
+            equips = []
+        for ref in equips:
+            equip_uid = _ref_uid(ref)
+            if equip_uid not in card_index:
+                issues.append(_issue(LEVEL_ERROR, 'cards', f"装备引用了不存在的卡牌uid {equip_uid}", position, uid))
+            elif equip_uid == uid:
+                issues.append(_issue(LEVEL_WARNING, 'cards', "装备引用了卡牌自身", position, uid))
+
+        # 有卡牌数据时按类型判断苏丹卡，否则按是否带有苏丹卡池序号判断
+        if known_cards is not None:
+            is_sudan = card_mgr.is_sudan_card(card_id)
+        else:
+            is_sudan = 'sudan_pool_index' in tag
+        if not is_sudan:
+            continue
+        pool_index = tag.get('sudan_pool_index')
+        if not isinstance(pool, list):
+            issues.append(_issue(LEVEL_ERROR, 'cards', "存在苏丹卡但存档中没有苏丹卡池", position, uid))
+        elif not isinstance(pool_index, int) or not 1 <= pool_index <= len(pool):
+            issues.append(_issue(LEVEL_ERROR, 'cards', f"苏丹卡池序号{pool_index!r}超出卡池范围1~{len(pool)}，"
+                                                       f"删除该卡时会移除错误的卡池条目", position, uid))
+        else:
+            if pool_index in pool_owners:
+                issues.append(_issue(LEVEL_ERROR, 'cards', f"苏丹卡池序号{pool_index}与uid {pool_owners[pool_index]} 重复",
+                                     position, uid))
+            else:
+                pool_owners[pool_index] = uid
+            if pool[pool_index - 1] != card_id:
+                issues.append(_issue(LEVEL_WARNING, 'cards', f"苏丹卡池第{pool_index}项为{pool[pool_index - 1]}，"
+                                                             f"与卡牌id {card_id} 不一致", position, uid))
+
+    for position, rite in enumerate(rites):
+        if not isinstance(rite, dict):
+            continue
+        uid = rite.get('uid')
+        rite_id = rite.get('id')
+        if known_rites is not None and str(rite_id) not in known_rites:
+            issues.append(_issue(LEVEL_ERROR, 'rites', f"未知的仪式id {rite_id}", position, uid))
+        for slot, ref in enumerate(rite.get('cards') or []):
+            if ref is None:
+                continue
+            card_uid = _ref_uid(ref)
+            card_position = card_index.get(card_uid)
+            if card_position is None:
+                issues.append(_issue(LEVEL_ERROR, 'rites', f"卡槽{slot}引用了不存在的卡牌uid {card_uid}", position, uid))
+            elif isinstance(ref, dict) and 'id' in ref and cards[card_position].get('id') != ref['id']:
+                issues.append(_issue(LEVEL_WARNING, 'rites', f"卡槽{slot}记录的卡牌id {ref['id']} "
+                                                             f"与uid {card_uid} 的卡牌id不一致", position, uid))
+    return issues
+
+
+# 问题所在位置的描述，如 cards[12] uid 13
+def format_location(issue: Dict[str, Any]) -> str:
+    location = issue["section"]
+    if issue["index"] is not None:
+        location += f"[{issue['index']}]"
+    if issue["uid"] is not None:
+        location += f" uid {issue['uid']}"
+    return location
+
+
+# 格式化一条检查结果
+def format_issue(issue: Dict[str, Any]) -> str:
+    return f"[{LEVEL_NAMES[issue['level']]}] {format_location(issue)}: {issue['message']}"
+
+
+if __name__ == "__main__":
+    # 用法：python -m manager.saveValidator <存档文件> [游戏config目录]，提供config目录时同时检查卡牌和仪式id
+    from manager.saveFileManager import load_save_file
+
+    save_config = load_save_file(sys.argv[1])
+    card_manager = rite_manager = None
+    if len(sys.argv) > 2:
+        from manager.cardDataManager import CardDataManager
+        from manager.riteDataManager import RiteDataManager
+        card_manager = CardDataManager(os.path.join(sys.argv[2], "cards.json"))
+        rite_manager = RiteDataManager(os.path.join(sys.argv[2], "rite"))
+    results = validate_save(save_config, card_manager, rite_manager)
+    for result in results:
+        print(format_issue(result))
+    error_count = sum(1 for result in results if result["level"] == LEVEL_ERROR)
+    print(f"共{len(results)}个问题，其中错误{error_count}个")
+    sys.exit(1 if error_count else 0)
@@ -0,0 +1,227 @@
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from manager.jsonLoader import dumps_json_bytes, loads_json_bytes
+from manager.saveFileManager import write_bytes_atomic
+
+# 存储结构版本，结构变化时递增
+SLOT_STORE_VERSION = 2
+# 按元素拆分成独立数据块的列表字段
+SLOT_LIST_SECTIONS = ('cards', 'rites')
+# 数据块的zlib压缩等级
+SLOT_COMPRESS_LEVEL = 6
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta(key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS chunks(hash TEXT PRIMARY KEY, data BLOB NOT NULL, size INTEGER NOT NULL,
+                                  refs INTEGER NOT NULL DEFAULT 0);
+CREATE TABLE IF NOT EXISTS manifests(slot INTEGER PRIMARY KEY, manifest BLOB NOT NULL, saved_at REAL NOT NULL);
+"""
+
+
+def _chunk_hash(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+# 清单中的哈希大多在各存档位之间重复，压缩后保存
+def _pack_manifest(manifest: Dict[str, Any]) -> bytes:
+    return zlib.compress(dumps_json_bytes(manifest), SLOT_COMPRESS_LEVEL)
+
+
+def _unpack_manifest(data: bytes) -> Dict[str, Any]:
+    return json.loads(zlib.decompress(data))
+
+
+# 清单引用的数据块，同一清单中重复的数据块只计一次引用
+def _manifest_hashes(manifest: Optional[Dict[str, Any]]) -> Set[str]:
+    if manifest is None:
+        return set()
+    hashes = set(manifest["sections"].values())
+    for list_hashes in manifest["lists"].values():
+        hashes.update(list_hashes)
+    return hashes
+
+
+# 存档位的去重压缩存储
+# 每个存档位拆成数据块：普通顶层字段各一块，cards和rites每个元素一块，按内容哈希寻址并zlib压缩后存入SQLite，
+# 不同存档位（以及同一存档位的多次覆盖）之间相同的数据块只保存一份；每个存档位保存一份清单（字段顺序和各块哈希），
+# 导出时按清单拼接成游戏使用的JSON。每个数据块记录引用它的清单数，清单替换或删除时增减，引用数为0的数据块随即删除。
+# 游戏读取的user_archive.json和NNN.json是存档位的权威版本：存储只保存其中列出的存档位，
+# 被清空的存档位从存储中删除，不会再被导出
+class SlotStore:
+    def __init__(self, archive_dir: str, db_path: Optional[str] = None):
+        self.archive_dir = archive_dir
+        self.db_path = db_path or os.path.join(archive_dir, "slot_store.sqlite3")
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.executescript(_SCHEMA)
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if row is None or int(row[0]) != SLOT_STORE_VERSION:
+            # 结构不同的旧存储直接重建，存档位以游戏读取的JSON文件为准，之后保存时重新写入
+            self.conn.executescript("DROP TABLE IF EXISTS chunks; DROP TABLE IF EXISTS manifests;")
+            self.conn.executescript(_SCHEMA)
+            self.conn.execute("INSERT OR REPLACE INTO meta(key, value) VALUES('version', ?)", (str(SLOT_STORE_VERSION),))
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    # 游戏读取的存档位文件路径
+    def slot_path(self, slot: int) -> str:
+        return os.path.join(self.archive_dir, f"{slot:03d}.json")
+
+    # 拆分存档并写入数据块，返回清单
+    def _store_chunks(self, config: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, int]]:
+        chunks: Dict[str, bytes] = {}
+
+        def add(value) -> str:
+            data = dumps_json_bytes(value)
+            chunk_hash = _chunk_hash(data)
+            chunks.setdefault(chunk_hash, data)
+            return chunk_hash
+
+        manifest = {"keys": list(config), "sections": {}, "lists": {}}
+        for key, value in config.items():
+            if key in SLOT_LIST_SECTIONS and isinstance(value, list):
+                manifest["lists"][key] = [add(item) for item in value]
+            else:
+                manifest["sections"][key] = add(value)
+
+        # 只压缩和写入库中还没有的数据块
+        existing = set()
+        hashes = list(chunks)
+        for start in range(0, len(hashes), 500):
+            batch = hashes[start:start + 500]
+            existing.update(row[0] for row in self.conn.execute(
+                f"SELECT hash FROM chunks WHERE hash IN ({','.join('?' * len(batch))})", batch))
+        new_chunks = [(chunk_hash, zlib.compress(data, SLOT_COMPRESS_LEVEL), len(data))
+                      for chunk_hash, data in chunks.items() if chunk_hash not in existing]
+        self.conn.executemany("INSERT OR IGNORE INTO chunks(hash, data, size) VALUES(?, ?, ?)", new_chunks)
+        stats = {
+            "chunks": len(chunks),
+            "new_chunks": len(new_chunks),
+            "new_bytes": sum(len(data) for _, data, _ in new_chunks),
+        }
+        return manifest, stats
+
+    # 保存存档位并导出游戏使用的JSON文件，返回统计信息
+    def save_slot(self, slot: int, config: Dict[str, Any], compact: bool = False) -> Dict[str, Any]:
+        start = time.perf_counter()
+        with self.conn:
+            old_hashes = _manifest_hashes(self.get_manifest(slot))
+            manifest, stats = self._store_chunks(config)
+            self.conn.execute("INSERT OR REPLACE INTO manifests(slot, manifest, saved_at) VALUES(?, ?, ?)",
+                              (slot, _pack_manifest(manifest), time.time()))
+            stats["removed_chunks"] = self._update_refs(_manifest_hashes(manifest), old_hashes)
+        stats["exported_bytes"] = self.export_slot(slot, compact=compact)
+        stats["elapsed"] = time.perf_counter() - start
+        print(f"保存存档位 {slot + 1}: 数据块{stats['chunks']}个，新增{stats['new_chunks']}个"
+              f"（压缩后{stats['new_bytes']}字节），清理{stats['removed_chunks']}个，"
+              f"耗时 {stats['elapsed'] * 1000:.1f}ms")
+        return stats
+
+    def get_manifest(self, slot: int) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute("SELECT manifest FROM manifests WHERE slot = ?", (slot,)).fetchone()
+        return _unpack_manifest(row[0]) if row else None
+
+    def list_slots(self) -> List[int]:
+        return [row[0] for row in self.conn.execute("SELECT slot FROM manifests ORDER BY slot")]
+
+    # 删除存档位清单，不再被引用的数据块随之删除
+    def delete_slot(self, slot: int):
+        with self.conn:
+            old_hashes = _manifest_hashes(self.get_manifest(slot))
+            self.conn.execute("DELETE FROM manifests WHERE slot = ?", (slot,))
+            self._update_refs(set(), old_hashes)
+
+    # 删除存档位列表中已清空的存档位，返回删除的存档位
+    def prune_slots(self, listed: Iterable[int]) -> List[int]:
+        listed = set(listed)
+        removed = [slot for slot in self.list_slots() if slot not in listed]
+        for slot in removed:
+            self.delete_slot(slot)
+        return removed
+
+    # 清单替换后调整数据块的引用数：新清单新增的引用加1，旧清单去掉的引用减1，返回删除的数据块数量
+    def _update_refs(self, new_hashes: Set[str], old_hashes: Set[str]) -> int:
+        self.conn.executemany("UPDATE chunks SET refs = refs + 1 WHERE hash = ?",
+                              ((chunk_hash,) for chunk_hash in new_hashes - old_hashes))
+        released = [(chunk_hash,) for chunk_hash in old_hashes - new_hashes]
+        self.conn.executemany("UPDATE chunks SET refs = refs - 1 WHERE hash = ?", released)
+        if not released:
+            return 0
+        return self.conn.execute("DELETE FROM chunks WHERE refs <= 0").rowcount
+
+    # 读取并解压数据块
+    def _load_chunks(self, hashes) -> Dict[str, bytes]:
+        hashes = list(set(hashes))
+        chunks = {}
+        for start in range(0, len(hashes), 500):
+            batch = hashes[start:start + 500]
+            for chunk_hash, data in self.conn.execute(
+                    f"SELECT hash, data FROM chunks WHERE hash IN ({','.join('?' * len(batch))})", batch):
+                chunks[chunk_hash] = zlib.decompress(data)
+        missing = set(hashes) - set(chunks)
+        if missing:
+            raise ValueError(f"存档位数据块缺失：{len(missing)}个")
+        return chunks
+
+    # 按清单拼接出紧凑格式的存档JSON字节串，数据块本身就是JSON片段，无需解析
+    def build_slot_bytes(self, slot: int) -> bytes:
+        manifest = self.get_manifest(slot)
+        if manifest is None:
+            raise KeyError(f"存档位 {slot + 1} 不在存储中")
+        hashes = list(manifest["sections"].values())
+        for list_hashes in manifest["lists"].values():
+            hashes.extend(list_hashes)
+        chunks = self._load_chunks(hashes)
+        parts = []
+        for key in manifest["keys"]:
+            if key in manifest["lists"]:
+                value = b'[' + b','.join(chunks[chunk_hash] for chunk_hash in manifest["lists"][key]) + b']'
+            else:
+                value = chunks[manifest["sections"][key]]
+            parts.append(dumps_json_bytes(key) + b':' + value)
+        return b'{' + b','.join(parts) + b'}'
+
+    # 读取存档位内容
+    def load_slot(self, slot: int) -> Dict[str, Any]:
+        config, _ = loads_json_bytes(self.build_slot_bytes(slot))
+        return config
+
+    # 导出存档位为游戏使用的JSON文件，返回写入的字节数
+    def export_slot(self, slot: int, path: Optional[str] = None, compact: bool = False) -> int:
+        data = self.build_slot_bytes(slot)
+        if not compact:
+            data = dumps_json_bytes(loads_json_bytes(data)[0], pretty=True)
+        write_bytes_atomic(path or self.slot_path(slot), data)
+        return len(data)
+
+    # 重新导出存档位列表中仍然列出、存储中有清单但JSON文件已丢失的存档位，返回导出的存档位
+    def restore_missing_exports(self, listed: Iterable[int], compact: bool = False) -> List[int]:
+        listed = set(listed)
+        restored = []
+        for slot in self.list_slots():
+            if slot in listed and not os.path.exists(self.slot_path(slot)):
+                self.export_slot(slot, compact=compact)
+                restored.append(slot)
+        return restored
+
+    # 存储占用统计：数据块数量、原始字节数、压缩后字节数
+    def get_usage(self) -> Dict[str, int]:
+        count, raw_size, stored_size = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(LENGTH(data)), 0) FROM chunks").fetchone()
+        return {"chunks": count, "raw_bytes": raw_size, "stored_bytes": stored_size}
+
+
+if __name__ == "__main__":
+    # 用法：python -m manager.slotStore <USERARCHIVE目录>，显示存储占用
+    store = SlotStore(sys.argv[1])
+    print(f"存档位：{[slot + 1 for slot in store.list_slots()]}")
+    print(store.get_usage())
+    store.close()
@@ -1,19 +1,16 @@
 import os
 
-import json5
 import json
-from typing import Dict
+from typing import Dict, List, Optional, Union
 import sys
 from functools import partial
-from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-                             QTableWidget, QTableWidgetItem, QLineEdit, QPushButton,
-                             QLabel, QMessageBox, QTextEdit, QFileDialog, QDialog, QProgressDialog)
-from PyQt6.QtCore import Qt
+
+from manager.jsonLoader import load_json_file
 
 
 # 标签元数据管理器
 class TagDataManager:
-    # 初始化对象，包括定义未知标签信息、加载标签数据、定义标签名和标签数据的映射
+    # 初始化对象，定义未知标签信息，标签数据和索引在第一次查询时才加载
     def __init__(self, tag_db_path: str):
         self.unknown_tag = {
             "id": -1,
@@ -33,14 +30,17 @@ class TagDataManager:
             "tag_rank": -1,
             "attributes": {}
         }
-        self.tag_db = self._load_tag_db(tag_db_path)
-        self.tag_data_mapping = self._build_tag_data_mapping()
+        self.tag_db_path = tag_db_path
+        self._tag_db: Optional[Dict] = None
+        # 标签索引：#键: 标签code/中文名/数字id  值: 标签数据
+        self._by_code: Dict[str, dict] = {}
+        self._by_name: Dict[str, dict] = {}
+        self._by_id: Dict[int, dict] = {}
 
     # 加载标签数据
     def _load_tag_db(self, path: str) -> Dict:
         try:
-            with open(path, 'r', encoding='utf-8') as tag_db_path:
-                return json5.load(tag_db_path)
+            return load_json_file(path)
         except FileNotFoundError:
             print(f"标签数据库文件 {path} 未找到")
             return {}
@@ -48,14 +48,79 @@ class TagDataManager:
             print(f"加载标签数据库时发生错误: {e}")
             return {}
 
-    # 创建名字到标签数据的映射
-    # TODO 现在是根据标签的code映射标签信息，但是实际存档文件中的标签是中文名，还没适配
-    def _build_tag_data_mapping(self) -> Dict[str, dict]:
-        return {
-            code: data
-            for code, data in self.tag_db.items()
-        }
+    # 加载标签数据并建立code、中文名、数字id三个索引，只在第一次使用时执行
+    def _ensure_index(self):
+        if self._tag_db is not None:
+            return
+        self._tag_db = self._load_tag_db(self.tag_db_path)
+        for code, data in self._tag_db.items():
+            if not isinstance(data, dict):
+                continue
+            self._by_code[code] = data
+            if data.get('code'):
+                self._by_code.setdefault(data['code'], data)
+            if data.get('name'):
+                self._by_name.setdefault(data['name'], data)
+            try:
+                self._by_id.setdefault(int(data.get('id', code)), data)
+            except (TypeError, ValueError):
+                pass
+
+    # 立即加载标签数据和索引；在后台线程中调用，界面第一次查询时就不再读取文件，不调用时在第一次查询时加载
+    def load(self) -> 'TagDataManager':
+        self._ensure_index()
+        return self
+
+    # 原始标签数据
+    @property
+    def tag_db(self) -> Dict:
+        self._ensure_index()
+        return self._tag_db
+
+    # 标签code到标签数据的映射
+    @property
+    def tag_data_mapping(self) -> Dict[str, dict]:
+        self._ensure_index()
+        return self._by_code
+
+    # 根据标签code、中文名或数字id获取标签信息，存档中的标签可能使用code也可能使用中文名
+    def get_tag_data(self, tag_key: Union[str, int]) -> dict:
+        tag = self.find_tag(tag_key)
+        return tag if tag is not None else self.unknown_tag
+
+    # 查找标签，不存在时返回None
+    def find_tag(self, tag_key: Union[str, int]) -> Optional[dict]:
+        self._ensure_index()
+        if isinstance(tag_key, int):
+            return self._by_id.get(tag_key)
+        tag = self._by_code.get(tag_key)
+        if tag is None:
+            tag = self._by_name.get(tag_key)
+        if tag is None and isinstance(tag_key, str) and tag_key.isdigit():
+            tag = self._by_id.get(int(tag_key))
+        return tag
+
+    def get_tag_by_code(self, code: str) -> dict:
+        self._ensure_index()
+        return self._by_code.get(code, self.unknown_tag)
+
+    def get_tag_by_name(self, name: str) -> dict:
+        self._ensure_index()
+        return self._by_name.get(name, self.unknown_tag)
+
+    def get_tag_by_id(self, tag_id: int) -> dict:
+        self._ensure_index()
+        return self._by_id.get(tag_id, self.unknown_tag)
+
+    # 所有标签类型，用于界面筛选
+    def get_tag_types(self) -> List[str]:
+        self._ensure_index()
+        return sorted({data.get('type', '') for data in self._by_code.values() if data.get('type')})
 
-    # 根据标签名字获取标签信息
-    def get_tag_data(self, tag_name: str) -> dict:
-        return self.tag_data_mapping.get(tag_name, self.unknown_tag)
\ No newline at end of file
+    # 格式化标签的元数据，用于界面提示
+    def describe_tag(self, tag_key: Union[str, int], value=None) -> str:
+        tag = self.find_tag(tag_key)
+        if tag is None:
+            return f"{tag_key}：{value}（未知标签）"
+        return (f"{tag.get('name', '')}({tag.get('code', '')})：{value}  "
+                f"类型：{tag.get('type', '')}  可添加：{tag.get('can_add', -1)}  等级：{tag.get('tag_rank', -1)}")
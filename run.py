@@ -1,371 +1,460 @@
 import json
-import json5
+import re
+import sys
+import time
+from collections.abc import MutableMapping
+from functools import partial
+
 from datetime import datetime
-from typing import Any, List, Dict, Optional
+from typing import Any, List, Dict, Generic, Iterator, Optional, Tuple, TypeVar
 
-from datetime import datetime, timedelta, timezone
-from dateutil import parser  # 需要安装python-dateutil包
-from ijson import items
+from manager.cardRecord import deep_sizeof
+from manager.jsonLoader import dumps_json_bytes, loads_json_bytes
+from manager.saveFileManager import load_save_file, write_bytes_atomic, write_save_file
+from manager.saveSectionWriter import detect_save_format, dump_section
+from manager.saveTime import save_time_to_datetime
 
 
 def convert_datetime(iso_str: str) -> datetime:
-    """增强型日期转换函数"""
-    # 预处理微秒位数
-    if '.' in iso_str:
-        date_part, time_part = iso_str.split('.', 1)
-        time_part, tz_part = time_part.split('+', 1) if '+' in time_part else (
-            time_part.split('-', 1) if '-' in time_part else (time_part, '')
-        )
-
-        # 处理7位微秒（保留6位，第7位四舍五入）
-        microseconds = time_part[:7].ljust(7, '0')[:7]
-        rounded = str(round(int(microseconds) / 10)).zfill(6)
-        iso_str = f"{date_part}.{rounded[:6]}+{tz_part}"
-
-    # 使用dateutil的宽松解析器
-    return parser.isoparse(iso_str)
-
-class Card:
-    """卡牌对象的封装"""
+    """日期转换函数，7位小数秒和时区由存档时间解析器处理，结果按字符串缓存"""
+    return save_time_to_datetime(iso_str)
 
-    def __init__(self, data: Dict[str, Any]):
-        self.uid = data['uid']
-        self.id = data['id']
-        self.count = data['count']  # 卡牌数量
-        self.life = data['life']  # 卡牌在游戏中已存在的回合数
-        self.rareup = data['rareup']
-
-        # 容器类型
-        self.tag = data['tag']
-        self.equip_slots = data['equip_slots']
-        self.equips = data['equips']
-
-        # 背包配置
-        self.bag = data['bag']  # 该卡牌在背包中的第几行
-        self.bagpos = data['bagpos']  # 该卡牌在背包中的位置
-
-        # 自定义内容
-        self.custom_name = data['custom_name']
-        self.custom_text = data['custom_text']
-
-    def to_dict(self):
-        return {
-            "uid": self.uid,
-            "id": self.id,
-            "count": self.count,
-            "life": self.life,
-            "rareup": self.rareup,
-            "tag": self.tag,
-            "equip_slots": self.equip_slots,
-            "equips": self.equips,
-            "bag": self.bag,
-            "bagpos": self.bagpos,
-            "custom_name": self.custom_name,
-            "custom_text": self.custom_text
-        }
-
-
-class Rite:
-    """仪式对象的封装"""
 
-    def __init__(self, data: Dict[str, Any]):
+# 缺失字段的占位对象
+_MISSING = object()
+# 字段顺序表，字段顺序相同的记录共用同一个元组
+_KEY_ORDERS: Dict[tuple, tuple] = {}
 
-        # 保留原始数据
-        self.raw_data = data
-
-        # 基础标识字段
-        self.uid = data['uid']
-        self.id = data['id']  # 避免与内置id冲突
-
-        # 布尔状态字段
-        self.new_born = data.get('new_born', False)
-        self.is_show = data.get('is_show', True)
-        self.start = data.get('start', False)
-
-        # 数值型配置
-        self.start_round = data.get('start_round', 0)
-        self.start_life = data.get('start_life', 0)
-        self.life = data.get('life', 0)
-
-        # 嵌套卡片引用（处理null值）
-        self.related_cards = [
-            Card(card_data) if card_data else None
-            for card_data in data.get('cards', [])
-        ]
-
-        # 自定义内容
-        self.custom_name = data.get('custom_name', '')
-
-    def to_dict(self):
-        return {
-            "uid": self.uid,
-            "id": self.id,
-            "new_born": self.new_born,
-            "is_show": self.is_show,
-            "start": self.start,
-            "start_round": self.start_round,
-            "start_life": self.start_life,
-            "life": self.life,
-            "cards": self.related_cards,
-            "custom_name": self.custom_name
-        }
-
-class NoteItem:
-    """笔记项数据结构"""
-    def __init__(self,
-                 type: int,
-                 id: int,
-                 uid: int,
-                 count: int):
-        self.type = type       # 类型标识
-        self.id = id           # 关联ID
-        self.uid = uid         # 唯一标识
-        self.count = count     # 计数
+
+class SlottedRecord:
+    """
+    使用__slots__保存已知字段的存档记录基类
+    存档中的uid、id、count等字段名都是合法的Python标识符，槽位直接使用JSON字段名；
+    已知字段（FIELDS）保存在槽位中，未知字段保存在_extra字典中，并记录原始的字段顺序，
+    to_dict()按原顺序还原，读入后原样写出时与原始数据完全一致
+    """
+    FIELDS: Tuple[str, ...] = ()
+    _FIELD_SET: frozenset = frozenset()
+    __slots__ = ('_keys', '_extra')
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._FIELD_SET = frozenset(cls.FIELDS)
 
     @classmethod
-    def from_dict(cls, data: dict) -> 'NoteItem':
-        return cls(
-            type=data['type'],
-            id=data['id'],
-            uid=data['uid'],
-            count=data['count']
-        )
-
-    def to_dict(self):
-        return {
-            "type": self.type,
-            "id": self.id,
-            "uid": self.uid,
-            "count": self.count
-        }
-
-
-class JSONConfig:
-    """JSON配置的面向对象封装"""
+    def from_dict(cls, data: Dict[str, Any]):
+        record = cls.__new__(cls)
+        extra = None
+        for key, value in data.items():
+            if key in cls._FIELD_SET:
+                setattr(record, key, value)
+            else:
+                if extra is None:
+                    extra = {}
+                extra[key] = value
+        keys = tuple(data)
+        record._keys = _KEY_ORDERS.setdefault(keys, keys)
+        record._extra = extra
+        return record
+
+    def get(self, key: str, default=None):
+        if key in self._FIELD_SET:
+            return getattr(self, key, default)
+        return self._extra.get(key, default) if self._extra else default
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = {}
+        for key in self._keys:
+            value = self.get(key, _MISSING)
+            if value is not _MISSING:
+                result[key] = value
+        # 读入后新增的字段追加在末尾
+        for key in self.FIELDS:
+            if key not in result:
+                value = getattr(self, key, _MISSING)
+                if value is not _MISSING:
+                    result[key] = value
+        if self._extra:
+            for key, value in self._extra.items():
+                result.setdefault(key, value)
+        return result
+
+    def __repr__(self):
+        return f"{type(self).__name__}(uid={self.get('uid')!r}, id={self.get('id')!r})"
+
+
+class Card(SlottedRecord):
+    """卡牌对象的封装"""
+    FIELDS = ('uid', 'id', 'count', 'life', 'rareup', 'tag', 'equip_slots', 'equips',
+              'bag', 'bagpos', 'custom_name', 'custom_text')
+    __slots__ = FIELDS
+
+    uid: int
+    id: int
+    count: int  # 卡牌数量
+    life: int  # 卡牌在游戏中已存在的回合数
+    rareup: int
+    tag: Dict[str, int]
+    equip_slots: List[Any]
+    equips: List[Any]
+    bag: int  # 该卡牌在背包中的第几行
+    bagpos: int  # 该卡牌在背包中的位置
+    custom_name: str
+    custom_text: str
+
+
+class Rite(SlottedRecord):
+    """仪式对象的封装，cards是各卡槽中放入的卡牌引用（{"uid", "id"}或null），原样保留"""
+    FIELDS = ('uid', 'id', 'new_born', 'is_show', 'start', 'start_round', 'start_life', 'life',
+              'cards', 'custom_name')
+    __slots__ = FIELDS
+
+    uid: int
+    id: int
+    new_born: bool
+    is_show: bool
+    start: bool
+    start_round: int
+    start_life: int
+    life: int
+    cards: List[Optional[Dict[str, int]]]
+    custom_name: str
+
+
+class NoteItem(SlottedRecord):
+    """笔记项数据结构"""
+    FIELDS = ('type', 'id', 'uid', 'count')
+    __slots__ = FIELDS
 
-    def __init__(self, data: Dict[str, Any]):
-        # 基础字段
-        self.config_id = data['configId']
-        self.config_version = data['configVersion']
-        self.name = data['name']
-        self.difficulty = data['difficulty']
-        self.round = data['round']  # 回合数
+    type: int  # 类型标识
+    id: int  # 关联ID
+    uid: int  # 唯一标识
+    count: int  # 计数
+
+
+def _records_from_list(record_class, items):
+    """列表中的对象转换为记录，null等其他元素原样保留"""
+    if not isinstance(items, list):
+        return items
+    return [record_class.from_dict(item) if isinstance(item, dict) else item for item in items]
+
+
+def _records_to_list(items):
+    if not isinstance(items, list):
+        return items
+    return [item.to_dict() if isinstance(item, SlottedRecord) else item for item in items]
 
-        # 日期字段转换
-        self.save_time = convert_datetime(data['saveTime'])  # 文件保存时间
 
-        # 索引配置
-        self.card_uid_index = data['card_uid_index']
-        self.rite_uid_index = data['rite_uid_index']
+def _notes_from_list(notes):
+    if not isinstance(notes, list):
+        return notes
+    return [_records_from_list(NoteItem, sublist) for sublist in notes]
 
-        self.sudan_box_show = data['sudan_box_show']
-        self.after_round_auto_sort = data['after_round_auto_sort']
-        self.sudan_card_init_life = data['sudan_card_init_life']
 
-        self.sudan_redraw_count = data['sudan_redraw_count'],
-        self.sudan_redraw_times_per_round = data['sudan_redraw_times_per_round'],
-        self.sudan_redraw_times = data['sudan_redraw_times'],
-        self.sudan_redraw_times_recovery_round = data['sudan_redraw_times_recovery_round']
+def _notes_to_list(notes):
+    if not isinstance(notes, list):
+        return notes
+    return [_records_to_list(sublist) for sublist in notes]
 
-        self.wizard_first_show = data['wizard_first_show']
-        self.success = data['success']
 
-        self.over_reason = data['over_reason']
-        self.ithink_card = data['ithink_card']
+class _LazySection:
+    """尚未解码的字段，保存源字节流中该字段值的原始字节"""
+    __slots__ = ('data',)
 
-        # cards列表，每回合的所有牌都会出现在cards中
-        self.cards = [Card(card_data) for card_data in data['cards']]
+    def __init__(self, data: bytes):
+        self.data = data
 
-        # 转换rites列表
-        self.rites = [Rite(rite_data) for rite_data in data.get('rites', [])]
 
-        # pins字段
-        self.pins = data.get('pins', [])
+_DECODER = json.JSONDecoder()
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+# 只跳过不解码字段值时匹配的记号：字符串整体匹配，以免其中的括号被计入层级
+_SKIP_TOKEN = re.compile(r'"(?:[^"\\]|\\.)*"|[\[\]{}]')
 
-        # sudan_pool_cards字段
-        self.sudan_pool_cards = data.get('sudan_pool_cards', [])
 
-        # sudan_pool字段
-        self.sudan_pool = data.get('sudan_pool', "")
+def _skip_value(text: str, pos: int) -> int:
+    """跳过一个JSON值，不创建对象，返回值之后的位置"""
+    if text[pos:pos + 1] not in ('[', '{'):
+        return _DECODER.raw_decode(text, pos)[1]
+    depth = 0
+    for match in _SKIP_TOKEN.finditer(text, pos):
+        char = match.group()[0]
+        if char in '[{':
+            depth += 1
+        elif char in ']}':
+            depth -= 1
+            if depth == 0:
+                return match.end()
+    raise ValueError(f"存档格式错误：位置{pos}处的字段值没有结束")
 
-        # sudan_card_pool字段
-        self.sudan_card_pool = [Card(pool_data) for pool_data in data.get('sudan_card_pool', [])]
 
-        # sudan_pool_pos字段
-        self.sudan_pool_pos = data.get('sudan_pool_pos', [])
-
-        # sudan_pool_init_count字段
-        self.sudan_pool_init_count = data['sudan_pool_init_count']
-
-        # sudan_card_show_times字段
-        self.sudan_card_show_times = data.get('sudan_card_show_times', {})
-
-        # sudan_remove_count字段
-        self.sudan_remove_count = data.get('sudan_remove_count')
-
-        # 新增计数器系统，其中7000060表示回合数，7000008表示治理家业的时候放入空置宅邸的回合数，每三个回合获得五金币并清零，7100005是灵视，7000559是新月是否升级过的计数器
-        self.counter = data.get('counter', {})  # 类型: Dict[str, int] (格式: {计数器ID: 计数值})
-
-        self.global_counter_cacher = data.get('global_counter_cacher', {})
-
-        # 随机数缓存
-        self.random_cache = data.get('random_cache', {})  # 类型: Dict (具体结构根据业务逻辑定)
-
-        # 唯一卡牌限制列表
-        self.only_cards = data.get('only_cards', [])  # 类型: List[int] (卡牌ID数组)
-
-        # 唯一仪式限制列表
-        self.only_rites = data.get('only_rites', [])  # 类型: List[int] (仪式ID数组)
-
-        # 事件状态字典（事件ID: 是否完成），true则表示事件已经完成，可以再次触发，false表示事件还没有完成，不能再次触发
-        self.event_status = data.get('event_status', {})
-        # 类型: Dict[str, bool] (格式: {"事件ID": 布尔状态})
-
-        # 延迟操作队列
-        self.delay_ops = data.get('delay_ops', [])
-        # 类型: List (具体操作结构需根据业务逻辑定义)
-
-        # 结束仪式数据（仪式ID: 关联数值）
-        self.end_rites = data.get('end_rites', {})
-        # 类型: Dict[str, int] (格式: {"仪式ID": 数值})
-
-        # 生成卡牌记录（卡牌ID: 生成次数）
-        self.gen_cards = data.get('gen_cards', {})
-        # 类型: Dict[str, int] (格式: {"卡牌ID": 生成次数})
-
-        # 生成标签统计（标签名: 数值），统计标签数量
-        self.gen_tags = data.get('gen_tags', {})
-        # 类型: Dict[str, int] 示例: {"physique": 176}
-
-        # 定时回合配置（事件ID: 触发回合）
-        self.timing_rounds = data.get('timing_rounds', {})
-        # 类型: Dict[str, int] 示例: {"530001100": 105}
-
-        # 自动完成仪式列表
-        self.auto_result_rites = data.get('auto_result_rites', [])
-        # 类型: List (具体元素结构需根据业务定义)
-
-        # 嵌套笔记系统（二维结构）
-        self.notes = [
-            [NoteItem.from_dict(item) for item in sublist]
-            for sublist in data.get('notes', [[]])
-        ]  # 类型: List[List[NoteItem]]
-
-        # 一次性新仪式展示状态
-        self.once_new_rites_is_show = data.get('once_new_rites_is_show', {})
-        # 类型: Dict[str, bool] (格式: {"仪式ID": 是否展示})
-
-        # 事件缓存队列
-        self.cached_event = data.get('cached_event', [])
-        # 类型: List (具体元素结构根据业务逻辑定义)
-
-        # 背包索引标识
-        self.BagIndex = data.get('BagIndex', 0)
-        # 类型: int (默认值0)
-
-        # 上回合仪式数据（嵌套字典结构）
-        self.last_round_rite_data = data.get('last_round_rite_data', {})
-        # 类型: Dict[str, Dict[str, Dict[str, Any]]]
-        # 格式: {"仪式ID": {"阶段标识": {"id": 卡牌ID, "count": 数量}}}
-
-        # 自动化配置标志
-        self.rite_auto_result = data.get('rite_auto_result', False)  # 类型: bool
-        self.disable_auto_gen_sudan_card = data.get('disable_auto_gen_sudan_card', False)  # 类型: bool
-
-        # 自定义内容
-        self.custom_rite_name = data.get('custom_rite_name', {})  # 类型: Dict[str, str]
-        self.end_open = data.get('end_open', False)  # 类型: bool
-        self.is_armageddon = data.get('is_armageddon', False)  # 类型: bool
-        self.armageddon_rite_id = data.get('armageddon_rite_id', 0)  # 类型: int
-
-    def to_dict(self):
-        return {
-            # 基础字段
-            "configId": self.config_id,
-            "configVersion": self.config_version,
-            "name": self.name,
-            "difficulty": self.difficulty,
-            "round": self.round,
-            "saveTime": self.save_time,
-            "card_uid_index": self.card_uid_index,
-            "rite_uid_index": self.rite_uid_index,
-            "sudan_box_show": self.sudan_box_show,
-            "after_round_auto_sort": self.after_round_auto_sort,
-            "sudan_card_init_life": self.sudan_card_init_life,
-            "sudan_redraw_count": self.sudan_redraw_count,
-            "sudan_redraw_times_per_round": self.sudan_redraw_times_per_round,
-            "sudan_redraw_times": self.sudan_redraw_times,
-            "sudan_redraw_times_recovery_round": self.sudan_redraw_times_recovery_round,
-            "wizard_first_show": self.wizard_first_show,
-            "success": self.success,
-            "over_reason": self.over_reason,
-            "ithink_card": self.ithink_card,
-            "cards": [card.to_dict() for card in self.cards],
-            "rites": [rite.to_dict() for rite in self.rites],
-            "pins": self.pins,
-            "sudan_pool_cards": self.sudan_pool_cards,
-            "sudan_pool": self.sudan_pool,
-            "sudan_card_pool": self.sudan_card_pool,
-            "sudan_pool_pos": self.sudan_pool_pos,
-            "sudan_pool_init_count": self.sudan_pool_init_count,
-            "sudan_card_show_times": self.sudan_card_show_times,
-            "sudan_remove_count": self.sudan_remove_count,
-            "counter": self.counter,
-            "global_counter_cacher": self.global_counter_cacher,
-            "random_cache": self.random_cache,
-            "only_cards": self.only_cards,
-            "only_rites": self.only_rites,
-            "event_status": self.event_status,
-            "delay_ops": self.delay_ops,
-            "end_rites": self.end_rites,
-            "gen_cards": self.gen_cards,
-            "gen_tags": self.gen_tags,
-            "timing_rounds": self.timing_rounds,
-            "auto_result_rites": self.auto_result_rites,
-            "notes": [
-                [item.to_dict() for item in sublist]
-                for sublist in self.notes
-            ],
-            "once_new_rites_is_show": self.once_new_rites_is_show,
-            "cached_event": self.cached_event,
-            "BagIndex": self.BagIndex,
-            "last_round_rite_data": self.last_round_rite_data,
-            "rite_auto_result": self.rite_auto_result,
-            "disable_auto_gen_sudan_card": self.disable_auto_gen_sudan_card,
-            "custom_rite_name": self.custom_rite_name,
-            "end_open": self.end_open,
-            "is_armageddon": self.is_armageddon,
-            "armageddon_rite_id": self.armageddon_rite_id
-        }
-
-
-def load_config(file_path: str) -> JSONConfig:
+def _scan_sections(raw: bytes, lazy_keys) -> Tuple[Dict[str, Any], Dict[str, Tuple[int, int]]]:
+    """
+    逐个读取顶层字段：lazy_keys中的字段只跳过并保存原始字节，其余字段直接解码
+    返回字段值和各字段值在raw中的字节区间
+    """
+    text = raw.decode('utf-8')
+    ascii_only = len(text) == len(raw)
+    char_cursor = byte_cursor = 0
+
+    def byte_offset(pos: int) -> int:
+        # 位置单调递增，按增量换算字符位置到字节位置
+        nonlocal char_cursor, byte_cursor
+        if ascii_only:
+            return pos
+        byte_cursor += len(text[char_cursor:pos].encode('utf-8'))
+        char_cursor = pos
+        return byte_cursor
+
+    def skip(pos: int) -> int:
+        return _WHITESPACE.match(text, pos).end()
+
+    def expect(pos: int, char: str) -> int:
+        if text[pos:pos + 1] != char:
+            raise ValueError(f"存档格式错误：位置{pos}处应为'{char}'")
+        return pos + 1
+
+    sections, spans = {}, {}
+    pos = skip(1 if text.startswith('\ufeff') else 0)
+    pos = skip(expect(pos, '{'))
+    if text[pos:pos + 1] == '}':
+        return sections, spans
+    while True:
+        key, pos = _DECODER.raw_decode(text, pos)
+        pos = skip(expect(skip(pos), ':'))
+        start = byte_offset(pos)
+        if key in lazy_keys:
+            pos = _skip_value(text, pos)
+            spans[key] = (start, byte_offset(pos))
+            sections[key] = _LazySection(raw[start:spans[key][1]])
+        else:
+            sections[key], pos = _DECODER.raw_decode(text, pos)
+            spans[key] = (start, byte_offset(pos))
+        pos = skip(pos)
+        if text[pos:pos + 1] != ',':
+            break
+        pos = skip(pos + 1)
+    expect(pos, '}')
+    return sections, spans
+
+
+T = TypeVar('T')
+
+
+class _Section(Generic[T]):
+    """把顶层字段映射为带类型的属性"""
+
+    def __init__(self, key: str):
+        self.key = key
+
+    def __get__(self, config, owner=None) -> T:
+        if config is None:
+            return self
+        return config[self.key]
+
+    def __set__(self, config, value: T):
+        config[self.key] = value
+
+
+class JSONConfig(MutableMapping):
+    """
+    存档的面向对象封装
+    按顶层字段保存，字段顺序、未知字段和各字段的原始值都完整保留；cards、rites、notes转换为带槽位的记录，
+    其余字段保持JSON值。从字节流读取（from_bytes）时保留原始字节流，random_cache等很少使用的字段只记录
+    原始字节，第一次访问时才解码；写出时未修改的字段原样拷贝，读入后原样写出与原文件逐字节一致。
+    同时实现了MutableMapping接口，可以像界面使用的存档字典一样按字段名读写；
+    原地修改字段内容（如某张卡牌的life）后需调用mark_dirty标记该字段
+    """
+    __slots__ = ('_sections', '_raw', '_spans', '_keys', '_save_format', '_dirty')
+
+    # 很少使用、读取时先不解码的字段
+    LAZY_SECTIONS = ('random_cache', 'global_counter_cacher', 'delay_ops', 'last_round_rite_data')
+    # 转换为记录的字段：字段名 -> (转换为记录, 还原为JSON值)
+    RECORD_SECTIONS = {
+        'cards': (partial(_records_from_list, Card), _records_to_list),
+        'sudan_card_pool': (partial(_records_from_list, Card), _records_to_list),
+        'rites': (partial(_records_from_list, Rite), _records_to_list),
+        'notes': (_notes_from_list, _notes_to_list),
+    }
+
+    config_id = _Section[int]('configId')
+    config_version = _Section[str]('configVersion')
+    name = _Section[str]('name')
+    difficulty = _Section[int]('difficulty')
+    round = _Section[int]('round')  # 回合数
+    card_uid_index = _Section[int]('card_uid_index')
+    rite_uid_index = _Section[int]('rite_uid_index')
+    cards = _Section[List[Card]]('cards')  # 每回合的所有牌都会出现在cards中
+    rites = _Section[List[Rite]]('rites')
+    notes = _Section[List[List[NoteItem]]]('notes')
+    sudan_pool_cards = _Section[List[int]]('sudan_pool_cards')
+    # 计数器，其中7000060表示回合数，7000008表示治理家业的时候放入空置宅邸的回合数，每三个回合获得五金币并清零，
+    # 7100005是灵视，7000559是新月是否升级过的计数器
+    counter = _Section[Dict[str, int]]('counter')
+    # 事件状态（事件ID: 是否完成），true表示事件已经完成，可以再次触发
+    event_status = _Section[Dict[str, bool]]('event_status')
+    random_cache = _Section[Dict[str, Any]]('random_cache')  # 随机数缓存
+    global_counter_cacher = _Section[Dict[str, Any]]('global_counter_cacher')
+    delay_ops = _Section[List[Any]]('delay_ops')  # 延迟操作队列
+    # 上回合仪式数据，格式: {"仪式ID": {"阶段标识": {"id": 卡牌ID, "count": 数量}}}
+    last_round_rite_data = _Section[Dict[str, Dict[str, Dict[str, Any]]]]('last_round_rite_data')
+
+    def __init__(self, data: Dict[str, Any]):
+        self._sections: Dict[str, Any] = {}
+        for key, value in data.items():
+            if key in self.RECORD_SECTIONS:
+                value = self.RECORD_SECTIONS[key][0](value)
+            self._sections[key] = value
+        # 没有原始字节流，写出时完整序列化
+        self._raw = None
+        self._spans: Dict[str, Tuple[int, int]] = {}
+        self._keys: List[str] = []
+        self._save_format = None
+        self._dirty = set()
+
+    @classmethod
+    def from_bytes(cls, raw: bytes, lazy: bool = True) -> 'JSONConfig':
+        """从存档字节流读取，lazy为True时延迟解码LAZY_SECTIONS中的字段；不是标准JSON时抛出ValueError"""
+        sections, spans = _scan_sections(raw, cls.LAZY_SECTIONS if lazy else ())
+        config = cls(sections)
+        config._raw = raw
+        config._spans = spans
+        config._keys = list(spans)
+        config._save_format = detect_save_format(raw, config._keys, spans)
+        return config
+
+    def __getitem__(self, key: str):
+        value = self._sections[key]
+        if isinstance(value, _LazySection):
+            value, _ = loads_json_bytes(value.data)
+            self._sections[key] = value
+        return value
+
+    def __setitem__(self, key: str, value):
+        self._sections[key] = value
+        self._dirty.add(key)
+
+    def __delitem__(self, key: str):
+        del self._sections[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._sections)
+
+    def __len__(self) -> int:
+        return len(self._sections)
+
+    def mark_dirty(self, key: str):
+        """标记原地修改过的字段，写出时重新序列化"""
+        self._dirty.add(key)
+
+    @property
+    def save_time(self) -> datetime:
+        """文件保存时间，saveTime字段原样保留，读取时才转换"""
+        return convert_datetime(self['saveTime'])
+
+    @property
+    def compact(self) -> bool:
+        """写出格式是否为紧凑格式：从字节流读取时与原文件一致，否则为紧凑格式"""
+        return self._save_format is None or self._save_format[0] is None
+
+    def is_decoded(self, key: str) -> bool:
+        return not isinstance(self._sections.get(key), _LazySection)
+
+    def _section_value(self, key: str):
+        value = self[key]
+        if key in self.RECORD_SECTIONS:
+            value = self.RECORD_SECTIONS[key][1](value)
+        return value
+
+    def to_dict(self) -> Dict[str, Any]:
+        """还原为与读入时一致的存档字典"""
+        return {key: self._section_value(key) for key in self._sections}
+
+    def to_bytes(self) -> bytes:
+        """
+        按读入时的格式序列化：未修改的字段（包括未解码的字段）原样拷贝原始字节，修改过的字段按原文件的缩进和分隔符重新序列化；
+        没有原始字节流或字段有增删时完整序列化为紧凑格式
+        """
+        if self._raw is None or list(self._sections) != self._keys:
+            return dumps_json_bytes(self.to_dict())
+        parts = []
+        cursor = 0
+        for key in self._keys:
+            start, end = self._spans[key]
+            parts.append(self._raw[cursor:start])
+            if key in self._dirty:
+                parts.append(dump_section(key, self._section_value(key), self._save_format))
+            else:
+                parts.append(self._raw[start:end])
+            cursor = end
+        parts.append(self._raw[cursor:])
+        return b''.join(parts)
+
+
+def load_config(file_path: str, lazy: bool = True) -> JSONConfig:
     """
     加载并解析JSON配置文件
     :param file_path: JSON文件路径
+    :param lazy: 是否延迟解码很少使用的字段
     :return: 结构化配置对象
     """
-    with open(file_path, 'r', encoding='utf-8') as f:
-        raw_data = json.load(f)
-        return JSONConfig(raw_data)
-
-def save_config(config, file_path):
-    """保存配置到原始文件"""
+    with open(file_path, 'rb') as f:
+        raw = f.read()
     try:
-        config_dict = config.to_dict()
-
-        # 转换datetime格式（如果需要）
-        if hasattr(config, 'save_time'):
-            config_dict["saveTime"] = str(config.save_time)
+        return JSONConfig.from_bytes(raw, lazy=lazy)
+    except ValueError as e:
+        # 不是标准JSON（如JSON5格式）时按界面的读取方式解析，不保留原始字节
+        print(f"存档不是标准JSON，完整解析: {e}")
+        return JSONConfig(load_save_file(file_path))
 
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(config_dict, f, indent=4, ensure_ascii=False)
 
+def save_config(config: JSONConfig, file_path: str, compact: bool = False):
+    """保存配置到原始文件，saveTime等字段按读入时的原值写出；格式与读入时相同时未修改的字段原样写出"""
+    try:
+        if compact == config.compact:
+            write_bytes_atomic(file_path, config.to_bytes())
+        else:
+            write_save_file(file_path, config.to_dict(), compact=compact)
         # 显示保存成功提示
         print("保存成功", "配置文件已更新")
     except Exception as e:
         print("保存失败", f"错误信息：{str(e)}")
 
+
+def benchmark_model(file_path: str, repeat: int = 5) -> str:
+    """对比界面使用的存档字典和结构化模型的读取耗时、内存占用，并检查往返是否与原文件逐字节一致"""
+    with open(file_path, 'rb') as f:
+        raw = f.read()
+
+    def best_time(func) -> float:
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - start)
+        return best
+
+    dict_time = best_time(lambda: loads_json_bytes(raw))
+    model_time = best_time(lambda: JSONConfig.from_bytes(raw))
+    data, _ = loads_json_bytes(raw)
+    model = JSONConfig.from_bytes(raw)
+    dict_size = deep_sizeof(data)
+    # 模型保留的原始字节流和共享的字段顺序表计入模型的开销
+    seen = {id(_MISSING)}
+    model_size = deep_sizeof(model._sections, seen) + deep_sizeof(_KEY_ORDERS, seen) + sys.getsizeof(raw)
+    lazy_round_trip = model.to_bytes() == raw
+    decoded_round_trip = JSONConfig.from_bytes(raw, lazy=False).to_bytes() == raw
+    for key in JSONConfig.LAZY_SECTIONS:
+        if key in model:
+            model[key]
+    accessed_round_trip = model.to_bytes() == raw and model.to_dict() == data
+    return (f"存档：{file_path}（{len(raw) / 1024:.0f} KB，卡牌{len(data.get('cards', []))}张）\n"
+            f"读取耗时：字典 {dict_time * 1000:.1f}ms，模型 {model_time * 1000:.1f}ms\n"
+            f"内存占用：字典 {dict_size / 1024 / 1024:.2f} MB，模型 {model_size / 1024 / 1024:.2f} MB"
+            f"（{model_size / dict_size:.0%}，含原始字节流 {len(raw) / 1024 / 1024:.2f} MB）\n"
+            f"与原文件逐字节一致：延迟字段未解码 {lazy_round_trip}，不延迟解码 {decoded_round_trip}，"
+            f"访问延迟字段后 {accessed_round_trip}")
+
+
 def load_data(file_path):
     with open(file_path, 'r', encoding='utf-8') as f:
         raw_data = json.load(f)
@@ -374,76 +463,10 @@ def load_data(file_path):
         print(card)
         print('OK')
 
-class TagDataManager:
-    """标签元数据管理器"""
-
-    def __init__(self, tag_db_path: str):
-        self.tag_db = self._load_tag_db(tag_db_path)
-        self.tag_data_mapping = self._build_tag_data_mapping()
-        self.unknown_tag = {
-            "id": -1,
-            "name": "未知标签",
-            "code": "",
-            "type": "",
-            "text": "",
-            "tips": "",
-            "resource": "",
-            "can_add": -1,
-            "can_visible": -1,
-            "can_inherit": -1,
-            "can_nagative_and_zero": -1,
-            "fail_tag": [],
-            "tag_vanishing": -1,
-            "tag_sfx": "",
-            "tag_rank": -1,
-            "attributes": {}
-        }
-
-    def _load_tag_db(self, path: str) -> Dict:
-        """加载标签数据库"""
-        try:
-            with open(path, 'r', encoding='utf-8') as f:
-                return json5.load(f)
-        except FileNotFoundError:
-            print(f"标签数据库文件 {path} 未找到")
-            return {}
-        except Exception as e:
-            print(f"加载标签数据库时发生错误: {e}")
-            return {}
-
-    def _build_tag_data_mapping(self) -> Dict[str, dict]:
-        """构建标签名字到标签数据的映射"""
-        return {
-            name: data
-            for name, data in self.tag_db.items()
-        }
-
-    def get_tag_data(self, tag_name: str) -> dict:
-        return self.tag_data_mapping.get(tag_name, self.unknown_tag)
-
-
-
-# 使用示例
-if __name__ == "__main__":
-
-    file_path = "C:\\Users\\25285\Desktop\新建文件夹 (2)\\auto_save.json"
-    with open(file_path, 'r', encoding='utf-8') as f:
-        configId = next(items(f, 'configId'))
-        name = items(f, 'name')
-
 
-    tag_mgr = TagDataManager(
-        "E:\\SteamLibrary\\steamapps\\common\\Sultan's Game\\Sultan's Game_Data\\StreamingAssets\\config\\tag.json")
-
-    load_data("C:\\Users\\25285\\AppData\\LocalLow\\DoubleCross\\SultansGame\\SAVEDATA\\76561199041269113"
-                         "\\auto_save.json")
-
-    config = load_config("C:\\Users\\25285\\AppData\\LocalLow\\DoubleCross\\SultansGame\\SAVEDATA\\76561199041269113"
-                         "\\auto_save.json")
-
-    # 访问示例
-    print('OK')
+# 使用示例：python run.py <存档文件>，对比存档字典和结构化模型的读取耗时与内存占用
+if __name__ == "__main__":
+    print(benchmark_model(sys.argv[1]))
+    config = load_config(sys.argv[1])
     print(f"配置名称: {config.name}")
     print(f"保存时间: {config.save_time.isoformat()}")
-
-    save_config(config, "C:\\Users\\25285\\Desktop\\新建文件夹 (2)\\1auto_save.json")
@@ -0,0 +1,108 @@
+import json
+
+import pytest
+
+from manager.saveSectionWriter import SaveSectionWriter, detect_save_format, scan_save_layout
+
+# 测试用的存档书写格式：(名称, json.dumps参数, 是否紧凑)
+FORMATS = [
+    ("compact", {"separators": (',', ':')}, True),
+    ("compact_spaced", {"separators": (', ', ': ')}, True),
+    ("indent2", {"indent": 2}, False),
+    ("indent4", {"indent": 4}, False),
+    ("tab", {"indent": "\t"}, False),
+]
+
+
+def _make_config():
+    return {
+        "name": "主角",
+        "round": 3,
+        "cards": [
+            {"uid": 1, "id": 2000001, "life": 1, "tag": {"own": 1}, "equips": []},
+            {"uid": 2, "id": 2000002, "life": 5, "tag": {}, "equips": [3, 4]},
+            {"uid": 3, "id": 2000003, "life": 2, "tag": {"sudan_pool_index": 1}, "equips": []},
+        ],
+        "counter": {"7100001": 1, "7100002": 0},
+        "rites": [{"uid": 10, "id": 5000001, "cards": [1, 2]}],
+        "notes": [],
+    }
+
+
+def _dumps(config, options) -> bytes:
+    return json.dumps(config, ensure_ascii=False, **options).encode('utf-8')
+
+
+def _write_save(tmp_path, config, options):
+    path = tmp_path / "auto_save.json"
+    path.write_bytes(_dumps(config, options))
+    return str(path)
+
+
+@pytest.mark.parametrize("name, options, compact", FORMATS, ids=[item[0] for item in FORMATS])
+def test_detect_save_format(name, options, compact):
+    raw = _dumps(_make_config(), options)
+    keys, spans, _, _ = scan_save_layout(raw)
+    indent, _, _ = detect_save_format(raw, keys, spans)
+    assert (indent is None) == compact
+    if not compact:
+        expected = options["indent"]
+        assert indent == (expected if isinstance(expected, str) else " " * expected).encode()
+
+
+@pytest.mark.parametrize("name, options, compact", FORMATS, ids=[item[0] for item in FORMATS])
+def test_splice_card_and_section_keeps_format(tmp_path, name, options, compact):
+    config = _make_config()
+    path = _write_save(tmp_path, config, options)
+    writer = SaveSectionWriter(path)
+
+    config["cards"][1]["life"] = 99
+    config["cards"][1]["tag"] = {"own": 1, "新标签": 2}
+    config["counter"]["7100002"] = 7
+    writer.mark_card_dirty(2)
+    writer.mark_dirty("counter")
+    _, _, spliced = writer.write(config, compact=compact)
+
+    assert spliced == 2
+    data = open(path, 'rb').read()
+    assert json.loads(data) == config
+    # 拼接后的文件与按原格式完整序列化的结果逐字节一致
+    assert data == _dumps(config, options)
+
+
+@pytest.mark.parametrize("name, options, compact", FORMATS, ids=[item[0] for item in FORMATS])
+def test_splice_whole_cards_section(tmp_path, name, options, compact):
+    config = _make_config()
+    path = _write_save(tmp_path, config, options)
+    writer = SaveSectionWriter(path)
+
+    config["cards"].append({"uid": 4, "id": 2000004, "life": 1, "tag": {}, "equips": []})
+    del config["cards"][0]
+    writer.mark_dirty("cards")
+    _, _, spliced = writer.write(config, compact=compact)
+
+    assert spliced == 1
+    data = open(path, 'rb').read()
+    assert json.loads(data) == config
+    assert data == _dumps(config, options)
+
+    # 写入后记录的布局仍然正确，可以继续增量写入
+    config["cards"][0]["life"] = 8
+    writer.mark_card_dirty(config["cards"][0]["uid"])
+    _, _, spliced = writer.write(config, compact=compact)
+    assert spliced == 1
+    assert open(path, 'rb').read() == _dumps(config, options)
+
+
+@pytest.mark.parametrize("name, options, compact", FORMATS, ids=[item[0] for item in FORMATS])
+def test_format_change_falls_back_to_full_write(tmp_path, name, options, compact):
+    config = _make_config()
+    path = _write_save(tmp_path, config, options)
+    writer = SaveSectionWriter(path)
+
+    config["round"] = 4
+    writer.mark_dirty("round")
+    _, _, spliced = writer.write(config, compact=not compact)
+
+    assert spliced == -1
+    assert json.loads(open(path, 'rb').read()) == config
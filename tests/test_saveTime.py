@@ -0,0 +1,49 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from manager.saveTime import format_save_time, parse_save_time, save_time_to_datetime
+
+pytest.importorskip("dateutil")
+from dateutil import parser
+
+
+# 之前run.py中的解析方式：7位小数round()到微秒后交给dateutil
+def _legacy_convert(iso_str: str) -> datetime:
+    date_part, time_part = iso_str.split('.', 1)
+    time_part, tz_part = time_part.split('+', 1) if '+' in time_part else (
+        time_part.split('-', 1) if '-' in time_part else (time_part, ''))
+    microseconds = time_part[:7].ljust(7, '0')[:7]
+    rounded = str(round(int(microseconds) / 10)).zfill(6)
+    return parser.isoparse(f"{date_part}.{rounded[:6]}+{tz_part}")
+
+
+@pytest.mark.parametrize("text", [
+    "2025-05-01T12:34:56.1234560+08:00",
+    "2025-05-01T12:34:56.1234564+08:00",
+    "2025-05-01T12:34:56.1234565+08:00",
+    "2025-05-01T12:34:56.1234575+08:00",
+    "2025-05-01T12:34:56.1234566+08:00",
+    "2025-05-01T12:34:56.1234569+08:00",
+    "2025-05-01T12:34:56.0000005+08:00",
+    "2025-05-01T12:34:56.9999994+08:00",
+    "2025-05-01T12:34:56.12345+08:00",
+])
+def test_datetime_rounds_like_legacy_parser(text):
+    assert save_time_to_datetime(text) == _legacy_convert(text)
+
+
+def test_rounding_carries_into_next_second():
+    # 之前的解析方式在这里截断成100000微秒，新解析器正常进位
+    value = save_time_to_datetime("2025-05-01T12:34:56.9999996+08:00")
+    assert value == datetime(2025, 5, 1, 12, 34, 57, tzinfo=timezone(timedelta(hours=8)))
+
+
+@pytest.mark.parametrize("text", [
+    "2025-05-01T12:34:56.1234567+08:00",
+    "2025-05-01T12:34:56.9999999-05:30",
+    "2025-05-01T12:34:56.12345Z",
+    "2025-05-01T12:34:56",
+])
+def test_save_time_round_trips_exactly(text):
+    assert format_save_time(parse_save_time(text)) == text